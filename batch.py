@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import glob
+import os
+import traceback
+
+import translate
+
+try:
+    from concurrent.futures import ProcessPoolExecutor
+except ImportError:
+    # Python 2 without the futures backport
+    ProcessPoolExecutor = None
+
+
+class BatchResult(object):
+    """
+    Outcome of translating one module in a batch.
+    source:
+        Path of the .py file.
+    destination:
+        Path of the .c file written for it.
+    error:
+        Message describing why the module could not be translated,
+        or None if it was.
+    """
+
+    __slots__ = ("source", "destination", "error")
+
+    def __init__(self, source, destination, error=None):
+        self.source = source
+        self.destination = destination
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def read_manifest(filename):
+    """
+    Read the paths listed in a manifest file, one per line.
+    Blank lines and lines starting with # are skipped, and relative
+    paths are taken relative to the directory of the manifest.
+    """
+    base = os.path.dirname(filename)
+    paths = []
+    with open(filename, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                paths.append(os.path.join(base, line))
+    return paths
+
+
+def find_sources(paths):
+    """
+    Expand the paths given for a batch into the modules to translate.
+    paths:
+        Iterable of .py files, directories (searched recursively for
+        .py files) and glob patterns.
+    Returns a list of (source, name) where name is the path the .c
+    file should have relative to the output directory, without the
+    extension.
+    """
+    sources = []
+    seen = set()
+
+    def add(source, name):
+        key = os.path.abspath(source)
+        if key not in seen:
+            seen.add(key)
+            sources.append((source, name))
+
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.endswith(".py"):
+                        source = os.path.join(dirpath, filename)
+                        name = os.path.relpath(source, path)[:-len(".py")]
+                        add(source, name)
+        elif os.path.isfile(path):
+            add(path, os.path.splitext(os.path.basename(path))[0])
+        else:
+            matches = sorted(glob.glob(path))
+            if not matches:
+                # Keep it so it gets reported as a failure
+                add(path, os.path.splitext(os.path.basename(path))[0])
+            for match in matches:
+                if os.path.isdir(match):
+                    continue
+                add(match, os.path.splitext(os.path.basename(match))[0])
+    return sources
+
+
+def destination_for(source, name, output_dir=None):
+    """
+    Path of the .c file for a module. Without an output directory
+    the file goes next to the module.
+    """
+    if output_dir is None:
+        return os.path.splitext(source)[0] + ".c"
+    return os.path.join(output_dir, name + ".c")
+
+
+def translate_module(job):
+    """
+    Translate one module of a batch. This runs in a worker process,
+    so any error is caught and returned instead of raised.
+    job:
+        Tuple of (source, destination, indent_size, use_arena, cache).
+    Returns a BatchResult.
+    """
+    source, destination, indent_size, use_arena, cache = job
+    try:
+        directory = os.path.dirname(destination)
+        if directory and not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another worker may have made it first
+                if not os.path.isdir(directory):
+                    raise
+
+        # Write to a temporary file first so a failed translation
+        # doesn't leave a partial .c file behind.
+        tmp_destination = "{}.{}.tmp".format(destination, os.getpid())
+        try:
+            with open(tmp_destination, "w") as output:
+                translate.translate(source, indent_size=indent_size,
+                                    use_arena=use_arena, output=output,
+                                    cache=cache)
+            os.rename(tmp_destination, destination)
+        finally:
+            if os.path.exists(tmp_destination):
+                os.remove(tmp_destination)
+    except SyntaxError as e:
+        return BatchResult(source, destination,
+                           "SyntaxError: {} (line {})".format(e.msg, e.lineno))
+    except Exception as e:
+        message = str(e) or traceback.format_exc().strip().splitlines()[-1]
+        return BatchResult(source, destination,
+                           "{}: {}".format(type(e).__name__, message))
+    return BatchResult(source, destination)
+
+
+def make_pool(jobs):
+    """
+    Create a process pool with the given number of workers,
+    using ProcessPoolExecutor when it is available.
+    Returns an object with map() and shutdown().
+    """
+    if ProcessPoolExecutor is not None:
+        return ProcessPoolExecutor(max_workers=jobs)
+
+    import multiprocessing
+
+    class Pool(object):
+        def __init__(self):
+            self.pool = multiprocessing.Pool(jobs)
+
+        def map(self, func, iterable):
+            return self.pool.imap(func, iterable)
+
+        def shutdown(self):
+            self.pool.close()
+            self.pool.join()
+
+    return Pool()
+
+
+def translate_batch(paths, output_dir=None, jobs=None, indent_size=4,
+                    use_arena=False, cache=None):
+    """
+    Translate many modules at once, spread across a pool of processes.
+    A module that fails to translate doesn't stop the others.
+    paths:
+        Iterable of .py files, directories and glob patterns.
+    output_dir:
+        Directory to write the .c files to, mirroring the layout of the
+        directories given. If not given, each .c file is written next
+        to its module.
+    jobs:
+        Number of worker processes. Defaults to the number of cores.
+    cache:
+        TranslationCache to reuse earlier translations from.
+    Returns a list of BatchResult in the order the modules were found.
+    """
+    sources = find_sources(paths)
+
+    results = []
+    work = []
+    claimed = {}
+    for source, name in sources:
+        destination = destination_for(source, name, output_dir)
+        key = os.path.abspath(destination)
+        if key in claimed:
+            results.append(BatchResult(
+                source, destination,
+                "Output clashes with the one for {}".format(claimed[key])))
+            continue
+        claimed[key] = source
+        results.append(None)
+        work.append((source, destination, indent_size, use_arena, cache))
+
+    if jobs is None:
+        import multiprocessing
+        jobs = multiprocessing.cpu_count()
+    jobs = max(1, min(jobs, len(work)))
+
+    if jobs == 1:
+        done = [translate_module(job) for job in work]
+    else:
+        pool = make_pool(jobs)
+        try:
+            done = list(pool.map(translate_module, work))
+        finally:
+            pool.shutdown()
+
+    done = iter(done)
+    return [result if result is not None else next(done)
+            for result in results]
+
+
+def report(results, stream):
+    """
+    Write a line for every failed module and a summary.
+    Returns the number of failures.
+    """
+    failures = [result for result in results if not result.ok]
+    for result in failures:
+        print("{}: {}".format(result.source, result.error), file=stream)
+    print("Translated {} of {} modules.".format(
+        len(results) - len(failures), len(results)), file=stream)
+    return len(failures)
@@ -0,0 +1,88 @@
+/**
+ * How close runtime integers come to raw C longs.
+ *
+ * Runs the same loop of an addition, a multiplication and a
+ * subtraction on raw longs, on Integers that fit in a long (the
+ * inline fast path) and on Integers that have outgrown one (the
+ * bignum path), written the way translated code does it. Then times
+ * squaring bignums of growing size, which is done the schoolbook way
+ * up to KARATSUBA_CUTOFF limbs and the Karatsuba way beyond.
+ *
+ * Built and run by benchmarks/run.py --micro.
+ */
+#include <stdio.h>
+#include <time.h>
+
+#include "c_utils/Integer.h"
+
+#define ITERATIONS 10000000
+#define SQUARINGS 200
+
+// Keeps the compiler from working out the raw loop ahead of time
+#define OPAQUE(x) __asm__ __volatile__("" : "+r"(x))
+
+static double now(){
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec*1e-9;
+}
+
+static double raw_loop(long start){
+    double t = now();
+    long x = start;
+    long i;
+    for (i = 0; i < ITERATIONS; i++){
+        x = x + i;
+        long y = x*2;
+        x = y - x;
+        OPAQUE(x);
+    }
+    t = now() - t;
+    if (x == 0){
+        printf("unreachable\n");
+    }
+    return t;
+}
+
+static double integer_loop(Object *start){
+    double t = now();
+    Object *x = start;
+    long i;
+    for (i = 0; i < ITERATIONS; i++){
+        x = integer_add(x, new_Integer(i));
+        Object *y = integer_mul(incref(x), new_Integer(2));
+        x = integer_sub(y, x);
+    }
+    t = now() - t;
+    decref(x);
+    return t;
+}
+
+static void print_row(const char *name, double seconds, double raw){
+    printf("%-32s %8.2f ns/iteration %8.2fx\n", name,
+           seconds*1e9/ITERATIONS, seconds/raw);
+}
+
+int main(){
+    double raw = raw_loop(0);
+    print_row("long", raw, raw);
+    print_row("Integer, fits in a long", integer_loop(new_Integer(0)), raw);
+    print_row("Integer, bignum of 3 limbs",
+              integer_loop(integer_pow(new_Integer(2), 70)), raw);
+
+    printf("\n%-10s %16s\n", "limbs", "us/squaring");
+    unsigned int bits;
+    for (bits = 1024; bits <= 262144; bits *= 4){
+        Object *n = integer_sub(integer_pow(new_Integer(2), bits),
+                                new_Integer(1));
+        double t = now();
+        int i;
+        for (i = 0; i < SQUARINGS; i++){
+            decref(integer_mul(incref(n), incref(n)));
+        }
+        t = now() - t;
+        printf("%-10u %16.2f\n", n->length, t*1e6/SQUARINGS);
+        decref(n);
+    }
+    return 0;
+}
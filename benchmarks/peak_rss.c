@@ -0,0 +1,65 @@
+/**
+ * Run a command and report its wall time and peak RSS.
+ *
+ * Usage: peak_rss REPORT_FILE COMMAND [ARGS...]
+ *
+ * Writes "<seconds> <peak RSS in KiB> <exit status>" to REPORT_FILE.
+ * The peak RSS the kernel reports for a child includes what it had
+ * before exec, so measuring a command forked straight from python
+ * would count python's own memory. Forking from this small process
+ * keeps that out of the measurement.
+ */
+#include <stdio.h>
+#include <stdlib.h>
+#include <sys/resource.h>
+#include <sys/time.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+int main(int argc, char **argv){
+    if (argc < 3){
+        fprintf(stderr, "usage: %s REPORT_FILE COMMAND [ARGS...]\n", argv[0]);
+        return 2;
+    }
+
+    struct timeval start, end;
+    gettimeofday(&start, NULL);
+
+    pid_t pid = fork();
+    if (pid < 0){
+        perror("fork");
+        return 2;
+    }
+    if (pid == 0){
+        execvp(argv[2], argv + 2);
+        perror("execvp");
+        _exit(127);
+    }
+
+    int status;
+    struct rusage usage;
+    if (wait4(pid, &status, 0, &usage) < 0){
+        perror("wait4");
+        return 2;
+    }
+    gettimeofday(&end, NULL);
+
+    double seconds = (end.tv_sec - start.tv_sec) +
+                     (end.tv_usec - start.tv_usec) / 1e6;
+    long rss = usage.ru_maxrss;
+#ifdef __APPLE__
+    // Bytes instead of KiB
+    rss /= 1024;
+#endif
+
+    FILE *report = fopen(argv[1], "w");
+    if (!report){
+        perror("fopen");
+        return 2;
+    }
+    fprintf(report, "%f %ld %d\n", seconds, rss,
+            WIFEXITED(status) ? WEXITSTATUS(status) : 128 + WTERMSIG(status));
+    fclose(report);
+    return 0;
+}
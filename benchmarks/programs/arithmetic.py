@@ -0,0 +1,11 @@
+from __future__ import print_function
+# sizes: 100 1000 10000
+N = 1000
+total = 0
+x = 0.0
+for i in range(N):
+    for j in range(100):
+        total += (i * j) % 7 - (i ^ j) // 3 + (j << 2)
+        x = x + j * 0.5 - x / 3.0
+print(total)
+print(x)
@@ -0,0 +1,15 @@
+from __future__ import print_function
+# sizes: 200 1000 4000
+N = 1000
+f = 1
+for i in range(1, N):
+    f = f * i
+a = 0
+b = 1
+for i in range(N * 5):
+    c = a + b
+    a = b
+    b = c
+print(f % 1000000007)
+print(b % 1000000007)
+print(f // b % 1000003)
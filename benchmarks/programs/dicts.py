@@ -0,0 +1,24 @@
+from __future__ import print_function
+# sizes: 1000 10000 100000
+N = 10000
+counts = {}
+for i in range(N):
+    counts[i % 977] = 0
+for i in range(N):
+    counts[(i * 31) % 977] += 1
+squares = {}
+for i in range(N):
+    squares[i] = i * i
+hits = 0
+for i in range(0, 2 * N, 3):
+    hits += i in squares
+for i in range(0, N, 2):
+    del squares[i]
+total = 0
+for k in squares:
+    total += squares[k]
+seen = {0}
+print(counts[5])
+print(hits)
+print(total)
+print(0 in seen)
@@ -0,0 +1,6 @@
+from __future__ import print_function
+# sizes: 100 1000 10000
+N = 1000
+for i in range(N):
+    print([i, i * 2, 0.5, "item", i % 3])
+    print([i - 1, "previous"])
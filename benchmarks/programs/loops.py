@@ -0,0 +1,11 @@
+from __future__ import print_function
+# sizes: 100 1000 3000
+N = 1000
+count = 0
+for i in range(N):
+    for j in range(N):
+        count += (i + j) & 3
+print(count)
+for i in range(N, 0, -7):
+    count -= i
+print(count)
@@ -0,0 +1,23 @@
+from __future__ import print_function
+# sizes: 1000 10000
+N = 1000
+x = 2**62
+y = x * 4
+print(y)
+m = 9223372036854775807
+m = m + 1
+print(m)
+print(3**50)
+print(1 << 70)
+big = 2**60
+total = 0
+count = 0
+for i in range(N):
+    total += big
+    count += i * i
+print(total)
+print(count)
+shifted = 0
+for i in range(N):
+    shifted = (shifted << 1) + i
+print(shifted % 1000000007)
@@ -0,0 +1,10 @@
+from __future__ import print_function
+# sizes: 1000 10000 100000
+N = 1000
+f = 0.25
+for i in range(N):
+    print(i)
+    print("line")
+    print(f)
+    f = f + 0.5
+print("done")
@@ -0,0 +1,384 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark the translator, the compiler and the generated programs.
+
+Every program in benchmarks/programs is run at each of the sizes listed
+on its '# sizes:' line, by rewriting its 'N = ...' line. For each size
+this records:
+    - the wall time and peak RSS of every translator stage,
+    - the time it takes to compile the generated C,
+    - the run time and peak RSS of the compiled program and of python
+      running the same file.
+
+Results are written as JSON, and can be compared against a saved
+baseline to spot regressions.
+
+With --micro, it instead builds and runs the C programs in
+benchmarks/micro, which time parts of the runtime directly, and prints
+what they report.
+"""
+from __future__ import print_function
+
+import glob
+import hashlib
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+import profiling  # noqa: E402
+import runtime  # noqa: E402
+import translate  # noqa: E402
+
+PROGRAMS_DIR = os.path.join(HERE, "programs")
+MICRO_DIR = os.path.join(HERE, "micro")
+
+SIZES_RE = re.compile(r"^# sizes:(.*)$", re.MULTILINE)
+SIZE_RE = re.compile(r"^N = \d+$", re.MULTILINE)
+
+# Path in a result of each metric to compare, and whether getting
+# bigger counts as a regression. python and the speedup over it are
+# only there for reference since they aren't ours to regress.
+METRICS = (
+    (("translate", "seconds"), True),
+    (("compile_seconds",), True),
+    (("c", "seconds"), True),
+    (("c", "peak_rss_kb"), True),
+    (("python", "seconds"), None),
+    (("speedup",), None),
+)
+
+# Differences in seconds smaller than this are noise
+MIN_SECONDS = 0.02
+
+
+def find_programs(pattern=None):
+    """
+    Return a list of (name, path, sizes) for every benchmark program
+    whose name contains the pattern.
+    """
+    programs = []
+    for path in sorted(glob.glob(os.path.join(PROGRAMS_DIR, "*.py"))):
+        name = os.path.basename(path)[:-len(".py")]
+        if pattern and pattern not in name:
+            continue
+        with open(path, "r") as f:
+            match = SIZES_RE.search(f.read())
+        sizes = [int(size) for size in match.group(1).split()] if match \
+            else [None]
+        programs.append((name, path, sizes))
+    return programs
+
+
+def sized_source(path, size, directory):
+    """
+    Write a copy of the program with N set to size.
+    Returns the path of the copy.
+    """
+    with open(path, "r") as f:
+        text = f.read()
+    if size is not None:
+        text = SIZE_RE.sub("N = {}".format(size), text, count=1)
+    sized = os.path.join(directory, os.path.basename(path))
+    with open(sized, "w") as f:
+        f.write(text)
+    return sized
+
+
+def build_launcher(directory):
+    """
+    Compile peak_rss.c, which the programs are run through.
+    Returns the path of the executable.
+    """
+    launcher = os.path.join(directory, "peak_rss")
+    subprocess.check_call([runtime.CC, "-O2", "-o", launcher,
+                           os.path.join(HERE, "peak_rss.c")])
+    return launcher
+
+
+def run_process(launcher, args, output):
+    """
+    Run a command with its stdout going to the output file.
+    Returns (seconds, peak RSS in KiB, exit status).
+    """
+    fd, report = tempfile.mkstemp(prefix="py2c-rss-")
+    os.close(fd)
+    try:
+        subprocess.check_call([launcher, report] + list(args), stdout=output)
+        with open(report, "r") as f:
+            seconds, rss, status = f.read().split()
+    finally:
+        os.remove(report)
+    return float(seconds), int(rss), int(status)
+
+
+def best_run(launcher, args, output_path, repeat):
+    """
+    Run a command repeat times, keeping the fastest time and the
+    largest peak RSS.
+    Returns (measurements, digest of the output).
+    """
+    best = None
+    peak = 0
+    for _ in range(repeat):
+        with open(output_path, "w") as output:
+            seconds, rss, status = run_process(launcher, args, output)
+        if status:
+            raise RuntimeError("{} exited with status {}".format(
+                " ".join(args), status))
+        best = seconds if best is None else min(best, seconds)
+        peak = max(peak, rss)
+    with open(output_path, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return {"seconds": best, "peak_rss_kb": peak}, digest
+
+
+def profile_translation(source, destination):
+    """
+    Translate in a fresh process so peak RSS only reflects this one
+    translation. Returns the profile as a dict.
+    """
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__),
+         "--translate-one", source, destination])
+    return json.loads(output.decode("utf-8"))
+
+
+def translate_one(source, destination):
+    """
+    Body of the process started by profile_translation.
+    """
+    profile = profiling.Profile()
+    with open(source, "r") as f:
+        text = f.read()
+    with open(destination, "w") as output:
+        translate.translate_source(text, output=output, profile=profile)
+    print(json.dumps(profile.as_dict()))
+
+
+def benchmark(name, path, size, python, repeat, launcher):
+    """
+    Measure one program at one size.
+    Returns the result as a dict.
+    """
+    directory = tempfile.mkdtemp(prefix="py2c-bench-")
+    try:
+        source = sized_source(path, size, directory)
+        c_file = os.path.join(directory, "translated.c")
+        result = {"benchmark": name, "size": size}
+
+        result["translate"] = profile_translation(source, c_file)
+
+        with open(c_file, "r") as f:
+            code = f.read()
+        start = time.time()
+        executable = runtime.compile_program(code, directory)
+        result["compile_seconds"] = time.time() - start
+        if executable is None:
+            raise RuntimeError("Could not compile {}".format(name))
+
+        result["c"], c_digest = best_run(
+            launcher, [executable], os.path.join(directory, "c.out"),
+            repeat)
+        result["python"], py_digest = best_run(
+            launcher, [python, source], os.path.join(directory, "py.out"),
+            repeat)
+        result["output_matches"] = c_digest == py_digest
+        result["speedup"] = (result["python"]["seconds"] /
+                             max(result["c"]["seconds"], 1e-9))
+    finally:
+        shutil.rmtree(directory)
+    return result
+
+
+def run(pattern=None, python=sys.executable, repeat=3, quick=False,
+        log=sys.stderr):
+    """
+    Run every benchmark. Returns the results as a dict ready to be
+    dumped as JSON.
+    """
+    # Keep building the runtime out of the compile times
+    if runtime.build_runtime() is None:
+        raise RuntimeError("Could not build the runtime library")
+
+    results = {}
+    directory = tempfile.mkdtemp(prefix="py2c-bench-")
+    try:
+        launcher = build_launcher(directory)
+        for name, path, sizes in find_programs(pattern):
+            if quick:
+                sizes = sizes[:1]
+            for size in sizes:
+                key = name if size is None else "{}/{}".format(name, size)
+                print("{} ...".format(key), end=" ", file=log)
+                log.flush()
+                result = benchmark(name, path, size, python, repeat,
+                                   launcher)
+                results[key] = result
+                print("C {:.4f}s, python {:.4f}s{}".format(
+                    result["c"]["seconds"], result["python"]["seconds"],
+                    "" if result["output_matches"] else
+                    " (OUTPUT DIFFERS)"), file=log)
+    finally:
+        shutil.rmtree(directory)
+
+    return {
+        "translator_version": translate.__version__,
+        "python": platform.python_version(),
+        "cc": runtime.CC,
+        "cflags": runtime.CFLAGS,
+        "results": results,
+    }
+
+
+def run_micro(pattern=None, cflags=runtime.CFLAGS, stream=sys.stdout):
+    """
+    Build and run every micro-benchmark whose name contains the pattern,
+    printing what each one reports.
+    Returns the number that failed to build or run.
+    """
+    failures = 0
+    for path in sorted(glob.glob(os.path.join(MICRO_DIR, "*.c"))):
+        name = os.path.basename(path)[:-len(".c")]
+        if pattern and pattern not in name:
+            continue
+        print("== {} ==".format(name), file=stream)
+        stream.flush()
+        with open(path, "r") as f:
+            code = f.read()
+        directory = tempfile.mkdtemp(prefix="py2c-micro-")
+        try:
+            executable = runtime.compile_program(code, directory, name,
+                                                 cflags)
+            if executable is None or subprocess.call([executable],
+                                                     stdout=stream):
+                print("{} failed".format(name), file=stream)
+                failures += 1
+        finally:
+            shutil.rmtree(directory)
+        print(file=stream)
+    return failures
+
+
+def lookup(result, path):
+    for key in path:
+        result = result.get(key) if isinstance(result, dict) else None
+    return result
+
+
+def compare(baseline, current, threshold, stream=sys.stdout):
+    """
+    Print how each metric changed from the baseline and return the
+    number of regressions bigger than threshold (a fraction).
+    """
+    regressions = 0
+    row = "{:<24} {:<22} {:>12} {:>12} {:>8}"
+    print(row.format("benchmark", "metric", "baseline", "current",
+                     "change"), file=stream)
+    for key in sorted(current["results"]):
+        old = baseline["results"].get(key)
+        if old is None:
+            continue
+        new = current["results"][key]
+        if not new.get("output_matches", True):
+            print("{}: output differs from python".format(key), file=stream)
+            regressions += 1
+        for path, bigger_is_worse in METRICS:
+            before = lookup(old, path)
+            after = lookup(new, path)
+            if not before or after is None:
+                continue
+            change = (after - before) / float(before)
+            noise = ("seconds" in path[-1] and
+                     abs(after - before) < MIN_SECONDS)
+            flag = ""
+            if bigger_is_worse and change > threshold and not noise:
+                flag = " REGRESSION"
+                regressions += 1
+            print(row.format(key, ".".join(path), "{:.4g}".format(before),
+                             "{:.4g}".format(after),
+                             "{:+.1%}".format(change)) + flag, file=stream)
+    return regressions
+
+
+def get_args():
+    from argparse import ArgumentParser, SUPPRESS
+
+    parser = ArgumentParser(description="Benchmark the translator and the "
+                            "programs it generates against python")
+    parser.add_argument(
+        "-o", "--output",
+        help="File to write the results to as JSON instead of stdout."
+    )
+    parser.add_argument(
+        "--compare", metavar="BASELINE",
+        help="JSON results of an earlier run to compare against. Exits with "
+        "1 if anything got worse by more than the threshold."
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="Fraction a metric may get worse by before it counts as a "
+        "regression. Defaults to 0.1."
+    )
+    parser.add_argument(
+        "-k", "--filter",
+        help="Only run the benchmarks whose name contains this."
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3,
+        help="Number of times to run each program, keeping the fastest."
+    )
+    parser.add_argument(
+        "--quick", default=False, action="store_true",
+        help="Only run the smallest size of each benchmark."
+    )
+    parser.add_argument(
+        "--python", default=sys.executable,
+        help="Interpreter to run the python programs with. Defaults to the "
+        "one running this script."
+    )
+    parser.add_argument(
+        "--micro", default=False, action="store_true",
+        help="Run the C micro-benchmarks of the runtime in benchmarks/micro "
+        "instead and print what they report."
+    )
+    parser.add_argument("--translate-one", nargs=2, help=SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    if args.translate_one:
+        translate_one(*args.translate_one)
+        return 0
+    if args.micro:
+        return 1 if run_micro(args.filter) else 0
+
+    results = run(args.filter, args.python, args.repeat, args.quick)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    elif not args.compare:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        if compare(baseline, results, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,3 +13,22 @@ def is_literal(node):
     Check if a node represents a python literal.
     """
     return any(map(lambda x: isinstance(node, x), LITERAL_NODES))
+
+
+def c_string_literal(s):
+    """
+    Return a C string literal (with the quotes) holding the bytes of s.
+    """
+    escapes = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\t": "\\t",
+               "\r": "\\r"}
+    chars = []
+    for c in s:
+        if c in escapes:
+            chars.append(escapes[c])
+        elif " " <= c <= "~":
+            chars.append(c)
+        else:
+            # Octal escapes never swallow the characters after them
+            # the way hex escapes can.
+            chars.append("\\{:03o}".format(ord(c)))
+    return '"{}"'.format("".join(chars))
@@ -4,7 +4,25 @@ from __future__ import print_function
 
 import ast
 
+import expressions
+import infer
+
 from block_utils import *
+from scope import Scope
+
+
+def walk(block):
+    """
+    Generate the block and every block nested in it.
+    """
+    stack = [block]
+    while stack:
+        block = stack.pop()
+        yield block
+        if not isinstance(block, InlineBlock):
+            children = (block.before + block.sticky_front + block.contents +
+                        block.sticky_end + block.after)
+            stack.extend(reversed(children))
 
 
 class Block(object):
@@ -15,6 +33,9 @@ class Block(object):
     the returned code.
     """
 
+    __slots__ = ("contents", "should_indent", "sticky_front", "sticky_end",
+                 "before", "after", "scope")
+
     indent = 4
 
     def __init__(self, contents=None, should_indent=True, sticky_front=None,
@@ -38,7 +59,7 @@ class Block(object):
         after:
             List of blocks to appear after an instance of this block.
         variables:
-            List of variables in the scope of this block.
+            List of variables to declare in the scope of this block.
         """
         # Get around the mutable default arguments
         contents = contents or []
@@ -55,11 +76,14 @@ class Block(object):
         self.sticky_front = sticky_front
         self.before = before
         self.after = after
-        self.variables = variables
+        self.scope = Scope()
 
         # Other initialization
+        for var in variables:
+            self.append_variable(var)
         for var in sticky_front + sticky_end:
-            if isinstance(var, ExprBlock) and var not in variables:
+            if (isinstance(var, ExprBlock) and
+                    not self.scope.is_local(var.name)):
                 self.append_variable(var)
 
     @property
@@ -80,21 +104,17 @@ class Block(object):
 
     def append_variable(self, var):
         """
-        Add a variable name to the list of variables.
+        Declare a variable in the scope of this block.
         """
         assert isinstance(var, ExprBlock)
-        if var in self.variables:
-            raise Exception(
-                ("Attempted to add variable '{}' in scope of {} when it "
-                 "already exists: {}")
-                .format(var, self.__class__, map(str, self.variables)))
-        self.variables.append(var)
+        self.scope.declare(var)
 
     def append_block(self, block):
         """
         Append another block to this block's contents.
-        Add the variables within the scope of this block to the
-        list of variables of the child block.
+        A child block with a body gets its scope chained to the scope
+        of this block, so it sees this block's variables without
+        copying them.
         """
         assert issubclass(block.__class__, Block)
 
@@ -103,22 +123,18 @@ class Block(object):
             pass
         elif isinstance(block, ExprBlock):
             self.append_variable(block)
-        else:
+        elif isinstance(block, InlineBlock):
             # block is an inline block that contains variables
             # which should be added to this block's scope
-            if isinstance(block, InlineBlock):
-                for var in block.variables:
-                    if (isinstance(var, ExprBlock) and
-                            var not in self.variables):
-                        self.append_variable(var)
-
+            for var in block.variables:
+                if not self.scope.is_local(var.name):
+                    self.append_variable(var)
+        else:
             # block is a block that can hold variables
-            for var in self.variables:
-                if var not in block.variables:
-                    block.append_variable(var)
+            block.scope.parent = self.scope
             for var in block.before + block.after:
                 if (isinstance(var, ExprBlock) and
-                        var not in self.variables):
+                        not self.scope.is_local(var.name)):
                     self.append_variable(var)
 
     def append_blocks(self, blocks):
@@ -128,25 +144,47 @@ class Block(object):
         for block in blocks:
             self.append_block(block)
 
-    def block_strings(self):
+    def indentation(self, depth):
         """
-        Meant to be called by __str__ to actually return the True
-        formatted blocks.
+        The whitespace to put in front of a line depth levels deep.
         """
-        indentation = " "*self.indent if self.should_indent else ""
-        child_contents = []
+        return " "*(self.indent*depth)
 
+    def header(self):
+        """
+        Return the line that opens the block, or None if it has none.
+        """
+        return None
+
+    def body_lines(self, depth):
+        """
+        Generate the lines of the contents of this block (with
+        the sticky parts) at the given depth.
+        """
         for content in self.sticky_front + self.contents + self.sticky_end:
-            content = content.block_strings()
-            if isinstance(content, list):
-                for nested_content in content:
-                    child_contents.append(indentation + str(nested_content))
-            else:
-                child_contents.append(indentation + str(content))
-        return child_contents
+            for line in content.iter_lines(depth):
+                yield line
+
+    def iter_lines(self, depth=0):
+        """
+        Generate the formatted lines of this block one at a time,
+        each already indented for a block depth levels deep.
+        """
+        child_depth = depth + 1 if self.should_indent else depth
+        return self.body_lines(child_depth)
+
+    def write(self, sink, depth=0):
+        """
+        Write the formatted lines of this block to a file-like sink
+        as they are generated, so the whole output is never held in
+        memory.
+        """
+        for line in self.iter_lines(depth):
+            sink.write(line)
+            sink.write("\n")
 
     def __str__(self):
-        return "\n".join(self.block_strings())
+        return "\n".join(self.iter_lines())
 
 
 class FunctionBlock(Block):
@@ -162,6 +200,9 @@ class FunctionBlock(Block):
     contents:
         List of blocks to fill this block with.
     """
+
+    __slots__ = ("func_type", "name", "args")
+
     def __init__(self, func_type, name, args, contents=None, sticky_front=None,
                  sticky_end=None, before=None, after=None, variables=None):
         super(FunctionBlock, self).__init__(
@@ -177,68 +218,136 @@ class FunctionBlock(Block):
         for arg in args:
             self.append_variable(arg)
 
-    def block_strings(self):
+    def header(self):
         """
-        Meant to be called by __str__ to actually return the True
-        formatted blocks.
+        Return the line the function starts with.
         """
-        indentation = " "*self.indent if self.should_indent else ""
-
-        child_contents = map(str, self.before)
-        child_contents += ["{type} {name}({args}){{".format(
+        return "{type} {name}({args}){{".format(
             type=self.func_type, name=self.name,
             args=", ".join(map(str, self.args))
-        )]
+        )
 
-        for content in self.sticky_front + self.contents + self.sticky_end:
-            content = content.block_strings()
-            if isinstance(content, list):
-                for nested_content in content:
-                    child_contents.append(indentation + str(nested_content))
-            else:
-                child_contents.append(indentation + str(content))
-        child_contents += ["}"]
+    def iter_lines(self, depth=0):
+        indentation = self.indentation(depth)
+        for block in self.before:
+            for line in block.iter_lines(depth):
+                yield line
 
-        child_contents += map(str, self.after)
+        yield indentation + self.header()
+        for line in self.body_lines(depth + 1):
+            yield line
+        yield indentation + "}"
 
-        return child_contents
+        for block in self.after:
+            for line in block.iter_lines(depth):
+                yield line
 
 
 class ForBlock(Block):
     """
-    Block for for loops
+    Block for for loops.
+    iterator:
+        Name of the int variable that is counted.
+    max_iteration:
+        The value the iterator stops before.
+    start:
+        The value the iterator starts at.
+    step:
+        The amount added to the iterator every iteration.
+        If this is a number, its sign picks the comparison used
+        against max_iteration. Otherwise it is a C expression and
+        the sign is checked at runtime.
     """
+
+    __slots__ = ("iterator", "max_iteration", "start", "step")
+
     def __init__(self, iterator, max_iteration, contents=None,
                  sticky_front=None, sticky_end=None, before=None, after=None,
-                 variables=None):
+                 variables=None, start=0, step=1):
         super(ForBlock, self).__init__(
             contents=contents, sticky_front=sticky_front,
             sticky_end=sticky_end, before=before, after=after,
             variables=variables
         )
+        if step == 0:
+            raise Exception("The step of a for loop cannot be zero")
         self.iterator = iterator
         self.max_iteration = max_iteration
+        self.start = start
+        self.step = step
 
-    def block_strings(self):
-        indentation = " "*self.indent if self.should_indent else ""
+    def header(self):
+        """
+        Return the for(...) line of the loop.
+        """
+        # A step of one can't overflow, since the counter only gets
+        # there if it hasn't reached the stop yet. Bigger steps
+        # saturate instead of wrapping around (see range_step).
+        if isinstance(self.step, (int, long)):
+            condition = "{} {} {}".format(
+                self.iterator, "<" if self.step > 0 else ">",
+                self.max_iteration)
+            if self.step == 1:
+                increment = "{}++".format(self.iterator)
+            elif self.step == -1:
+                increment = "{}--".format(self.iterator)
+            else:
+                increment = "{it} = range_step({it}, {step})".format(
+                    it=self.iterator, step=self.step)
+        else:
+            condition = "({step}) > 0 ? {it} < {stop} : {it} > {stop}".format(
+                step=self.step, it=self.iterator, stop=self.max_iteration)
+            increment = "{it} = range_step({it}, {step})".format(
+                it=self.iterator, step=self.step)
 
-        child_contents = map(str, self.before)
-        child_contents += [
-            "for({iterator} = 0; {iterator} < {max_iteration}; {iterator}++){{"
-            .format(iterator=self.iterator, max_iteration=self.max_iteration)
-        ]
+        return "for({iterator} = {start}; {condition}; {increment}){{".format(
+            iterator=self.iterator, start=self.start, condition=condition,
+            increment=increment)
 
-        for content in self.sticky_front + self.contents + self.sticky_end:
-            content = content.block_strings()
-            if isinstance(content, list):
-                for nested_content in content:
-                    child_contents.append(indentation + str(nested_content))
-            else:
-                child_contents.append(indentation + str(content))
-        child_contents += ["}"]
-        child_contents += map(str, self.after)
+    def iter_lines(self, depth=0):
+        indentation = self.indentation(depth)
+        for block in self.before:
+            for line in block.iter_lines(depth):
+                yield line
+
+        yield indentation + self.header()
+        for line in self.body_lines(depth + 1):
+            yield line
+        yield indentation + "}"
 
-        return child_contents
+        for block in self.after:
+            for line in block.iter_lines(depth):
+                yield line
+
+
+class ForEachBlock(ForBlock):
+    """
+    Block for loops over the elements of an object, stepping an
+    Iterator along it (see c_utils/Object.h). The body gets each
+    element with next(&iterator).
+    iterator:
+        Name of the Iterator, declared in the enclosing scope.
+    iterable:
+        C expression for the Object* iterated over.
+    """
+
+    __slots__ = ("iterable",)
+
+    def __init__(self, iterator, iterable, contents=None, sticky_front=None,
+                 sticky_end=None, before=None, after=None, variables=None):
+        super(ForEachBlock, self).__init__(
+            iterator, None, contents=contents, sticky_front=sticky_front,
+            sticky_end=sticky_end, before=before, after=after,
+            variables=variables
+        )
+        self.iterable = iterable
+
+    def header(self):
+        """
+        Return the for(...) line of the loop.
+        """
+        return "for(iter({iterable}, &{it}); iter_has_next(&{it}); ){{".format(
+            iterable=self.iterable, it=self.iterator)
 
 
 class InlineBlock(Block):
@@ -246,14 +355,21 @@ class InlineBlock(Block):
     Class representing blocks that
     - are not indented
     - do not contain a body
+    - have no scope of their own
+
+    Only the slots these need are set, so the many small blocks
+    of a large module stay cheap.
     """
 
-    def __init__(self, contents=None, before=None, after=None, variables=None):
-        super(InlineBlock, self).__init__(
-            contents=contents, sticky_front=None, should_indent=False,
-            sticky_end=None, before=before, after=after,
-            variables=variables
-        )
+    __slots__ = ("variables",)
+
+    def __init__(self, variables=None):
+        """
+        variables:
+            List of variables this block declares in the scope
+            of the block it is appended to.
+        """
+        self.variables = variables or []
 
 
 class ExprBlock(InlineBlock):
@@ -261,6 +377,9 @@ class ExprBlock(InlineBlock):
     Class for specifically declaring a variable.
     """
 
+    __slots__ = ("data_type", "name", "pointer_depth", "array_depth",
+                 "is_arg")
+
     def __init__(self, data_type, name, pointer_depth=0, array_depth=0,
                  is_arg=False):
         """
@@ -279,15 +398,14 @@ class ExprBlock(InlineBlock):
             should be no semicolon in the str representation of this.
         """
         # TODO: Add support for const and other qualifiers later.
-        super(ExprBlock, self).__init__()
         self.data_type = data_type
         self.name = name
         self.pointer_depth = pointer_depth
         self.array_depth = array_depth
         self.is_arg = is_arg
 
-    def block_strings(self):
-        return str(self)
+    def iter_lines(self, depth=0):
+        yield self.indentation(depth) + str(self)
 
     def __eq__(self, other):
         return self.name == other.name
@@ -303,6 +421,8 @@ class AssignBlock(ExprBlock):
     Class for assigning a variable.
     """
 
+    __slots__ = ("value",)
+
     def __init__(self, data_type, name, value, pointer_depth=0, array_depth=0):
         """
         data_type:
@@ -325,10 +445,13 @@ class AssignBlock(ExprBlock):
         self.value = value
 
     def destructor(self):
+        """
+        Block letting go of the variable's reference to its object.
+        """
         if self.data_type == "Object":
-            return StringBlock("destroy({});".format(self.name))
+            return StringBlock("decref({});".format(self.name))
         else:
-            raise Exception(("Attempting to call destroy on a variable that"
+            raise Exception(("Attempting to call decref on a variable that"
                              "isn't an object."))
 
     def __str__(self):
@@ -337,63 +460,267 @@ class AssignBlock(ExprBlock):
             "[]"*self.array_depth, self.value)
 
 
+def box_value(node, info):
+    """
+    Return a C expression for the value of a node as an Object*
+    and whether that expression creates a new object.
+    info:
+        expressions.ModuleInfo with the inferred types of variables.
+    """
+    if isinstance(node, ast.Name) and not infer.is_scalar(
+            info.var_type(node.id)):
+        # Only variables the module stores to are declared as Object*.
+        # Builtins like True and None and unknown names aren't.
+        if node.id not in info.types:
+            raise Exception(
+                "No support yet for the name '{}'".format(node.id))
+        return node.id, False
+    elif isinstance(node, ast.Str):
+        text = node.s
+        if isinstance(text, unicode):
+            text = text.encode("utf-8")
+        # With the length, since the bytes can include a NUL
+        return "new_String_from({}, {})".format(c_string_literal(text),
+                                                len(text)), True
+    elif isinstance(node, ast.List):
+        elems = [owned_value(elt, info) for elt in node.elts]
+        return "new_List_of({})".format(
+            ", ".join([str(len(elems))] + elems)), True
+    elif isinstance(node, ast.Set):
+        elems = [owned_value(elt, info) for elt in node.elts]
+        return "new_Set_of({})".format(
+            ", ".join([str(len(elems))] + elems)), True
+    elif isinstance(node, ast.Dict):
+        items = []
+        for key, value in zip(node.keys, node.values):
+            items.extend([owned_value(key, info), owned_value(value, info)])
+        return "new_Dict_of({})".format(
+            ", ".join([str(len(node.keys))] + items)), True
+    elif isinstance(node, ast.Subscript):
+        if not isinstance(node.slice, ast.Index):
+            raise Exception("No support yet for slicing")
+        # Looked up by the runtime, which takes over both operands
+        return "binary_subscr({}, {})".format(
+            owned_value(node.value, info),
+            owned_value(node.slice.value, info)), True
+
+    value_type = infer.expr_type(node, info.types, info.true_division,
+                                 info.bounds)
+    if value_type == infer.INT:
+        return "new_Integer({})".format(expressions.lower(node, info)), True
+    elif value_type == infer.FLOAT:
+        return "new_Float({})".format(expressions.lower(node, info)), True
+    elif value_type == infer.BOOL:
+        raise Exception("No support yet for bools as objects")
+    elif isinstance(node, ast.Num) and isinstance(node.n, (int, long)):
+        # Too big for a long
+        return 'new_Integer_from_string("{}")'.format(node.n), True
+    elif isinstance(node, ast.BinOp):
+        function = expressions.runtime_operator(node.op, info)
+        if function is not None:
+            # The operator takes over both operands
+            return "{}({}, {})".format(function, owned_value(node.left, info),
+                                       owned_value(node.right, info)), True
+    elif isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, ast.USub):
+            return "unary_neg({})".format(owned_value(node.operand, info)), \
+                True
+        elif isinstance(node.op, ast.UAdd):
+            return box_value(node.operand, info)
+    raise Exception(
+        "No support yet for boxing a node of type {}"
+        .format(node.__class__))
+
+
+def owned_value(node, info):
+    """
+    Return a C expression for the value of a node as an Object*
+    that the caller owns a reference to, like the value stored in
+    a variable.
+    """
+    value, is_new = box_value(node, info)
+    if is_new:
+        return value
+    return "incref({})".format(value)
+
+
+def literal_write(function, text):
+    """
+    Return a call of an output function that takes bytes known at
+    translation time (out_write or print_literal) writing text.
+    """
+    if isinstance(text, unicode):
+        text = text.encode("utf-8")
+    return StringBlock("{}({}, {});".format(function, c_string_literal(text),
+                                            len(text)))
+
+
+def repr_pieces(node, info):
+    """
+    Return how python shows the value of a node inside a container,
+    as a list of pieces to write in order. A piece is either text
+    known at translation time or a tuple of an output function of
+    the runtime and the C expression to call it with.
+    """
+    constant = expressions.fold(node, info.constants, info.true_division)
+    if constant is not None:
+        return [repr(constant) if isinstance(constant, float)
+                else str(constant)]
+    elif isinstance(node, ast.Str):
+        return [repr(node.s)]
+    elif isinstance(node, ast.List):
+        pieces = ["["]
+        for i, elt in enumerate(node.elts):
+            if i > 0:
+                pieces.append(", ")
+            pieces.extend(repr_pieces(elt, info))
+        pieces.append("]")
+        return pieces
+    elif isinstance(node, ast.Num):
+        # A long too big to fold
+        return [repr(node.n)]
+    elif isinstance(node, ast.Name) and not infer.is_scalar(
+            info.var_type(node.id)):
+        return [("out_repr", node.id)]
+
+    value_type = infer.expr_type(node, info.types, info.true_division,
+                                 info.bounds)
+    if value_type == infer.INT:
+        return [("out_int", expressions.lower(node, info))]
+    elif value_type == infer.FLOAT:
+        return [("out_double_repr", expressions.lower(node, info))]
+    elif value_type == infer.BOOL:
+        return [("out_bool", expressions.lower(node, info))]
+    # Computed as an object, which is let go of once it is written
+    value, is_new = box_value(node, info)
+    return [("out_repr_new" if is_new else "out_repr", value)]
+
+
+def print_pieces(pieces):
+    """
+    Return the lines that print the pieces (see repr_pieces)
+    followed by a newline. Neighbouring text is written in one go.
+    """
+    merged = []
+    for piece in pieces:
+        if (isinstance(piece, str) and merged and
+                isinstance(merged[-1], str)):
+            merged[-1] += piece
+        else:
+            merged.append(piece)
+    if not isinstance(merged[-1], str):
+        merged.append("")
+
+    lines = []
+    for piece in merged[:-1]:
+        if isinstance(piece, str):
+            lines.append(literal_write("out_write", piece))
+        else:
+            lines.append(StringBlock("{}({});".format(*piece)))
+    # The last piece ends the line
+    lines.append(literal_write("print_literal", merged[-1]))
+    return lines
+
+
 class PrintBlock(InlineBlock):
     """
     Class for specifically printing a node.
+    Everything is written to the runtime's output buffer (see
+    c_utils/Output.h) with writers for each type, and whatever is
+    known at translation time is written as it is.
     """
 
-    def __init__(self, node):
-        if isinstance(node, ast.Name):
+    __slots__ = ("lines",)
+
+    def __init__(self, node, info=None):
+        """
+        node:
+            The node being printed.
+        info:
+            expressions.ModuleInfo with the inferred types and constants
+            of the module. Scalars are printed without being boxed and
+            constants are printed as literals.
+        """
+        info = info or expressions.ModuleInfo()
+        constant = expressions.fold(node, info.constants, info.true_division)
+        if constant is not None:
+            # Node is a number or evaluates to one.
+            # str() in python 2 formats it the same way print does.
+            self.lines = [literal_write("print_literal",
+                                        "{}".format(constant))]
+        elif isinstance(node, ast.Name):
             # Node is a variable
-            # Call the str() function, then immediately free it.
             var = node.id
-            self.lines = [
-                AssignBlock(
-                    "char", "{}_str".format(var), "str({})".format(var),
-                    pointer_depth=1),
-                StringBlock('printf("%s\\n", {}_str);'.format(var)),
-                StringBlock("free({}_str);".format(var))
-            ]
-            super(PrintBlock, self).__init__(variables=[self.lines[0]])
-        elif is_literal(node):
+            var_type = info.var_type(var)
+            if var_type == infer.INT:
+                self.lines = [StringBlock("print_int({});".format(var))]
+            elif var_type == infer.FLOAT:
+                self.lines = [StringBlock("print_double({});".format(var))]
+            elif var_type == infer.BOOL:
+                self.lines = [StringBlock("print_bool({});".format(var))]
+            else:
+                # The runtime writes str() of it into the buffer
+                self.lines = [StringBlock("print_object({});".format(var))]
+        elif isinstance(node, ast.List):
+            # Write the repr of each element straight to the output
+            # instead of building a list to print.
+            self.lines = print_pieces(repr_pieces(node, info))
+        elif isinstance(node, ast.Num):
+            # A long too big to fold
+            self.lines = [literal_write("print_literal", str(node.n))]
+        elif is_literal(node) and not isinstance(node, (ast.Dict, ast.Set)):
             if isinstance(node, ast.Str):
                 # Node is a string literal
-                var = node.s
-            elif isinstance(node, ast.Num):
-                # Node is a literal number
-                var = node.n
-            elif isinstance(node, ast.List) or isinstance(node, ast.Tuple):
+                self.lines = [literal_write("print_literal", node.s)]
+            elif isinstance(node, ast.Tuple):
                 raise Exception(
-                    "No support yet for node of type List or Tuple")
+                    "No support yet for node of type Tuple")
             else:
                 raise Exception(
                     "No support for the literal node of type {}"
                     .format(node.__class__))
-
-            self.lines = [StringBlock('printf("{}\\n");'.format(var))]
-            super(PrintBlock, self).__init__()
         else:
-            raise Exception(
-                "No support for printing node of type {}"
-                .format(node.__class__))
+            # Node is an expression evaluated at runtime
+            value_type = infer.expr_type(
+                node, info.types, info.true_division, info.bounds)
+            if value_type == infer.INT:
+                self.lines = [StringBlock("print_int({});".format(
+                    expressions.lower(node, info)))]
+            elif value_type == infer.FLOAT:
+                self.lines = [StringBlock("print_double({});".format(
+                    expressions.lower(node, info)))]
+            elif value_type == infer.BOOL:
+                self.lines = [StringBlock("print_bool({});".format(
+                    expressions.lower(node, info)))]
+            else:
+                value, is_new = box_value(node, info)
+                self.lines = [StringBlock("{}({});".format(
+                    "print_object_new" if is_new else "print_object",
+                    value))]
+        super(PrintBlock, self).__init__()
 
-    def block_strings(self):
-        return self.lines
+    def iter_lines(self, depth=0):
+        for block in self.lines:
+            for line in block.iter_lines(depth):
+                yield line
 
     def __str__(self):
-        return "\n".join(self.block_strings())
+        return "\n".join(self.iter_lines())
 
 
 class StringBlock(InlineBlock):
     """
     Block for representing a single line/string from code.
     """
+
+    __slots__ = ()
+
     def __init__(self, contents=""):
         assert isinstance(contents, basestring)
         self.contents = contents
 
-    def block_strings(self):
-        return str(self.contents)
+    def iter_lines(self, depth=0):
+        yield self.indentation(depth) + str(self.contents)
 
     def __str__(self):
         return str(self.contents)
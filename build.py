@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import time
+
+import runtime
+
+
+class BuildMode(object):
+    """
+    One way of compiling a translated program.
+    name:
+        What the mode is called in reports.
+    cflags:
+        Flags to compile the program and the runtime with.
+    pgo:
+        Shell command to train a profile guided build with, with {}
+        standing for the executable, or None to build it in one go.
+    amalgamated:
+        Compile the program and the runtime as one file.
+    """
+
+    __slots__ = ("name", "cflags", "pgo", "amalgamated")
+
+    def __init__(self, name, cflags, pgo=None, amalgamated=False):
+        self.name = name
+        self.cflags = cflags
+        self.pgo = pgo
+        self.amalgamated = amalgamated
+
+    def compile(self, code, directory, log=None):
+        """
+        Compile the code in directory.
+        Returns the path of the executable, or None if it couldn't be
+        built.
+        """
+        if self.pgo is not None:
+            return runtime.compile_program_pgo(
+                code, directory, train=self.pgo, cflags=self.cflags, log=log,
+                amalgamated=self.amalgamated)
+        return runtime.compile_program(code, directory, cflags=self.cflags,
+                                       log=log, amalgamated=self.amalgamated)
+
+
+def build_modes(opt_level="3", native=True, lto=False, pgo=None,
+                amalgamated=False):
+    """
+    The plain build that -c and -e use, followed by the build asked for
+    with one optimization added at a time, so a report shows what each
+    one buys. The last mode is the one asked for.
+    pgo:
+        Training command for a profile guided build, or None.
+    amalgamated:
+        Compile the program and the runtime as one file.
+    """
+    cflags = runtime.optimization_cflags(opt_level, native)
+    modes = [
+        BuildMode("default", list(runtime.CFLAGS)),
+        BuildMode(" ".join(cflags), cflags),
+    ]
+    if amalgamated:
+        modes.append(BuildMode("+ amalgamation", cflags,
+                               amalgamated=True))
+    if lto:
+        cflags = cflags + runtime.LTO_CFLAGS
+        modes.append(BuildMode("+ LTO", cflags, amalgamated=amalgamated))
+    if pgo is not None:
+        modes.append(BuildMode("+ PGO", cflags, pgo, amalgamated))
+    return modes
+
+
+def time_program(executable, command=None, repeat=3):
+    """
+    Run the executable, or a shell command with {} standing for it,
+    repeat times with its output thrown away.
+    Returns the fastest wall time in seconds, or None if it failed.
+    """
+    if command is None:
+        command = "{}"
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        if runtime.run_training(command, executable):
+            return None
+        seconds = time.time() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def build(code, executable, modes, report=False, command=None, repeat=3,
+          log=None):
+    """
+    Compile the code with the last of modes and copy it to executable.
+    report:
+        Also build with every other mode and time them all.
+    command:
+        Shell command to time each build with, with {} standing for the
+        executable. Defaults to running it on its own.
+    Returns a list of (mode, seconds) for every mode timed, or None if a
+    build failed.
+    """
+    if not report:
+        modes = modes[-1:]
+
+    timings = []
+    directory = tempfile.mkdtemp(prefix="py2c-build-")
+    try:
+        for i, mode in enumerate(modes):
+            mode_dir = os.path.join(directory, str(i))
+            os.mkdir(mode_dir)
+            built = mode.compile(code, mode_dir, log)
+            if built is None:
+                return None
+            if report:
+                timings.append((mode, time_program(built, command, repeat)))
+        shutil.copy(built, executable)
+    finally:
+        shutil.rmtree(directory)
+    return timings
+
+
+def print_report(timings, stream):
+    """
+    Print the time of each build and how it compares to the first.
+    """
+    baseline = timings[0][1]
+    row = "{:<40} {:>10} {:>12}"
+    print(row.format("build", "seconds", "vs default"), file=stream)
+    for mode, seconds in timings:
+        if seconds is None:
+            print(row.format(mode.name, "failed", ""), file=stream)
+            continue
+        change = ""
+        if baseline and mode is not timings[0][0]:
+            change = "{:+.1%}".format((seconds - baseline) / baseline)
+        print(row.format(mode.name, "{:.4f}".format(seconds), change),
+              file=stream)
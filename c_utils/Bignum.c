@@ -0,0 +1,402 @@
+#include "utils.h"
+
+// Largest power of ten that fits in a limb, used to convert to and
+// from decimal nine digits at a time.
+#define DECIMAL_BASE 1000000000U
+#define DECIMAL_DIGITS 9
+
+static void mul_limbs(const Limb *a, unsigned int na,
+                      const Limb *b, unsigned int nb, Limb *out);
+
+/**
+ * Allocate room for a magnitude. Free it with free().
+ * @param  n Number of limbs
+ * @return   Limb*
+ */
+Limb *bignum_alloc(unsigned int n){
+    Limb *limbs = (Limb*)malloc(sizeof(Limb)*(n ? n : 1));
+    assert(limbs != NULL);
+    return limbs;
+}
+
+/**
+ * Return the length of a magnitude without its leading zero limbs.
+ * @param  a Magnitude
+ * @param  n Number of limbs
+ * @return   Normalized length (0 for zero)
+ */
+unsigned int bignum_normalize(const Limb *a, unsigned int n){
+    while (n > 0 && a[n - 1] == 0){
+        n--;
+    }
+    return n;
+}
+
+/**
+ * Compare two normalized magnitudes.
+ * @return -1, 0 or 1 as a is less than, equal to or greater than b
+ */
+int bignum_cmp(const Limb *a, unsigned int na, const Limb *b, unsigned int nb){
+    if (na != nb){
+        return na < nb ? -1 : 1;
+    }
+    while (na-- > 0){
+        if (a[na] != b[na]){
+            return a[na] < b[na] ? -1 : 1;
+        }
+    }
+    return 0;
+}
+
+/**
+ * Add two magnitudes.
+ * @param  out Room for one limb more than the longer of a and b.
+ *             May be a or b.
+ * @return     Normalized length of the sum
+ */
+unsigned int bignum_add(const Limb *a, unsigned int na,
+                        const Limb *b, unsigned int nb, Limb *out){
+    if (na < nb){
+        const Limb *t = a;
+        unsigned int nt = na;
+        a = b;
+        na = nb;
+        b = t;
+        nb = nt;
+    }
+
+    DoubleLimb carry = 0;
+    unsigned int i;
+    for (i = 0; i < nb; i++){
+        carry += (DoubleLimb)a[i] + b[i];
+        out[i] = (Limb)carry;
+        carry >>= LIMB_BITS;
+    }
+    for (; i < na; i++){
+        carry += a[i];
+        out[i] = (Limb)carry;
+        carry >>= LIMB_BITS;
+    }
+    out[na] = (Limb)carry;
+    return bignum_normalize(out, na + 1);
+}
+
+/**
+ * Subtract a magnitude from one at least as big.
+ * @param  out Room for na limbs. May be a or b.
+ * @return     Normalized length of the difference
+ */
+unsigned int bignum_sub(const Limb *a, unsigned int na,
+                        const Limb *b, unsigned int nb, Limb *out){
+    DoubleLimb borrow = 0;
+    unsigned int i;
+    for (i = 0; i < nb; i++){
+        DoubleLimb d = (DoubleLimb)a[i] - b[i] - borrow;
+        out[i] = (Limb)d;
+        borrow = (d >> LIMB_BITS) & 1;
+    }
+    for (; i < na; i++){
+        DoubleLimb d = (DoubleLimb)a[i] - borrow;
+        out[i] = (Limb)d;
+        borrow = (d >> LIMB_BITS) & 1;
+    }
+    assert(borrow == 0);
+    return bignum_normalize(out, na);
+}
+
+/**
+ * Add b into the n limbs at out, which are known to have room for
+ * the sum.
+ */
+static void add_into(Limb *out, unsigned int n, const Limb *b, unsigned int nb){
+    DoubleLimb carry = 0;
+    unsigned int i;
+    for (i = 0; i < nb; i++){
+        carry += (DoubleLimb)out[i] + b[i];
+        out[i] = (Limb)carry;
+        carry >>= LIMB_BITS;
+    }
+    for (; carry && i < n; i++){
+        carry += out[i];
+        out[i] = (Limb)carry;
+        carry >>= LIMB_BITS;
+    }
+    assert(carry == 0);
+}
+
+/**
+ * Subtract b from the n limbs at out, which are known to be at
+ * least b.
+ */
+static void sub_from(Limb *out, unsigned int n, const Limb *b, unsigned int nb){
+    DoubleLimb borrow = 0;
+    unsigned int i;
+    for (i = 0; i < nb; i++){
+        DoubleLimb d = (DoubleLimb)out[i] - b[i] - borrow;
+        out[i] = (Limb)d;
+        borrow = (d >> LIMB_BITS) & 1;
+    }
+    for (; borrow && i < n; i++){
+        DoubleLimb d = (DoubleLimb)out[i] - borrow;
+        out[i] = (Limb)d;
+        borrow = (d >> LIMB_BITS) & 1;
+    }
+    assert(borrow == 0);
+}
+
+/**
+ * O(na*nb) product. out has na + nb limbs.
+ */
+static void mul_schoolbook(const Limb *a, unsigned int na,
+                           const Limb *b, unsigned int nb, Limb *out){
+    memset(out, 0, sizeof(Limb)*(na + nb));
+    unsigned int i, j;
+    for (i = 0; i < na; i++){
+        DoubleLimb carry = 0;
+        Limb ai = a[i];
+        if (ai == 0){
+            continue;
+        }
+        // ai*b[j] + out[i + j] + carry never overflows a DoubleLimb
+        for (j = 0; j < nb; j++){
+            carry += (DoubleLimb)ai*b[j] + out[i + j];
+            out[i + j] = (Limb)carry;
+            carry >>= LIMB_BITS;
+        }
+        out[i + nb] = (Limb)carry;
+    }
+}
+
+/**
+ * Karatsuba product of a and b, where b is over half as long as a.
+ * Splitting both at h limbs,
+ *     a*b = z2*B^2h + z1*B^h + z0
+ * with z0 = a0*b0, z2 = a1*b1 and z1 = (a0 + a1)*(b0 + b1) - z0 - z2,
+ * so it takes three half sized products instead of four, for
+ * O(n^1.585) overall. out has na + nb limbs.
+ */
+static void mul_karatsuba(const Limb *a, unsigned int na,
+                          const Limb *b, unsigned int nb, Limb *out){
+    unsigned int h = na/2;
+    const Limb *a1 = a + h;
+    const Limb *b1 = b + h;
+    unsigned int na1 = na - h;
+    unsigned int nb1 = nb - h;
+
+    // z0 and z2 fill out between them
+    mul_limbs(a, h, b, h, out);
+    mul_limbs(a1, na1, b1, nb1, out + 2*h);
+
+    unsigned int nsa = na1 + 1;
+    unsigned int nsb = (h > nb1 ? h : nb1) + 1;
+    Limb *scratch = bignum_alloc(2*(nsa + nsb));
+    Limb *sa = scratch;
+    Limb *sb = sa + nsa;
+    Limb *z1 = sb + nsb;
+
+    nsa = bignum_add(a, h, a1, na1, sa);
+    nsb = bignum_add(b, h, b1, nb1, sb);
+    mul_limbs(sa, nsa, sb, nsb, z1);
+
+    unsigned int nz1 = nsa + nsb;
+    sub_from(z1, nz1, out, bignum_normalize(out, 2*h));
+    sub_from(z1, nz1, out + 2*h, bignum_normalize(out + 2*h, na1 + nb1));
+    add_into(out + h, na + nb - h, z1, bignum_normalize(z1, nz1));
+
+    free(scratch);
+}
+
+/**
+ * Product of a and b, picking the method by their lengths.
+ * out has na + nb limbs and is neither a nor b.
+ */
+static void mul_limbs(const Limb *a, unsigned int na,
+                      const Limb *b, unsigned int nb, Limb *out){
+    if (na < nb){
+        const Limb *t = a;
+        unsigned int nt = na;
+        a = b;
+        na = nb;
+        b = t;
+        nb = nt;
+    }
+
+    if (nb < KARATSUBA_CUTOFF){
+        mul_schoolbook(a, na, b, nb, out);
+    }
+    else if (2*nb <= na){
+        // Too lopsided to split evenly, so multiply b by one nb limb
+        // slice of a at a time and add the products up.
+        memset(out, 0, sizeof(Limb)*(na + nb));
+        Limb *product = bignum_alloc(2*nb);
+        unsigned int offset;
+        for (offset = 0; offset < na; offset += nb){
+            unsigned int n = na - offset < nb ? na - offset : nb;
+            mul_limbs(a + offset, n, b, nb, product);
+            add_into(out + offset, na + nb - offset, product, n + nb);
+        }
+        free(product);
+    }
+    else {
+        mul_karatsuba(a, na, b, nb, out);
+    }
+}
+
+/**
+ * Multiply two magnitudes.
+ * @param  out Room for na + nb limbs. Must not be a or b.
+ * @return     Normalized length of the product
+ */
+unsigned int bignum_mul(const Limb *a, unsigned int na,
+                        const Limb *b, unsigned int nb, Limb *out){
+    mul_limbs(a, na, b, nb, out);
+    return bignum_normalize(out, na + nb);
+}
+
+/**
+ * Divide a magnitude by a single limb.
+ * @param  out Room for n limbs for the quotient. May be a.
+ * @return     The remainder
+ */
+Limb bignum_divmod_limb(const Limb *a, unsigned int n, Limb divisor,
+                        Limb *out){
+    assert(divisor != 0);
+    DoubleLimb rem = 0;
+    while (n-- > 0){
+        rem = (rem << LIMB_BITS) | a[n];
+        out[n] = (Limb)(rem/divisor);
+        rem %= divisor;
+    }
+    return (Limb)rem;
+}
+
+/**
+ * Divide one magnitude by another. A single limb divisor takes one
+ * pass over a; a longer one is divided out a bit at a time.
+ * @param q Room for na limbs for the quotient
+ * @param r Room for nb + 1 limbs for the remainder
+ */
+void bignum_divmod(const Limb *a, unsigned int na,
+                   const Limb *b, unsigned int nb, Limb *q, Limb *r){
+    nb = bignum_normalize(b, nb);
+    assert(nb > 0);
+    if (nb == 1){
+        memset(r, 0, sizeof(Limb)*2);
+        r[0] = bignum_divmod_limb(a, na, b[0], q);
+        return;
+    }
+
+    memset(q, 0, sizeof(Limb)*na);
+    memset(r, 0, sizeof(Limb)*(nb + 1));
+    unsigned int nr = 0;
+    unsigned int i = na*LIMB_BITS;
+    while (i-- > 0){
+        // r = r*2 + the ith bit of a
+        unsigned int j;
+        for (j = nr + 1; j-- > 1;){
+            r[j] = (r[j] << 1) | (r[j - 1] >> (LIMB_BITS - 1));
+        }
+        r[0] = (r[0] << 1) | ((a[i/LIMB_BITS] >> (i % LIMB_BITS)) & 1);
+        nr = bignum_normalize(r, nr + 1);
+
+        if (bignum_cmp(r, nr, b, nb) >= 0){
+            nr = bignum_sub(r, nr, b, nb, r);
+            q[i/LIMB_BITS] |= (Limb)1 << (i % LIMB_BITS);
+        }
+    }
+}
+
+/**
+ * Number of limbs that is always enough for a number with the given
+ * number of decimal digits (log2(10)/32 < 1/9 limbs a digit).
+ */
+unsigned int bignum_decimal_limbs(unsigned int digits){
+    return digits/DECIMAL_DIGITS + 2;
+}
+
+/**
+ * Read a string of decimal digits, nine at a time.
+ * @param  out Room for bignum_decimal_limbs(strlen(digits)) limbs
+ * @return     Normalized length of the magnitude
+ */
+unsigned int bignum_from_decimal(const char *digits, Limb *out){
+    unsigned int n = 0;
+    size_t length = strlen(digits);
+    size_t i = 0;
+    while (i < length){
+        // The first chunk takes the digits left over after the rest
+        // are split into nines.
+        size_t chunk = i == 0 && length % DECIMAL_DIGITS ?
+                       length % DECIMAL_DIGITS : DECIMAL_DIGITS;
+        Limb scale = 1;
+        Limb value = 0;
+        size_t j;
+        for (j = 0; j < chunk; j++){
+            scale *= 10;
+            value = value*10 + (Limb)(digits[i + j] - '0');
+        }
+        i += chunk;
+
+        // out = out*scale + value
+        DoubleLimb carry = value;
+        unsigned int k;
+        for (k = 0; k < n; k++){
+            carry += (DoubleLimb)out[k]*scale;
+            out[k] = (Limb)carry;
+            carry >>= LIMB_BITS;
+        }
+        if (carry){
+            out[n++] = (Limb)carry;
+        }
+    }
+    return n;
+}
+
+/**
+ * Write a magnitude in decimal to a StrBuf.
+ * Rather than dividing the whole number by ten for every digit, the
+ * limbs are folded into base 10^9 from the top, which only needs
+ * word sized divisions by a constant, then each base 10^9 digit is
+ * written as nine decimal ones.
+ * @param a  Magnitude
+ * @param n  Number of limbs
+ * @param sb StrBuf to append to
+ */
+void bignum_write_decimal(const Limb *a, unsigned int n, StrBuf *sb){
+    n = bignum_normalize(a, n);
+    // Each limb is less than 1.08 base 10^9 digits
+    Limb *decimal = bignum_alloc(n + n/8 + 2);
+    unsigned int nd = 0;
+
+    unsigned int i, j;
+    for (i = n; i-- > 0;){
+        // decimal = decimal*2^32 + a[i]
+        DoubleLimb carry = a[i];
+        for (j = 0; j < nd; j++){
+            DoubleLimb t = ((DoubleLimb)decimal[j] << LIMB_BITS) + carry;
+            carry = t/DECIMAL_BASE;
+            decimal[j] = (Limb)(t - carry*DECIMAL_BASE);
+        }
+        while (carry){
+            decimal[nd++] = (Limb)(carry % DECIMAL_BASE);
+            carry /= DECIMAL_BASE;
+        }
+    }
+
+    if (nd == 0){
+        strbuf_append_char(sb, '0');
+    }
+    else {
+        strbuf_append_int(sb, decimal[nd - 1]);
+        char digits[DECIMAL_DIGITS];
+        for (i = nd - 1; i-- > 0;){
+            Limb d = decimal[i];
+            for (j = DECIMAL_DIGITS; j-- > 0;){
+                digits[j] = '0' + d % 10;
+                d /= 10;
+            }
+            strbuf_append(sb, digits, DECIMAL_DIGITS);
+        }
+    }
+    free(decimal);
+}
@@ -0,0 +1,43 @@
+#ifndef __BIGNUM
+#define __BIGNUM
+
+#include <stdint.h>
+
+#include "StrBuf.h"
+
+// Arbitrary precision magnitudes
+// A magnitude is an array of 32 bit limbs, least significant first.
+// These only deal with magnitudes; the integers that use them (see
+// Integer.h) keep the sign. A length may count leading zero limbs
+// unless it says it is normalized.
+typedef uint32_t Limb;
+typedef uint64_t DoubleLimb;
+
+#define LIMB_BITS 32
+
+// Products of magnitudes this many limbs long or more are split up
+// the Karatsuba way; shorter ones are done the schoolbook way.
+#define KARATSUBA_CUTOFF 48
+
+Limb *bignum_alloc(unsigned int n);
+unsigned int bignum_normalize(const Limb *a, unsigned int n);
+int bignum_cmp(const Limb *a, unsigned int na, const Limb *b, unsigned int nb);
+
+// Arithmetic
+unsigned int bignum_add(const Limb *a, unsigned int na,
+                        const Limb *b, unsigned int nb, Limb *out);
+unsigned int bignum_sub(const Limb *a, unsigned int na,
+                        const Limb *b, unsigned int nb, Limb *out);
+unsigned int bignum_mul(const Limb *a, unsigned int na,
+                        const Limb *b, unsigned int nb, Limb *out);
+Limb bignum_divmod_limb(const Limb *a, unsigned int n, Limb divisor,
+                        Limb *out);
+void bignum_divmod(const Limb *a, unsigned int na,
+                   const Limb *b, unsigned int nb, Limb *q, Limb *r);
+
+// Decimal conversion
+unsigned int bignum_decimal_limbs(unsigned int digits);
+unsigned int bignum_from_decimal(const char *digits, Limb *out);
+void bignum_write_decimal(const Limb *a, unsigned int n, StrBuf *sb);
+
+#endif
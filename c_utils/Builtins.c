@@ -0,0 +1,369 @@
+#include "utils.h"
+
+/**
+ * Convert a static array of chars to a dynamic one
+ * by allocating memory. Do this so that there is no
+ * concern on whether or not the char array returned
+ * by str() should be freed.
+ * @param  static_str A static string
+ * @return            char*
+ */
+char *dynamic_str(char *static_str){
+	int len = strlen(static_str);
+	char *dynamic = (char*)malloc(sizeof(char)*(len+1));
+	strncpy(dynamic, static_str, len);
+	*(dynamic+len) = 0;
+	return dynamic;
+}
+
+Object *range(int start, int stop, int step){
+	Object *list = new_List();
+	int i;
+	for (i = start; i < stop; i += step){
+		list_append_new(list, new_Integer(i));
+	}
+	return list;
+}
+
+static void zero_division(char *message){
+	output_discard_line();
+	fprintf(stderr, "ZeroDivisionError: %s\n", message);
+	exit(1);
+}
+
+void negative_shift_count(){
+	output_discard_line();
+	fprintf(stderr, "ValueError: negative shift count\n");
+	exit(1);
+}
+
+/**
+ * Report a result the translator kept in a long that doesn't fit.
+ * The translator only keeps results it knows fit, so this means the
+ * translation is wrong, but it must not carry on with a wrong value.
+ */
+void long_overflow(const char *op){
+	output_discard_line();
+	fprintf(stderr, "OverflowError: result of %s too large for a long\n",
+	        op);
+	exit(1);
+}
+
+/**
+ * Integer division that rounds towards negative infinity
+ * like python's // (C rounds towards zero).
+ */
+long py_floordiv(long a, long b){
+	if (b == 0){
+		zero_division("integer division or modulo by zero");
+	}
+	long q = a / b;
+	if ((a % b != 0) && ((a < 0) != (b < 0))){
+		q--;
+	}
+	return q;
+}
+
+/**
+ * Integer modulo whose result has the sign of the divisor
+ * like python's %.
+ */
+long py_mod(long a, long b){
+	if (b == 0){
+		zero_division("integer division or modulo by zero");
+	}
+	long r = a % b;
+	if (r != 0 && ((r < 0) != (b < 0))){
+		r += b;
+	}
+	return r;
+}
+
+/**
+ * Integer power by squaring. exp must not be negative. The
+ * translator only uses this when it knows the result fits in a long,
+ * and does anything bigger with binary_pow.
+ */
+long py_pow(long base, long exp){
+	assert(exp >= 0);
+	long result = 1;
+	int overflow = 0;
+	while (exp){
+		if (exp & 1){
+			overflow |= __builtin_mul_overflow(result, base, &result);
+		}
+		exp >>= 1;
+		if (exp){
+			overflow |= __builtin_mul_overflow(base, base, &base);
+		}
+	}
+	if (overflow){
+		long_overflow("**");
+	}
+	return result;
+}
+
+double py_truediv(double a, double b){
+	if (b == 0){
+		zero_division("float division by zero");
+	}
+	return a / b;
+}
+
+/**
+ * Float modulo whose result has the sign of the divisor.
+ */
+double py_fmod(double a, double b){
+	if (b == 0){
+		zero_division("float modulo");
+	}
+	double r = fmod(a, b);
+	if (r != 0 && ((r < 0) != (b < 0))){
+		r += b;
+	}
+	return r;
+}
+
+static void unsupported_operands(char *op, Object *a, Object *b){
+	output_discard_line();
+	fprintf(stderr,
+	        "TypeError: unsupported operand type(s) for %s: '%s' and '%s'\n",
+	        op, a->type->name, b->type->name);
+	exit(1);
+}
+
+static int is_number(Object *obj){
+	return obj->type == &IntegerType || obj->type == &FloatType;
+}
+
+/**
+ * Check that both operands of a numeric operator are numbers.
+ * @return 1 if both are integers, 0 if either is a float
+ */
+static int check_numbers(char *op, Object *a, Object *b){
+	if (!is_number(a) || !is_number(b)){
+		unsupported_operands(op, a, b);
+	}
+	return a->type == &IntegerType && b->type == &IntegerType;
+}
+
+static double number_as_double(Object *n){
+	if (n->type == &FloatType){
+		return n->fvalue;
+	}
+	double d = integer_as_double(n);
+	if (isinf(d)){
+		output_discard_line();
+		fprintf(stderr,
+		        "OverflowError: long int too large to convert to float\n");
+		exit(1);
+	}
+	return d;
+}
+
+/**
+ * Let go of the operands of an operator and return its float result.
+ */
+static Object *float_result(Object *a, Object *b, double value){
+	decref(a);
+	decref(b);
+	return new_Float(value);
+}
+
+Object *binary_add(Object *a, Object *b){
+	if (check_numbers("+", a, b)){
+		return integer_add(a, b);
+	}
+	return float_result(a, b, number_as_double(a) + number_as_double(b));
+}
+
+Object *binary_sub(Object *a, Object *b){
+	if (check_numbers("-", a, b)){
+		return integer_sub(a, b);
+	}
+	return float_result(a, b, number_as_double(a) - number_as_double(b));
+}
+
+Object *binary_mul(Object *a, Object *b){
+	if (check_numbers("*", a, b)){
+		return integer_mul(a, b);
+	}
+	return float_result(a, b, number_as_double(a)*number_as_double(b));
+}
+
+/**
+ * Classic python 2 division, which floors integers.
+ */
+Object *binary_div(Object *a, Object *b){
+	if (check_numbers("/", a, b)){
+		return binary_floordiv(a, b);
+	}
+	return binary_truediv(a, b);
+}
+
+Object *binary_truediv(Object *a, Object *b){
+	check_numbers("/", a, b);
+	return float_result(a, b,
+	                    py_truediv(number_as_double(a), number_as_double(b)));
+}
+
+Object *binary_floordiv(Object *a, Object *b){
+	if (check_numbers("//", a, b)){
+		if (integer_sign(b) == 0){
+			zero_division("integer division or modulo by zero");
+		}
+		return integer_floordiv(a, b);
+	}
+	return float_result(a, b, floor(py_truediv(number_as_double(a),
+	                                           number_as_double(b))));
+}
+
+Object *binary_mod(Object *a, Object *b){
+	if (check_numbers("%", a, b)){
+		if (integer_sign(b) == 0){
+			zero_division("integer division or modulo by zero");
+		}
+		return integer_mod(a, b);
+	}
+	return float_result(a, b,
+	                    py_fmod(number_as_double(a), number_as_double(b)));
+}
+
+/**
+ * Power of two objects. An integer to a power that isn't negative
+ * stays an exact integer; anything else is a float.
+ */
+Object *binary_pow(Object *a, Object *b){
+	if (check_numbers("** or pow()", a, b) && integer_sign(b) >= 0){
+		if (integer_is_big(b)){
+			output_discard_line();
+			fprintf(stderr, "OverflowError: exponent too large\n");
+			exit(1);
+		}
+		unsigned long exp = b->value;
+		decref(b);
+		return integer_pow(a, exp);
+	}
+	double base = number_as_double(a);
+	if (base == 0 && number_as_double(b) < 0){
+		zero_division("0.0 cannot be raised to a negative power");
+	}
+	return float_result(a, b, pow(base, number_as_double(b)));
+}
+
+/**
+ * Check that both operands of a bitwise operator are integers.
+ */
+static void check_integers(char *op, Object *a, Object *b){
+	if (a->type != &IntegerType || b->type != &IntegerType){
+		unsupported_operands(op, a, b);
+	}
+}
+
+/**
+ * Take the count of a shift, which python wants to fit in a long.
+ * @param  b Integer to take over
+ * @return   The count
+ */
+static unsigned long shift_count(Object *b){
+	if (integer_sign(b) < 0){
+		negative_shift_count();
+	}
+	if (integer_is_big(b)){
+		output_discard_line();
+		fprintf(stderr, "OverflowError: outrageous shift count\n");
+		exit(1);
+	}
+	unsigned long shift = b->value;
+	decref(b);
+	return shift;
+}
+
+/**
+ * Left shift of two integers, which is a multiplication by a power
+ * of two so the result never loses any bits.
+ */
+Object *binary_lshift(Object *a, Object *b){
+	check_integers("<<", a, b);
+	unsigned long shift = shift_count(b);
+	return integer_mul(a, integer_pow(new_Integer(2), shift));
+}
+
+/**
+ * Right shift of two integers, which rounds towards negative infinity.
+ */
+Object *binary_rshift(Object *a, Object *b){
+	check_integers(">>", a, b);
+	return integer_rshift(a, shift_count(b));
+}
+
+Object *binary_and(Object *a, Object *b){
+	check_integers("&", a, b);
+	return integer_bitwise(a, b, '&');
+}
+
+Object *binary_or(Object *a, Object *b){
+	check_integers("|", a, b);
+	return integer_bitwise(a, b, '|');
+}
+
+Object *binary_xor(Object *a, Object *b){
+	check_integers("^", a, b);
+	return integer_bitwise(a, b, '^');
+}
+
+Object *unary_neg(Object *a){
+	if (a->type == &IntegerType){
+		return integer_neg(a);
+	}
+	if (a->type != &FloatType){
+		output_discard_line();
+		fprintf(stderr, "TypeError: bad operand type for unary -: '%s'\n",
+		        a->type->name);
+		exit(1);
+	}
+	Object *negated = new_Float(-a->fvalue);
+	decref(a);
+	return negated;
+}
+
+/**
+ * obj[key]
+ * @return New reference to the element
+ */
+Object *binary_subscr(Object *obj, Object *key){
+	Object *elem = getitem(obj, key);
+	decref(obj);
+	decref(key);
+	return elem;
+}
+
+/**
+ * obj[key] = value
+ */
+void store_subscr(Object *obj, Object *key, Object *value){
+	setitem(obj, key, value);
+	decref(obj);
+	decref(key);
+	decref(value);
+}
+
+/**
+ * del obj[key]
+ */
+void delete_subscr(Object *obj, Object *key){
+	setitem(obj, key, NULL);
+	decref(obj);
+	decref(key);
+}
+
+/**
+ * elem in obj
+ * @return 1 if elem is in obj, 0 otherwise
+ */
+int contains_op(Object *obj, Object *elem){
+	int found = contains(obj, elem);
+	decref(obj);
+	decref(elem);
+	return found;
+}
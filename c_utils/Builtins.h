@@ -0,0 +1,76 @@
+#ifndef __BUILTINS
+#define __BUILTINS
+
+#include "Object.h"
+
+char *dynamic_str(char *);
+
+Object *range(int start, int stop, int step);
+
+// Arithmetic with python semantics
+long py_floordiv(long a, long b);
+long py_mod(long a, long b);
+long py_pow(long base, long exp);
+double py_truediv(double a, double b);
+double py_fmod(double a, double b);
+void negative_shift_count() __attribute__((noreturn));
+void long_overflow(const char *op) __attribute__((noreturn));
+
+/**
+ * a >> n like python, where a count past the width of a long gives
+ * 0 or -1 instead of being undefined like in C.
+ */
+static inline long py_rshift(long a, long n){
+	if (n < 0){
+		negative_shift_count();
+	}
+	// An arithmetic shift by 63 already leaves only the sign
+	return a >> (n > 63 ? 63 : n);
+}
+
+/**
+ * a << n like python. The translator only does this on longs when it
+ * knows the result fits (see infer.value_bounds), and shifts that could
+ * overflow on runtime integers with binary_lshift instead.
+ */
+static inline long py_lshift(long a, long n){
+	long result;
+	if (n < 0){
+		negative_shift_count();
+	}
+	if (a == 0){
+		return 0;
+	}
+	if (n > 62 || __builtin_mul_overflow(a, 1L << n, &result)){
+		long_overflow("<<");
+	}
+	return result;
+}
+
+// Operators on objects
+// Like the integer arithmetic (see Integer.h) these take over the
+// references to their operands. Integers stay exact and any float
+// operand makes the result a float.
+Object *binary_add(Object *a, Object *b);
+Object *binary_sub(Object *a, Object *b);
+Object *binary_mul(Object *a, Object *b);
+Object *binary_div(Object *a, Object *b);
+Object *binary_truediv(Object *a, Object *b);
+Object *binary_floordiv(Object *a, Object *b);
+Object *binary_mod(Object *a, Object *b);
+Object *binary_pow(Object *a, Object *b);
+Object *binary_lshift(Object *a, Object *b);
+Object *binary_rshift(Object *a, Object *b);
+Object *binary_and(Object *a, Object *b);
+Object *binary_or(Object *a, Object *b);
+Object *binary_xor(Object *a, Object *b);
+Object *unary_neg(Object *a);
+
+// Subscripts and membership of objects
+// These take over the references to their operands too.
+Object *binary_subscr(Object *obj, Object *key);
+void store_subscr(Object *obj, Object *key, Object *value);
+void delete_subscr(Object *obj, Object *key);
+int contains_op(Object *obj, Object *elem);
+
+#endif
@@ -1,17 +1,54 @@
 #include "utils.h"
 
+static void char_str(Object *c, StrBuf *sb);
+static void char_repr(Object *c, StrBuf *sb);
+static int char_eq(Object *c, Object *other);
+static unsigned long char_hash(Object *c);
+
+const Type CharType = {
+    TYPE_CHAR, "char",
+    destroy_Char, char_str, char_repr, char_eq, char_hash, NULL,
+    NULL, NULL, NULL, NULL
+};
+
 Object *new_Char(char c){
     // Intiialize object
     Object *char_ = new_Object();
 
     // Set default values
-    char_->name = "char";
+    char_->type = &CharType;
     char_->value = c;
 
     return char_;
 }
 
 void destroy_Char(Object *c){
-    assert(strcmp(c->name, "char") == 0);
-    free(c);
-}
\ No newline at end of file
+    assert(c->type == &CharType);
+    free_Object(c);
+}
+
+static void char_str(Object *c, StrBuf *sb){
+    strbuf_append_char(sb, c->value);
+}
+
+static void char_repr(Object *c, StrBuf *sb){
+    strbuf_append_char(sb, '\'');
+    strbuf_append_char(sb, c->value);
+    strbuf_append_char(sb, '\'');
+}
+
+/**
+ * Chars are equal to other chars and to strings of one char, which
+ * is what they are in python.
+ */
+static int char_eq(Object *c, Object *other){
+    if (other->type == &StringType){
+        return other->length == 1 && string_chars(other)[0] == c->value;
+    }
+    return other->type == &CharType && c->value == other->value;
+}
+
+static unsigned long char_hash(Object *c){
+    char byte = (char)c->value;
+    return hash_bytes(&byte, 1);
+}
@@ -1,6 +1,10 @@
 #ifndef __CHAR
 #define __CHAR
 
+#include "Object.h"
+
+extern const Type CharType;
+
 // Char general
 Object *new_Char(char c);
 
@@ -0,0 +1,155 @@
+#include "utils.h"
+
+#include <stdarg.h>
+
+static Object *dict_getitem(Object *dict, Object *key);
+static void dict_setitem(Object *dict, Object *key, Object *value);
+static int dict_contains(Object *dict, Object *key);
+
+const Type DictType = {
+    TYPE_DICT, "dict",
+    destroy_Dict, dict_str, dict_str, table_eq, NULL, table_size,
+    table_item, dict_getitem, dict_setitem, dict_contains
+};
+
+Object *new_Dict(){
+    // Intiialize object with room for the table
+    Object *dict = new_Mutable_Object_extra(sizeof(Table));
+
+    // Set default values
+    dict->type = &DictType;
+
+    // Set dict values
+    table_init(dict);
+
+    return dict;
+}
+
+/**
+ * Create a dict from the n keys and values passed after n, in turns,
+ * like a dict literal. A later value for the same key replaces an
+ * earlier one. The caller's reference to each of them is handed over
+ * to the dict.
+ * @param  n Number of keys and values
+ * @return   Dict object
+ */
+Object *new_Dict_of(unsigned int n, ...){
+    Object *dict = new_Dict();
+
+    va_list items;
+    va_start(items, n);
+    unsigned int i;
+    for (i = 0; i < n; i++){
+        Object *key = va_arg(items, Object*);
+        Object *value = va_arg(items, Object*);
+        dict_set(dict, key, value);
+        decref(key);
+        decref(value);
+    }
+    va_end(items);
+
+    return dict;
+}
+
+void destroy_Dict(Object *dict){
+    assert(dict->type == &DictType);
+    table_clear(dict);
+    free_Object(dict);
+}
+
+/**
+ * Exit with python's error for a key that isn't in a dict.
+ */
+static void key_error(Object *key){
+    output_discard_line();
+    char *r = repr(key);
+    fprintf(stderr, "KeyError: %s\n", r);
+    free(r);
+    exit(1);
+}
+
+/**
+ * Set the value of a key, adding the key if it isn't there yet.
+ * The dict takes its own references to them.
+ * @param dict  Dict to store in
+ * @param key   Key
+ * @param value Value for the key
+ */
+void dict_set(Object *dict, Object *key, Object *value){
+    TableEntry *entry = table_insert(dict, key);
+    Object *old = entry->value;
+    entry->value = promote(incref(value));
+    if (old != NULL){
+        decref(old);
+    }
+}
+
+/**
+ * Remove a key and its value.
+ * @param  dict Dict to remove from
+ * @param  key  Key to remove
+ * @return      1 if the key was there, 0 otherwise
+ */
+int dict_remove(Object *dict, Object *key){
+    return table_remove(dict, key);
+}
+
+/**
+ * Get the value of a key.
+ * @param  dict Dict to look in
+ * @param  key  Key to look up
+ * @return      Borrowed reference to the value (incref it to keep it
+ *              beyond the dict), or NULL if the key isn't there
+ */
+Object *dict_get(Object *dict, Object *key){
+    TableEntry *entry = table_lookup(dict, key);
+    return entry == NULL ? NULL : entry->value;
+}
+
+static Object *dict_getitem(Object *dict, Object *key){
+    Object *value = dict_get(dict, key);
+    if (value == NULL){
+        key_error(key);
+    }
+    return incref(value);
+}
+
+static void dict_setitem(Object *dict, Object *key, Object *value){
+    if (value != NULL){
+        dict_set(dict, key, value);
+    }
+    else if (!dict_remove(dict, key)){
+        key_error(key);
+    }
+}
+
+static int dict_contains(Object *dict, Object *key){
+    return table_lookup(dict, key) != NULL;
+}
+
+/**
+ * Write the keys and values of the dict the way python shows them
+ * to a StrBuf.
+ */
+void dict_str(Object *dict, StrBuf *sb){
+    strbuf_append_char(sb, '{');
+
+    Table *table = table_of(dict);
+    int first = 1;
+    unsigned int i;
+    for (i = 0; i < table->used; i++){
+        TableEntry *entry = &table->entries[i];
+        if (entry->key == NULL){
+            continue;
+        }
+        if (!first){
+            strbuf_append(sb, ", ", 2);
+        }
+        first = 0;
+        write_repr(entry->key, sb);
+        strbuf_append(sb, ": ", 2);
+        write_repr(entry->value, sb);
+    }
+
+    strbuf_append_char(sb, '}');
+}
@@ -0,0 +1,23 @@
+#ifndef __DICT
+#define __DICT
+
+#include "Object.h"
+#include "Table.h"
+
+extern const Type DictType;
+
+// Dict general
+// Keys are kept in the order they were first added (see Table.h).
+Object *new_Dict();
+Object *new_Dict_of(unsigned int n, ...);
+void destroy_Dict(Object *dict);
+void dict_str(Object *dict, StrBuf *sb);
+
+// Dict setters
+void dict_set(Object *dict, Object *key, Object *value);
+int dict_remove(Object *dict, Object *key);
+
+// Dict getters
+Object *dict_get(Object *dict, Object *key);
+
+#endif
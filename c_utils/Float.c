@@ -0,0 +1,62 @@
+#include "utils.h"
+
+static void float_str(Object *f, StrBuf *sb);
+static void float_repr(Object *f, StrBuf *sb);
+static int float_eq(Object *f, Object *other);
+static unsigned long float_hash(Object *f);
+
+const Type FloatType = {
+    TYPE_FLOAT, "float",
+    destroy_Float, float_str, float_repr, float_eq, float_hash, NULL,
+    NULL, NULL, NULL, NULL
+};
+
+Object *new_Float(double d){
+    // Intiialize object
+    Object *f = new_Object();
+
+    // Set default values
+    f->type = &FloatType;
+    f->fvalue = d;
+
+    return f;
+}
+
+void destroy_Float(Object *f){
+    assert(f->type == &FloatType);
+    free_Object(f);
+}
+
+static void float_str(Object *f, StrBuf *sb){
+    strbuf_append_double(sb, f->fvalue);
+}
+
+static void float_repr(Object *f, StrBuf *sb){
+    strbuf_append_double_repr(sb, f->fvalue);
+}
+
+/**
+ * Floats compare equal to integers with the same value, like
+ * in python.
+ */
+static int float_eq(Object *f, Object *other){
+    if (other->type == &FloatType){
+        return f->fvalue == other->fvalue;
+    }
+    if (other->type == &IntegerType){
+        return f->fvalue == integer_as_double(other);
+    }
+    return 0;
+}
+
+static unsigned long float_hash(Object *f){
+    // Integral floats hash like the integer they are equal to
+    if (f->fvalue == (double)(long)f->fvalue){
+        return (unsigned long)(long)f->fvalue;
+    }
+
+    unsigned long bits;
+    memcpy(&bits, &f->fvalue, sizeof(bits) < sizeof(double) ?
+           sizeof(bits) : sizeof(double));
+    return bits;
+}
@@ -0,0 +1,12 @@
+#ifndef __FLOAT
+#define __FLOAT
+
+#include "Object.h"
+
+extern const Type FloatType;
+
+// Float general
+Object *new_Float(double d);
+void destroy_Float(Object *f);
+
+#endif
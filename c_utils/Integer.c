@@ -1,23 +1,540 @@
 #include "utils.h"
 
-Object *new_Integer(int i){
-    // Intiialize object
-    Object *integer = new_Object();
+#include <limits.h>
+
+static void integer_str(Object *integer, StrBuf *sb);
+static void integer_repr(Object *integer, StrBuf *sb);
+static int integer_eq(Object *integer, Object *other);
+static unsigned long integer_hash(Object *integer);
+static size_t integer_size(Object *integer);
+
+const Type IntegerType = {
+    TYPE_INTEGER, "integer",
+    destroy_Integer, integer_str, integer_repr, integer_eq, integer_hash,
+    integer_size, NULL, NULL, NULL, NULL
+};
+
+/**
+ * Make an integer from a sign and a magnitude, as a long if it fits.
+ * @param  sign  1 or -1
+ * @param  limbs Magnitude (see Bignum.h)
+ * @param  n     Number of limbs
+ * @return       Integer object
+ */
+static Object *integer_from_magnitude(int sign, const Limb *limbs,
+                                      unsigned int n){
+    n = bignum_normalize(limbs, n);
+    if (n <= 2){
+        unsigned long m = 0;
+        if (n > 0){
+            m = limbs[0];
+        }
+        if (n > 1){
+            m |= (unsigned long)limbs[1] << LIMB_BITS;
+        }
+        if (m <= LONG_MAX){
+            return new_Integer(sign < 0 ? -(long)m : (long)m);
+        }
+        if (sign < 0 && m == (unsigned long)LONG_MAX + 1){
+            return new_Integer(LONG_MIN);
+        }
+    }
+
+    // Intiialize object with room for the limbs
+    Object *integer = new_Object_extra(sizeof(Limb)*n);
 
     // Set default values
-    integer->name = "integer";
-    integer->value = i;
+    integer->type = &IntegerType;
+    integer->value = sign;
+    integer->length = n;
+    memcpy(integer_limbs(integer), limbs, sizeof(Limb)*n);
 
     return integer;
 }
 
+/**
+ * Get the sign and magnitude of an integer.
+ * @param  integer Integer object
+ * @param  room    Two limbs to write the magnitude of a long to
+ * @param  n       Set to the normalized length of the magnitude
+ * @param  sign    Set to 1 or -1
+ * @return         The magnitude
+ */
+static const Limb *integer_magnitude(Object *integer, Limb *room,
+                                     unsigned int *n, int *sign){
+    if (integer_is_big(integer)){
+        *sign = (int)integer->value;
+        *n = integer->length;
+        return integer_limbs(integer);
+    }
+
+    long value = integer->value;
+    unsigned long m = value < 0 ? -(unsigned long)value
+                                : (unsigned long)value;
+    *sign = value < 0 ? -1 : 1;
+    room[0] = (Limb)m;
+    room[1] = (Limb)(m >> LIMB_BITS);
+    *n = bignum_normalize(room, 2);
+    return room;
+}
+
+/**
+ * Create an integer from a string of decimal digits, like a literal
+ * too big for a long.
+ * @param  digits Decimal digits, with an optional leading -
+ * @return        Integer object
+ */
+Object *new_Integer_from_string(const char *digits){
+    int sign = 1;
+    if (*digits == '-'){
+        sign = -1;
+        digits++;
+    }
+    Limb *limbs = bignum_alloc(bignum_decimal_limbs(strlen(digits)));
+    unsigned int n = bignum_from_decimal(digits, limbs);
+    Object *integer = integer_from_magnitude(sign, limbs, n);
+    free(limbs);
+    return integer;
+}
+
 void destroy_Integer(Object *integer){
-    assert(strcmp(integer->name, "integer") == 0);
-    free(integer);
+    assert(integer->type == &IntegerType);
+    free_Object(integer);
+}
+
+/**
+ * Return the value of an integer as the nearest double, or an
+ * infinity if it is too big for one.
+ * @param  integer Integer object
+ * @return         double
+ */
+double integer_as_double(Object *integer){
+    if (!integer_is_big(integer)){
+        return (double)integer->value;
+    }
+    double d = 0;
+    unsigned int i = integer->length;
+    while (i-- > 0){
+        d = d*4294967296.0 + integer_limbs(integer)[i];
+    }
+    return integer->value < 0 ? -d : d;
+}
+
+/**
+ * Return -1, 0 or 1 as the integer is negative, zero or positive.
+ */
+int integer_sign(Object *integer){
+    if (integer_is_big(integer)){
+        return (int)integer->value;
+    }
+    return (integer->value > 0) - (integer->value < 0);
+}
+
+/**
+ * Find the element an integer used as an index into a sequence
+ * refers to. Negative indices count from the end like in python.
+ * @param  integer Integer object
+ * @param  length  Number of elements in the sequence
+ * @param  i       Set to the position of the element
+ * @return         1 if the index is in range, 0 otherwise
+ */
+int integer_index(Object *integer, unsigned int length, unsigned int *i){
+    if (integer_is_big(integer)){
+        return 0;
+    }
+    long index = integer->value;
+    if (index < 0){
+        index += length;
+    }
+    if (index < 0 || index >= (long)length){
+        return 0;
+    }
+    *i = (unsigned int)index;
+    return 1;
+}
+
+static void integer_str(Object *integer, StrBuf *sb){
+    if (!integer_is_big(integer)){
+        strbuf_append_int(sb, integer->value);
+        return;
+    }
+    if (integer->value < 0){
+        strbuf_append_char(sb, '-');
+    }
+    bignum_write_decimal(integer_limbs(integer), integer->length, sb);
+}
+
+/**
+ * Integers too big for a long are python 2 longs, whose repr ends
+ * in L.
+ */
+static void integer_repr(Object *integer, StrBuf *sb){
+    integer_str(integer, sb);
+    if (integer_is_big(integer)){
+        strbuf_append_char(sb, 'L');
+    }
+}
+
+static int integer_eq(Object *integer, Object *other){
+    if (other->type == &FloatType){
+        return integer_as_double(integer) == other->fvalue;
+    }
+    if (other->type != &IntegerType ||
+            integer->value != other->value ||
+            integer->length != other->length){
+        return 0;
+    }
+    return memcmp(integer_limbs(integer), integer_limbs(other),
+                  sizeof(Limb)*integer->length) == 0;
+}
+
+static unsigned long integer_hash(Object *integer){
+    if (!integer_is_big(integer)){
+        return (unsigned long)integer->value;
+    }
+    unsigned long h = (unsigned long)integer->value;
+    unsigned int i;
+    for (i = 0; i < integer->length; i++){
+        h = h*1000003UL ^ integer_limbs(integer)[i];
+    }
+    return h;
+}
+
+static size_t integer_size(Object *integer){
+    return sizeof(Object) + sizeof(Limb)*integer->length;
+}
+
+/**
+ * Add or subtract the magnitudes of two integers by their signs.
+ * @param  negate_b Subtract b instead of adding it
+ * @return          New integer
+ */
+static Object *integer_add_magnitudes(Object *a, Object *b, int negate_b){
+    Limb room_a[2], room_b[2];
+    unsigned int na, nb;
+    int sign_a, sign_b;
+    const Limb *ma = integer_magnitude(a, room_a, &na, &sign_a);
+    const Limb *mb = integer_magnitude(b, room_b, &nb, &sign_b);
+    if (negate_b){
+        sign_b = -sign_b;
+    }
+
+    Limb *out = bignum_alloc((na > nb ? na : nb) + 1);
+    Object *result;
+    if (sign_a == sign_b){
+        result = integer_from_magnitude(
+            sign_a, out, bignum_add(ma, na, mb, nb, out));
+    }
+    else if (bignum_cmp(ma, na, mb, nb) >= 0){
+        result = integer_from_magnitude(
+            sign_a, out, bignum_sub(ma, na, mb, nb, out));
+    }
+    else {
+        result = integer_from_magnitude(
+            sign_b, out, bignum_sub(mb, nb, ma, na, out));
+    }
+    free(out);
+    return result;
+}
+
+/**
+ * a + b when an operand is a bignum or the sum overflows a long.
+ * Use integer_add, which tries the long first.
+ */
+Object *integer_add_big(Object *a, Object *b){
+    Object *sum = integer_add_magnitudes(a, b, 0);
+    decref(a);
+    decref(b);
+    return sum;
+}
+
+/**
+ * a - b when an operand is a bignum or the difference overflows
+ * a long. Use integer_sub, which tries the long first.
+ */
+Object *integer_sub_big(Object *a, Object *b){
+    Object *difference = integer_add_magnitudes(a, b, 1);
+    decref(a);
+    decref(b);
+    return difference;
+}
+
+/**
+ * a*b when an operand is a bignum or the product overflows a long.
+ * Use integer_mul, which tries the long first.
+ */
+Object *integer_mul_big(Object *a, Object *b){
+    Limb room_a[2], room_b[2];
+    unsigned int na, nb;
+    int sign_a, sign_b;
+    const Limb *ma = integer_magnitude(a, room_a, &na, &sign_a);
+    const Limb *mb = integer_magnitude(b, room_b, &nb, &sign_b);
+
+    Limb *out = bignum_alloc(na + nb);
+    Object *product = integer_from_magnitude(
+        sign_a*sign_b, out, bignum_mul(ma, na, mb, nb, out));
+    free(out);
+
+    decref(a);
+    decref(b);
+    return product;
+}
+
+/**
+ * Negate an integer.
+ * @param  a Integer to take over
+ * @return   New reference to -a
+ */
+Object *integer_neg(Object *a){
+    if (!integer_is_big(a) && a->value != LONG_MIN){
+        if (a->refcount == 1){
+            a->value = -a->value;
+            return a;
+        }
+        Object *negated = new_Integer(-a->value);
+        decref(a);
+        return negated;
+    }
+
+    Limb room[2];
+    unsigned int n;
+    int sign;
+    const Limb *m = integer_magnitude(a, room, &n, &sign);
+    Object *negated = integer_from_magnitude(-sign, m, n);
+    decref(a);
+    return negated;
+}
+
+/**
+ * Divide two integers, rounding the quotient towards negative
+ * infinity and giving the remainder the sign of the divisor like
+ * python does. b must not be zero.
+ * @param q Set to a new reference to a // b, unless NULL
+ * @param r Set to a new reference to a % b, unless NULL
+ */
+static void integer_divmod(Object *a, Object *b, Object **q, Object **r){
+    assert(integer_sign(b) != 0);
+    if (!integer_is_big(a) && !integer_is_big(b) &&
+            !(a->value == LONG_MIN && b->value == -1)){
+        long quotient = a->value / b->value;
+        long remainder = a->value % b->value;
+        if (remainder != 0 && ((remainder < 0) != (b->value < 0))){
+            quotient--;
+            remainder += b->value;
+        }
+        if (q != NULL){
+            *q = new_Integer(quotient);
+        }
+        if (r != NULL){
+            *r = new_Integer(remainder);
+        }
+        return;
+    }
+
+    Limb room_a[2], room_b[2];
+    unsigned int na, nb;
+    int sign_a, sign_b;
+    const Limb *ma = integer_magnitude(a, room_a, &na, &sign_a);
+    const Limb *mb = integer_magnitude(b, room_b, &nb, &sign_b);
+
+    Limb *quotient = bignum_alloc(na + 1);
+    Limb *remainder = bignum_alloc(nb + 1);
+    bignum_divmod(ma, na, mb, nb, quotient, remainder);
+    quotient[na] = 0;
+    unsigned int nq = bignum_normalize(quotient, na + 1);
+    unsigned int nr = bignum_normalize(remainder, nb + 1);
+
+    if (sign_a != sign_b && nr > 0){
+        // Round away from zero instead: q = -(|a|/|b| + 1), and
+        // r = b - (|a| % |b|) with the sign of b.
+        Limb one = 1;
+        nq = bignum_add(quotient, nq, &one, 1, quotient);
+        nr = bignum_sub(mb, nb, remainder, nr, remainder);
+    }
+    if (q != NULL){
+        *q = integer_from_magnitude(sign_a*sign_b, quotient, nq);
+    }
+    if (r != NULL){
+        *r = integer_from_magnitude(sign_b, remainder, nr);
+    }
+    free(quotient);
+    free(remainder);
+}
+
+/**
+ * a // b. b must not be zero.
+ * @param  a Integer to take over
+ * @param  b Integer to take over
+ * @return   New reference to the quotient
+ */
+Object *integer_floordiv(Object *a, Object *b){
+    Object *q;
+    integer_divmod(a, b, &q, NULL);
+    decref(a);
+    decref(b);
+    return q;
+}
+
+/**
+ * a % b. b must not be zero.
+ * @param  a Integer to take over
+ * @param  b Integer to take over
+ * @return   New reference to the remainder
+ */
+Object *integer_mod(Object *a, Object *b){
+    Object *r;
+    integer_divmod(a, b, NULL, &r);
+    decref(a);
+    decref(b);
+    return r;
+}
+
+/**
+ * Raise an integer to a power by squaring.
+ * @param  base Integer to take over
+ * @param  exp  Exponent
+ * @return      New reference to base**exp
+ */
+Object *integer_pow(Object *base, unsigned long exp){
+    Object *result = new_Integer(1);
+    while (exp){
+        if (exp & 1){
+            result = integer_mul(result, incref(base));
+        }
+        exp >>= 1;
+        if (exp){
+            base = integer_mul(base, incref(base));
+        }
+    }
+    decref(base);
+    return result;
 }
 
+/**
+ * Negate a number in two's complement in place.
+ */
+static void twos_complement_negate(Limb *limbs, unsigned int n){
+    DoubleLimb carry = 1;
+    for (unsigned int i = 0; i < n; i++){
+        carry += (Limb)~limbs[i];
+        limbs[i] = (Limb)carry;
+        carry >>= LIMB_BITS;
+    }
+}
+
+/**
+ * Write an integer in two's complement, the way python's bitwise
+ * operators see it.
+ * @param out Room for n limbs, at least one more than the magnitude
+ *            of the integer has so the sign bit fits
+ */
+static void integer_to_twos_complement(Object *integer, Limb *out,
+                                       unsigned int n){
+    Limb room[2];
+    unsigned int nm;
+    int sign;
+    const Limb *m = integer_magnitude(integer, room, &nm, &sign);
+    assert(nm < n);
+    memset(out, 0, sizeof(Limb)*n);
+    memcpy(out, m, sizeof(Limb)*nm);
+    if (sign < 0){
+        twos_complement_negate(out, n);
+    }
+}
+
+/**
+ * Make an integer from n limbs of two's complement, which are
+ * overwritten.
+ */
+static Object *integer_from_twos_complement(Limb *limbs, unsigned int n){
+    if (limbs[n - 1] >> (LIMB_BITS - 1)){
+        twos_complement_negate(limbs, n);
+        return integer_from_magnitude(-1, limbs, n);
+    }
+    return integer_from_magnitude(1, limbs, n);
+}
+
+/**
+ * Limbs of two's complement that hold an integer with room for
+ * its sign bit.
+ */
+static unsigned int twos_complement_length(Object *integer){
+    return (integer->length > 2 ? integer->length : 2) + 1;
+}
+
+/**
+ * a & b, a | b or a ^ b, with negative integers taken as their
+ * infinitely sign extended two's complement like python does.
+ * @param  a  Integer to take over
+ * @param  b  Integer to take over
+ * @param  op '&', '|' or '^'
+ * @return    New reference to the result
+ */
+Object *integer_bitwise(Object *a, Object *b, char op){
+    if (!integer_is_big(a) && !integer_is_big(b)){
+        long x = a->value, y = b->value;
+        return integer_result(a, b, op == '&' ? x & y :
+                                    op == '|' ? x | y : x ^ y);
+    }
+
+    unsigned int na = twos_complement_length(a);
+    unsigned int nb = twos_complement_length(b);
+    unsigned int n = na > nb ? na : nb;
+    Limb *x = bignum_alloc(n);
+    Limb *y = bignum_alloc(n);
+    integer_to_twos_complement(a, x, n);
+    integer_to_twos_complement(b, y, n);
+    for (unsigned int i = 0; i < n; i++){
+        x[i] = op == '&' ? x[i] & y[i] :
+               op == '|' ? x[i] | y[i] : x[i] ^ y[i];
+    }
+    Object *result = integer_from_twos_complement(x, n);
+    free(x);
+    free(y);
+
+    decref(a);
+    decref(b);
+    return result;
+}
+
+/**
+ * Shift an integer right, rounding towards negative infinity like
+ * python does, so negative integers end at -1.
+ * @param  a     Integer to take over
+ * @param  shift Number of bits
+ * @return       New reference to a >> shift
+ */
+Object *integer_rshift(Object *a, unsigned long shift){
+    if (!integer_is_big(a)){
+        long value = a->value;
+        Object *shifted = new_Integer(
+            value >> (shift < 63 ? shift : 63));
+        decref(a);
+        return shifted;
+    }
+
+    unsigned int n = twos_complement_length(a);
+    Limb *limbs = bignum_alloc(n);
+    integer_to_twos_complement(a, limbs, n);
+    decref(a);
+
+    Limb fill = (limbs[n - 1] >> (LIMB_BITS - 1)) ? ~(Limb)0 : 0;
+    unsigned long words = shift / LIMB_BITS;
+    unsigned int bits = shift % LIMB_BITS;
+    for (unsigned int i = 0; i < n; i++){
+        Limb low = i + words < n ? limbs[i + words] : fill;
+        Limb high = i + words + 1 < n ? limbs[i + words + 1] : fill;
+        limbs[i] = bits ? (low >> bits) | (high << (LIMB_BITS - bits))
+                        : low;
+    }
+    Object *shifted = integer_from_twos_complement(limbs, n);
+    free(limbs);
+    return shifted;
+}
+
+/**
+ * Add two integers without taking over the references to them.
+ */
 Object *add_integers(Object *int1, Object *int2){
-    int val1 = int1->value;
-    int val2 = int2->value;
-    return new_Integer(val1 + val2);
-}
\ No newline at end of file
+    return integer_add(incref(int1), incref(int2));
+}
@@ -1,9 +1,123 @@
 #ifndef __INTEGER
 #define __INTEGER
 
-Object *new_Integer(int i);
+#include "Object.h"
+#include "Bignum.h"
+
+extern const Type IntegerType;
+
+// Integers
+// An integer that fits in a long keeps it in value, and arithmetic on
+// those is done on the long with the compiler's overflow checking
+// builtins. Only a result that doesn't fit becomes a bignum, with its
+// magnitude right after the object (length limbs of it) and its sign
+// (1 or -1) in value. Every number has the one representation, so an
+// integer is a bignum exactly when it doesn't fit in a long.
+#define integer_limbs(integer) ((Limb*)((integer) + 1))
+#define integer_is_big(integer) ((integer)->length != 0)
+
+// Integer general
+Object *new_Integer_from_string(const char *digits);
 void destroy_Integer(Object *integer);
+double integer_as_double(Object *integer);
+int integer_sign(Object *integer);
+int integer_index(Object *integer, unsigned int length, unsigned int *i);
+
+// Arithmetic
+// These take over the references to their operands, so intermediate
+// results can be passed straight on to the next operation, and an
+// operand nobody else refers to is reused for the result.
+Object *integer_add_big(Object *a, Object *b);
+Object *integer_sub_big(Object *a, Object *b);
+Object *integer_mul_big(Object *a, Object *b);
+Object *integer_neg(Object *a);
+Object *integer_floordiv(Object *a, Object *b);
+Object *integer_mod(Object *a, Object *b);
+Object *integer_pow(Object *base, unsigned long exp);
+Object *integer_bitwise(Object *a, Object *b, char op);
+Object *integer_rshift(Object *a, unsigned long shift);
 
 Object *add_integers(Object *int1, Object *int2);
 
-#endif
\ No newline at end of file
+static inline Object *new_Integer(long i){
+	// Intiialize object
+	Object *integer = new_Object();
+
+	// Set default values
+	integer->type = &IntegerType;
+	integer->value = i;
+	integer->length = 0;
+
+	return integer;
+}
+
+/**
+ * Give the result of an operation on two longs, reusing an operand
+ * if nothing else refers to it.
+ * @param  a     Operand to take over
+ * @param  b     Operand to take over
+ * @param  value Result
+ * @return       Integer holding value
+ */
+static inline Object *integer_result(Object *a, Object *b, long value){
+	if (a->refcount == 1){
+		decref(b);
+		a->value = value;
+		return a;
+	}
+	if (b->refcount == 1){
+		decref(a);
+		b->value = value;
+		return b;
+	}
+	decref(a);
+	decref(b);
+	return new_Integer(value);
+}
+
+/**
+ * Add two integers.
+ * @param  a Integer to take over
+ * @param  b Integer to take over
+ * @return   New reference to a + b
+ */
+static inline Object *integer_add(Object *a, Object *b){
+	long value;
+	if (integer_is_big(a) || integer_is_big(b) ||
+			__builtin_add_overflow(a->value, b->value, &value)){
+		return integer_add_big(a, b);
+	}
+	return integer_result(a, b, value);
+}
+
+/**
+ * Subtract one integer from another.
+ * @param  a Integer to take over
+ * @param  b Integer to take over
+ * @return   New reference to a - b
+ */
+static inline Object *integer_sub(Object *a, Object *b){
+	long value;
+	if (integer_is_big(a) || integer_is_big(b) ||
+			__builtin_sub_overflow(a->value, b->value, &value)){
+		return integer_sub_big(a, b);
+	}
+	return integer_result(a, b, value);
+}
+
+/**
+ * Multiply two integers.
+ * @param  a Integer to take over
+ * @param  b Integer to take over
+ * @return   New reference to a*b
+ */
+static inline Object *integer_mul(Object *a, Object *b){
+	long value;
+	if (integer_is_big(a) || integer_is_big(b) ||
+			__builtin_mul_overflow(a->value, b->value, &value)){
+		return integer_mul_big(a, b);
+	}
+	return integer_result(a, b, value);
+}
+
+#endif
@@ -1,152 +1,227 @@
 #include "utils.h"
 
+#include <stdarg.h>
+
+#define LIST_MIN_CAPACITY 8
+
+static int list_eq(Object *list, Object *other);
+static Object *list_item(Iterator *it);
+static Object *list_getitem(Object *list, Object *key);
+static void list_setitem(Object *list, Object *key, Object *value);
+
+const Type ListType = {
+    TYPE_LIST, "list",
+    destroy_List, list_str, list_str, list_eq, NULL, NULL,
+    list_item, list_getitem, list_setitem, NULL
+};
+
 Object *new_List(){
     // Intiialize object
-    Object *list = new_Object();
+    Object *list = new_Mutable_Object_extra(0);
 
     // Set default values
-    list->name = "list";
+    list->type = &ListType;
 
     // Set list values
     list->length = 0;
-    list->head = list->tail = NULL;
+    list->capacity = 0;
+    list->items = NULL;
+
+    return list;
+}
+
+/**
+ * Create a list holding the n objects passed after n, like a list
+ * literal. The caller's reference to each of them is handed over
+ * to the list.
+ * @param  n Number of elements
+ * @return   List object
+ */
+Object *new_List_of(unsigned int n, ...){
+    Object *list = new_List();
+
+    va_list elems;
+    va_start(elems, n);
+    unsigned int i;
+    for (i = 0; i < n; i++){
+        list_append_new(list, va_arg(elems, Object*));
+    }
+    va_end(elems);
 
     return list;
 }
 
 void destroy_List(Object *list){
-    assert(strcmp(list->name, "list") == 0 ||
-           strcmp(list->name, "string") == 0);
-
-    // Free each element in the list and the data it holds.
-    Node *current;
-    while(list->head != NULL) {
-        current = list->head;
-        list->head = current->next;
-        free(current->data); // Use free (not destroy) because data was malloc'd
-        free(current);
+    assert(list->type == &ListType);
+
+    // Let go of the list's reference to each element
+    unsigned int i;
+    for (i = 0; i < list->length; i++){
+        decref(list->items[i]);
+    }
+    TRACK_FREE(list->items);
+    pool_free(list->items, sizeof(Object*)*list->capacity);
+
+    free_Object(list);
+}
+
+/**
+ * Make sure the list can hold at least one more element.
+ * The capacity doubles each time it runs out so appending
+ * is amortized O(1).
+ * @param list List to grow
+ */
+static void list_reserve_one(Object *list){
+    if (list->length < list->capacity){
+        return;
     }
 
-    free(list);
+    unsigned int capacity = list->capacity ? list->capacity*2 : LIST_MIN_CAPACITY;
+    TRACK_FREE(list->items);
+    list->items = (Object**)pool_realloc(list->items,
+                                         sizeof(Object*)*list->capacity,
+                                         sizeof(Object*)*capacity);
+    list->capacity = capacity;
+    TRACK_ALLOC(list->items, sizeof(Object*)*capacity, TRACK_LIST_ITEMS);
+}
+
+/**
+ * Take a reference to an element for the list to hold.
+ * @param  elem Elem to hold on to
+ * @return      Reference the list owns
+ */
+static Object *list_own(Object *elem){
+    // An element from an arena gets copied out of it so the list
+    // never holds on to memory an arena might release before the
+    // list is gone.
+    return promote(incref(elem));
 }
 
 /**
- * Copy an element and prepend it to the front of
- * the list. Remeber to free this element and the
- * data in it later.
+ * Prepend an element to the front of the list.
+ * The list takes its own reference to the element.
  * @param list List to get a new elem
  * @param elem Elem to get prepended
  */
 void list_prepend(Object *list, Object *elem){
-    Node *node = (Node*)malloc(sizeof(Node));
-    node->data = (Object*)malloc(sizeof(Object));
-    memcpy(node->data, elem, sizeof(Object));
-
-    // Set the old head as the new node next.
-    // Set the new node as the new list head.
-    node->next = list->head;
-    list->head = node;
-
-    // If the element is first elem in the list,
-    // the head could still point to null, so
-    // reassign the head to itself.
-    if(!list->tail) {
-        list->tail = list->head;
-    }
+    list_reserve_one(list);
+
+    // Shift everything over by one to make room at the front.
+    memmove(list->items + 1, list->items, sizeof(Object*)*list->length);
+    list->items[0] = list_own(elem);
 
     list->length++;
 }
 
 /**
- * Copy an element and append it to the front of
- * the list. Remeber to free this element and the
- * data in it later.
+ * Append an element to the end of the list.
+ * The list takes its own reference to the element.
  * @param list List to get a new elem
  * @param elem Elem to get appended
  */
 void list_append(Object *list, Object *elem){
-    Node *node = (Node*)malloc(sizeof(Node));
-    node->data = (Object*)malloc(sizeof(Object));
-    memcpy(node->data, elem, sizeof(Object));
-
-    // Make the new node next null and the new tail.
-    // If the list was initially empty, make the new
-    // node the new head also.
-    node->next = NULL;
-    if(list->length == 0) {
-        list->head = list->tail = node;
-    } else {
-        list->tail->next = node;
-        list->tail = node;
-    }
-
+    list_reserve_one(list);
+    list->items[list->length] = list_own(elem);
     list->length++;
 }
 
 /**
- * Get the ith element of the list object.
- * @param  list List to loop through
- * @param  i    Index
- * @return      Pointer to object (not copy)
+ * Append an element that was made just to be put in the
+ * list (like a boxed value), handing the caller's reference
+ * over to the list.
+ * @param list List to get a new elem
+ * @param elem Newly created elem to get appended
  */
-Object *list_get(Object *list, unsigned int i){
-    assert(i < list->length);
+void list_append_new(Object *list, Object *elem){
+    list_append(list, elem);
+    decref(elem);
+}
+
+static Object *list_item(Iterator *it){
+    return incref(it->iterable->items[it->index]);
+}
 
-    Node *current = list->head;
-    int j = 0;
-    for (j = 0; j < i; j++){
-        current = current->next;
+/**
+ * Find the element a key used as an index refers to, exiting with
+ * python's error if it isn't an integer or is out of range.
+ * @param  list   List to index
+ * @param  key    Index
+ * @param  action What the index is used for, for the error message
+ * @return        Position of the element
+ */
+static unsigned int list_index(Object *list, Object *key, char *action){
+    unsigned int i;
+    if (key->type != &IntegerType){
+        output_discard_line();
+        fprintf(stderr, "TypeError: list indices must be integers, not %s\n",
+                key->type->name);
+        exit(1);
+    }
+    if (!integer_index(key, list->length, &i)){
+        output_discard_line();
+        fprintf(stderr, "IndexError: list %s out of range\n", action);
+        exit(1);
     }
-    return current->data;
+    return i;
 }
 
+/**
+ * list[key], as a new reference.
+ */
+static Object *list_getitem(Object *list, Object *key){
+    return incref(list->items[list_index(list, key, "index")]);
+}
 
-char *list_str(Object *list){
-    // Return the contents of the list separated by ,
-    char *str_rep = (char*)malloc(sizeof(char)*3);
-    unsigned int len = 3; // Initially just "[]" (then null terminator)
-    unsigned int start = 1; // Start after the [
-    *str_rep = '[';
+/**
+ * list[key] = value, or del list[key] if value is NULL.
+ */
+static void list_setitem(Object *list, Object *key, Object *value){
+    unsigned int i = list_index(list, key, "assignment index");
+    Object *old = list->items[i];
+    if (value != NULL){
+        list->items[i] = list_own(value);
+    }
+    else {
+        // Close the gap
+        memmove(list->items + i, list->items + i + 1,
+                sizeof(Object*)*(list->length - i - 1));
+        list->length--;
+    }
+    decref(old);
+}
 
-    int i;
-    Object *elem = NULL;
+/**
+ * Write the contents of the list separated by , to a StrBuf.
+ * Elements are written straight into the same buffer.
+ */
+void list_str(Object *list, StrBuf *sb){
+    strbuf_append_char(sb, '[');
+
+    unsigned int i;
     for (i = 0; i < list->length; i++){
-        // I know this is an inefficient way of getting the elems
-        // but I am just trying to get this to work for now.
-        elem = list_get(list, i);
-        char *elem_str = str(elem);
-        int elem_len = strlen(elem_str);
-
-        if (strcmp(elem->name, "string") == 0){
-            // Resize the list str_rep
-            len += elem_len + 4; // The string len + ', ' + 2 double quotes
-            str_rep = (char*)realloc(str_rep, sizeof(char)*len);
-            *(str_rep + start) = '\'';
-            strncpy(str_rep + start + 1, elem_str, elem_len);
-            *(str_rep + start + 1 + elem_len) = '\'';
-            *(str_rep + start + 1 + elem_len+1) = ',';
-            *(str_rep + start + 1 + elem_len+2) = ' ';
-            start += elem_len + 4;
-        }
-        else {
-            // Resize the list str_rep
-            len += elem_len + 2; // The string len + ', '
-            str_rep = (char*)realloc(str_rep, sizeof(char)*len);
-            strncpy(str_rep + start, elem_str, elem_len);
-            *(str_rep + start + elem_len) = ',';
-            *(str_rep + start + elem_len+1) = ' ';
-            start += elem_len + 2;
+        if (i > 0){
+            strbuf_append(sb, ", ", 2);
         }
-
-        free(elem_str);
+        // Use repr so that elements like strings show up quoted.
+        write_repr(list->items[i], sb);
     }
 
-    if (list->length > 0){
-        len -= 2;
+    strbuf_append_char(sb, ']');
+}
+
+/**
+ * Check if two lists have equal elements.
+ */
+static int list_eq(Object *list, Object *other){
+    if (list->type != other->type || list->length != other->length){
+        return 0;
     }
 
-    *(str_rep+len-2) = ']';
-    *(str_rep+len-1) = 0;
-    return str_rep;
+    unsigned int i;
+    for (i = 0; i < list->length; i++){
+        if (!eq(list->items[i], other->items[i])){
+            return 0;
+        }
+    }
+    return 1;
 }
-
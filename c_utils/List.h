@@ -1,18 +1,34 @@
 #ifndef __LIST
 #define __LIST
 
+#include "Object.h"
+
+extern const Type ListType;
+
 // List general
 Object *new_List();
+Object *new_List_of(unsigned int n, ...);
 void destroy_List(Object *list);
-char *list_str(Object *list);
+void list_str(Object *list, StrBuf *sb);
 
 // List setters
 void list_prepend(Object *list, Object *elem);
 void list_append(Object *list, Object *elem);
+void list_append_new(Object *list, Object *elem);
 
 // List getters
-Object *list_get(Object *list, unsigned int i);
+/**
+ * Get the ith element of the list object.
+ * @param  list List to index
+ * @param  i    Index
+ * @return      Borrowed reference to the element (incref it
+ *              to keep it beyond the list)
+ */
+static inline Object *list_get(Object *list, unsigned int i){
+	assert(i < list->length);
+	return list->items[i];
+}
 
 // List removers
 
-#endif
\ No newline at end of file
+#endif
@@ -0,0 +1,261 @@
+#include "utils.h"
+
+#define POOL_ALIGN 16
+#define POOL_CLASSES 32 // Blocks up to POOL_ALIGN*POOL_CLASSES bytes are pooled
+#define POOL_MAX (POOL_ALIGN*POOL_CLASSES)
+
+#define ARENA_CHUNK_SIZE (64*1024)
+#define ARENA_MAX_DEPTH 256
+
+AllocStats alloc_stats;
+
+/**
+ * Freelists
+ * Every freed block of a size class is pushed to the front of
+ * the list for that class and reused by the next allocation of
+ * the same class. The link is stored in the block itself.
+ */
+typedef struct _FreeBlock FreeBlock;
+struct _FreeBlock {
+    FreeBlock *next;
+};
+
+#ifndef PY2C_NO_POOL
+static FreeBlock *freelists[POOL_CLASSES];
+#endif
+
+static int print_stats_registered = 0;
+
+static void print_stats_at_exit(){
+    print_alloc_stats(stderr);
+}
+
+/**
+ * Print the counters at exit if the PY2C_ALLOC_STATS environment
+ * variable is set. Checked once on the first allocation.
+ */
+static void register_stats(){
+    print_stats_registered = 1;
+    if (getenv("PY2C_ALLOC_STATS") != NULL){
+        atexit(print_stats_at_exit);
+    }
+}
+
+static void *system_alloc(size_t size){
+    void *ptr = malloc(size);
+    assert(ptr != NULL);
+    alloc_stats.system_allocs++;
+    return ptr;
+}
+
+#ifndef PY2C_NO_POOL
+static unsigned int size_class(size_t size){
+    return (size + POOL_ALIGN - 1)/POOL_ALIGN - 1;
+}
+#endif
+
+void *pool_alloc(size_t size){
+    if (!print_stats_registered){
+        register_stats();
+    }
+    alloc_stats.pool_allocs++;
+
+#ifndef PY2C_NO_POOL
+    if (size > 0 && size <= POOL_MAX){
+        unsigned int c = size_class(size);
+        FreeBlock *block = freelists[c];
+        if (block != NULL){
+            freelists[c] = block->next;
+            alloc_stats.pool_hits++;
+            return block;
+        }
+        return system_alloc((c + 1)*POOL_ALIGN);
+    }
+#endif
+
+    return system_alloc(size);
+}
+
+void pool_free(void *ptr, size_t size){
+    if (ptr == NULL){
+        return;
+    }
+    alloc_stats.pool_frees++;
+
+#ifndef PY2C_NO_POOL
+    if (size > 0 && size <= POOL_MAX){
+        unsigned int c = size_class(size);
+        FreeBlock *block = (FreeBlock*)ptr;
+        block->next = freelists[c];
+        freelists[c] = block;
+        return;
+    }
+#endif
+
+    free(ptr);
+}
+
+/**
+ * Resize a block from pool_alloc. old_size must be the size it
+ * was allocated (or last resized) with.
+ */
+void *pool_realloc(void *ptr, size_t old_size, size_t new_size){
+    if (ptr == NULL){
+        return pool_alloc(new_size);
+    }
+
+#ifndef PY2C_NO_POOL
+    if (old_size <= POOL_MAX || new_size <= POOL_MAX){
+        // Still fits in the block that was handed out
+        if (old_size > 0 && new_size <= POOL_MAX &&
+                size_class(new_size) == size_class(old_size)){
+            return ptr;
+        }
+        void *resized = pool_alloc(new_size);
+        memcpy(resized, ptr, old_size < new_size ? old_size : new_size);
+        pool_free(ptr, old_size);
+        return resized;
+    }
+#endif
+
+    void *resized = realloc(ptr, new_size);
+    assert(resized != NULL);
+    alloc_stats.system_allocs++;
+    return resized;
+}
+
+/**
+ * Arena
+ * A bump allocator over a chain of chunks. arena_open records
+ * where the allocator currently is and arena_close rewinds to
+ * that point, releasing everything allocated in between at
+ * once. Chunks are kept around for the next scope.
+ */
+typedef struct _ArenaChunk ArenaChunk;
+struct _ArenaChunk {
+    ArenaChunk *next;
+    size_t size;
+    size_t used;
+};
+
+typedef struct {
+    ArenaChunk *chunk;
+    size_t used;
+} ArenaMark;
+
+static ArenaChunk *arena_first = NULL;
+static ArenaChunk *arena_current = NULL;
+static ArenaMark arena_marks[ARENA_MAX_DEPTH];
+static int arena_top = 0;
+
+static ArenaChunk *new_ArenaChunk(size_t size){
+    ArenaChunk *chunk = (ArenaChunk*)system_alloc(sizeof(ArenaChunk) + size);
+    chunk->next = NULL;
+    chunk->size = size;
+    chunk->used = 0;
+    return chunk;
+}
+
+void arena_open(){
+    if (!print_stats_registered){
+        register_stats();
+    }
+    assert(arena_top < ARENA_MAX_DEPTH);
+    if (arena_first == NULL){
+        arena_first = arena_current = new_ArenaChunk(ARENA_CHUNK_SIZE);
+    }
+    arena_marks[arena_top].chunk = arena_current;
+    arena_marks[arena_top].used = arena_current->used;
+    arena_top++;
+}
+
+void arena_close(){
+    assert(arena_top > 0);
+    arena_top--;
+
+    // Rewind every chunk used since the mark
+    ArenaChunk *chunk = arena_marks[arena_top].chunk;
+    chunk->used = arena_marks[arena_top].used;
+    for (chunk = chunk->next; chunk != NULL; chunk = chunk->next){
+        chunk->used = 0;
+    }
+    arena_current = arena_marks[arena_top].chunk;
+
+    alloc_stats.arena_releases++;
+}
+
+int arena_depth(){
+    return arena_top;
+}
+
+void *arena_alloc(size_t size){
+    assert(arena_top > 0);
+    size = (size + POOL_ALIGN - 1)/POOL_ALIGN*POOL_ALIGN;
+
+    // Move on to the next chunk (making one if needed) when
+    // this one is full.
+    while (arena_current->used + size > arena_current->size){
+        if (arena_current->next == NULL){
+            size_t chunk_size = size > ARENA_CHUNK_SIZE ? size : ARENA_CHUNK_SIZE;
+            arena_current->next = new_ArenaChunk(chunk_size);
+        }
+        arena_current = arena_current->next;
+    }
+
+    void *ptr = (char*)(arena_current + 1) + arena_current->used;
+    arena_current->used += size;
+    alloc_stats.arena_allocs++;
+    alloc_stats.arena_bytes += size;
+    return ptr;
+}
+
+/**
+ * Allocate the memory for an object of size bytes (at least
+ * sizeof(Object)). It comes from the arena if one is open and
+ * from the pool otherwise.
+ */
+Object *alloc_Object(size_t size){
+#if !defined(PY2C_NO_POOL) && !defined(PY2C_TRACK_ALLOCS)
+    // When tracking, objects stay out of the arena so that every
+    // one of them has to be let go of to not count as a leak.
+    if (arena_top > 0){
+        Object *obj = (Object*)arena_alloc(size);
+        obj->in_arena = 1;
+        return obj;
+    }
+#endif
+
+    return pool_alloc_Object(size);
+}
+
+/**
+ * Allocate the memory for an object of size bytes from the pool,
+ * even if an arena is open.
+ */
+Object *pool_alloc_Object(size_t size){
+    Object *obj = (Object*)pool_alloc(size);
+    obj->in_arena = 0;
+    TRACK_ALLOC(obj, size, TRACK_OBJECT);
+    return obj;
+}
+
+/**
+ * Release the memory of an object. Objects from an arena are
+ * left for arena_close to release.
+ */
+void free_Object(Object *obj){
+    if (!obj->in_arena){
+        TRACK_FREE(obj);
+        pool_free(obj, object_size(obj));
+    }
+}
+
+void print_alloc_stats(FILE *f){
+    fprintf(f, "pool allocs:    %lu\n", alloc_stats.pool_allocs);
+    fprintf(f, "pool frees:     %lu\n", alloc_stats.pool_frees);
+    fprintf(f, "pool hits:      %lu\n", alloc_stats.pool_hits);
+    fprintf(f, "system allocs:  %lu\n", alloc_stats.system_allocs);
+    fprintf(f, "arena allocs:   %lu\n", alloc_stats.arena_allocs);
+    fprintf(f, "arena releases: %lu\n", alloc_stats.arena_releases);
+    fprintf(f, "arena bytes:    %lu\n", alloc_stats.arena_bytes);
+}
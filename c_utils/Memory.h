@@ -0,0 +1,89 @@
+#ifndef __MEMORY
+#define __MEMORY
+
+#include <stdio.h>
+
+#include "Object.h"
+
+// Counters for comparing the pooled allocator against plain malloc.
+// Compile the runtime with -DPY2C_NO_POOL to send every request
+// (arena objects included) straight to malloc/free while still
+// counting them.
+typedef struct {
+	unsigned long pool_allocs;    // Requests made to pool_alloc
+	unsigned long pool_frees;     // Requests made to pool_free
+	unsigned long pool_hits;      // Allocations served by a freelist
+	unsigned long system_allocs;  // Calls to malloc/realloc
+	unsigned long arena_allocs;   // Objects placed in an arena
+	unsigned long arena_releases; // Calls to arena_close
+	unsigned long arena_bytes;    // Bytes handed out by the arena
+} AllocStats;
+
+extern AllocStats alloc_stats;
+
+// Size classed freelist allocator
+void *pool_alloc(size_t size);
+void *pool_realloc(void *ptr, size_t old_size, size_t new_size);
+void pool_free(void *ptr, size_t size);
+
+// Scope arena
+// Objects created between arena_open and the matching arena_close
+// are all released by arena_close, except for lists, dicts and sets,
+// which never go in one. Scopes may be nested.
+void arena_open();
+void arena_close();
+int arena_depth();
+void *arena_alloc(size_t size);
+
+// Objects
+Object *alloc_Object(size_t size);
+Object *pool_alloc_Object(size_t size);
+void free_Object(Object *obj);
+
+void print_alloc_stats(FILE *f);
+
+/**
+ * Create an object with extra bytes right after it in the same
+ * block, for types that store their data inline.
+ * @param  extra Number of bytes after the object
+ * @return       Object*
+ */
+static inline Object *new_Object_extra(size_t extra){
+	Object *obj;
+
+	// Allocating memory
+	obj = alloc_Object(sizeof(Object) + extra);
+	if (obj == NULL){
+		return NULL;
+	}
+
+	// Set the default parameters
+	obj->type = &ObjectType;
+	obj->refcount = 1;
+
+	return obj;
+}
+
+static inline Object *new_Object(){
+	return new_Object_extra(0);
+}
+
+/**
+ * Create an object that can be changed after it is made, like a list,
+ * with extra bytes right after it. It never comes from an arena: an
+ * arena object has to be copied out of it (see promote) to outlive it,
+ * and every reference to a mutable object must be to the same one.
+ * @param  extra Number of bytes after the object
+ * @return       Object*
+ */
+static inline Object *new_Mutable_Object_extra(size_t extra){
+	Object *obj = pool_alloc_Object(sizeof(Object) + extra);
+
+	// Set the default parameters
+	obj->type = &ObjectType;
+	obj->refcount = 1;
+
+	return obj;
+}
+
+#endif
@@ -1,93 +1,167 @@
 #include "utils.h"
 
-Object *new_Object(){
-    Object *obj;
+static void object_str(Object *obj, StrBuf *sb);
+static int object_eq(Object *obj, Object *other);
+static unsigned long object_hash(Object *obj);
 
-    // Allocating memory
-    obj = (Object *)malloc(sizeof(Object));
-    if (obj == NULL){
-        return NULL;
+const Type ObjectType = {
+    TYPE_OBJECT, "object",
+    destroy_Object, object_str, object_str, object_eq, object_hash, NULL,
+    NULL, NULL, NULL, NULL
+};
+
+void destroy_Object(Object *obj){
+    assert(obj->type == &ObjectType);
+    free_Object(obj);
+}
+
+/**
+ * Return the number of bytes taken up by an object.
+ * @param  obj Object struct
+ * @return     size_t
+ */
+size_t object_size(Object *obj){
+    if (obj->type->size == NULL){
+        return sizeof(Object);
     }
+    return obj->type->size(obj);
+}
 
-    // Set the default parameters
-    // if (name == NULL){
-    //     obj->name = NULL;
-    // }
-    // else {
-    //     int len = strlen(name);
-    //     obj->name = (char*)malloc(sizeof(char)*(len+1));
-    //     strncpy(obj->name, name, len);
-    //     *(obj->name + len) = 0;
-    // }
-    obj->name = "object";
-
-    // Initializing interface for access to functions
-    // obj->__str__ = __str__;
-
-    return obj;
+static void object_str(Object *obj, StrBuf *sb){
+    char address[32];
+    sprintf(address, "%p", (void*)obj);
+    strbuf_append_char(sb, '<');
+    strbuf_append_str(sb, obj->type->name);
+    strbuf_append_str(sb, " object at ");
+    strbuf_append_str(sb, address);
+    strbuf_append_char(sb, '>');
 }
 
-void destroy_Object(Object *obj){
-    assert(strcmp(obj->name, "object") == 0);
-    free(obj);
+static int object_eq(Object *obj, Object *other){
+    return obj == other;
 }
 
-void destroy(Object *obj){
-    if (strcmp(obj->name, "object") == 0){
-        destroy_Object(obj);
-    }
-    else if (strcmp(obj->name, "integer") == 0){
-        destroy_Integer(obj);
-    }
-    else if (strcmp(obj->name, "list") == 0){
-        destroy_List(obj);
-    }
-    else if (strcmp(obj->name, "string") == 0){
-        destroy_List(obj);
+static unsigned long object_hash(Object *obj){
+    return (unsigned long)obj;
+}
+
+/**
+ * Make sure a reference can outlive the arena scope it was made in.
+ * Objects outside any arena are returned as they are. An arena
+ * object is copied into pool memory; the reference passed in is
+ * taken over and the one returned is to the copy. Only objects that
+ * can't change are ever in an arena (see new_Mutable_Object_extra),
+ * so the copy is as good as the original.
+ * @param  obj Reference to take over
+ * @return     Reference to an object that isn't in an arena
+ */
+Object *promote(Object *obj){
+    if (!obj->in_arena){
+        return obj;
     }
-    else if (strcmp(obj->name, "char") == 0){
-        destroy_Char(obj);
+
+    size_t size = object_size(obj);
+    Object *copy = pool_alloc_Object(size);
+    memcpy(copy, obj, size);
+    copy->in_arena = 0;
+    copy->refcount = 1;
+
+    decref(obj);
+    return copy;
+}
+
+/**
+ * Return the hash of an object. Exits for unhashable types.
+ * @param  obj Object struct
+ * @return     unsigned long
+ */
+unsigned long hash(Object *obj){
+    if (obj->type->hash == NULL){
+        fprintf(stderr, "TypeError: unhashable type: '%s'\n",
+                obj->type->name);
+        exit(1);
     }
-    else {
-        free(obj);
+    return obj->type->hash(obj);
+}
+
+/**
+ * Start iterating over an object. Exits for types that can't be
+ * iterated over. The iterator holds a reference to the object until
+ * iter_release, so it can be iterated over whatever happens to the
+ * variable it came from.
+ * @param iterable Object to iterate over
+ * @param it       Iterator to set up
+ */
+void iter(Object *iterable, Iterator *it){
+    if (iterable->type->item == NULL){
+        fprintf(stderr, "TypeError: '%s' object is not iterable\n",
+                iterable->type->name);
+        exit(1);
     }
+    it->iterable = incref(iterable);
+    it->index = 0;
+    it->position = 0;
 }
 
 /**
- * Return the string representation of an object.
- * @param  obj Object struct
- * @return     char*
+ * obj[key]. Exits for types that can't be subscripted.
+ * @param  obj Object to subscript
+ * @param  key Index or key
+ * @return     New reference to the element
  */
-char *str(Object *obj){
-    if (strcmp(obj->name, "integer") == 0){
-        // Return the vlaue for an integer
-        char *str_rep = (char*)malloc(1024);
-        sprintf(str_rep, "%d", obj->value);
-        return str_rep;
+Object *getitem(Object *obj, Object *key){
+    if (obj->type->getitem == NULL){
+        fprintf(stderr, "TypeError: '%s' object has no attribute "
+                "'__getitem__'\n", obj->type->name);
+        exit(1);
     }
-    else if (strcmp(obj->name, "list") == 0){
-        return list_str(obj);
+    return obj->type->getitem(obj, key);
+}
+
+/**
+ * obj[key] = value, or del obj[key] if value is NULL. Exits for
+ * types that don't support item assignment.
+ * @param obj   Object to store in
+ * @param key   Index or key
+ * @param value Value to store (obj takes its own reference), or NULL
+ */
+void setitem(Object *obj, Object *key, Object *value){
+    if (obj->type->setitem == NULL){
+        fprintf(stderr, "TypeError: '%s' object %s\n", obj->type->name,
+                value == NULL ? "doesn't support item deletion"
+                              : "does not support item assignment");
+        exit(1);
     }
-    else if (strcmp(obj->name, "char") == 0){
-        char *str_rep = (char*)malloc(2);
-        sprintf(str_rep, "%c", obj->value);
-        return str_rep;
+    obj->type->setitem(obj, key, value);
+}
+
+/**
+ * Check if elem is in obj. Types without a faster way are iterated
+ * over, comparing each element to elem.
+ * @param  obj  Container
+ * @param  elem Element to look for
+ * @return      1 if it is there, 0 otherwise
+ */
+int contains(Object *obj, Object *elem){
+    if (obj->type->contains != NULL){
+        return obj->type->contains(obj, elem);
     }
-    else if (strcmp(obj->name, "string") == 0){
-        int i;
-        char *str_rep = (char*)malloc(sizeof(char)*(obj->length + 1));
-        for (i = 0; i < obj->length; i++){
-            Object *c = list_get(obj, i);
-            char *c_str = str(c);
-            strncpy(str_rep+i, c_str, 1);
-            free(c_str);
-        }
-        *(str_rep + obj->length) = 0;
-        return str_rep;
+    if (obj->type->item == NULL){
+        fprintf(stderr, "TypeError: argument of type '%s' is not iterable\n",
+                obj->type->name);
+        exit(1);
     }
 
-    // Return the name by default
-    return dynamic_str(obj->name);
+    Iterator it;
+    Object *other;
+    int found = 0;
+    iter(obj, &it);
+    while (!found && (other = next(&it)) != NULL){
+        found = other == elem || eq(other, elem);
+        decref(other);
+    }
+    iter_release(&it);
+    return found;
 }
 
 /**
@@ -99,4 +173,4 @@ char *id(Object *obj){
     char *id_ = (char*)malloc(1024);
     sprintf(id_, "%p", obj);
     return id_; 
-}
\ No newline at end of file
+}
@@ -1,31 +1,282 @@
 #ifndef __OBJECT
 #define __OBJECT
 
+#include <assert.h>
+#include <stddef.h>
+
+#include "StrBuf.h"
+
 typedef struct _Object Object;
-typedef struct _Node Node;
+typedef struct _Type Type;
+typedef struct _Iterator Iterator;
+
+// Tags for every type in the runtime.
+typedef enum {
+	TYPE_OBJECT,
+	TYPE_INTEGER,
+	TYPE_FLOAT,
+	TYPE_CHAR,
+	TYPE_LIST,
+	TYPE_STRING,
+	TYPE_RANGE,
+	TYPE_DICT,
+	TYPE_SET
+} TypeTag;
+
+// Type descriptor shared by every object of a type.
+// Each runtime type defines one static instance of this
+// and the generic functions below dispatch through it.
+struct _Type {
+	TypeTag tag;
+	char *name;
 
-struct _Node {
-	Object *data;
-	Node *next;
+	void (*destroy)(Object *obj);
+	void (*str)(Object *obj, StrBuf *sb);  // Write str(obj) to sb
+	void (*repr)(Object *obj, StrBuf *sb); // Write repr(obj) to sb
+	int (*eq)(Object *obj, Object *other);
+	unsigned long (*hash)(Object *obj); // NULL if unhashable
+
+	// Number of bytes the object and its inline data take up.
+	// NULL if the object is just sizeof(Object).
+	size_t (*size)(Object *obj);
+
+	// Element at it->index of the object being iterated over, as a
+	// new reference (see next). NULL if the type isn't iterable.
+	Object *(*item)(Iterator *it);
+
+	// obj[key] as a new reference (see getitem).
+	// NULL if the type can't be subscripted.
+	Object *(*getitem)(Object *obj, Object *key);
+	// obj[key] = value, or del obj[key] if value is NULL (see
+	// setitem). NULL if the type doesn't support item assignment.
+	void (*setitem)(Object *obj, Object *key, Object *value);
+	// 1 if elem is in obj, 0 otherwise (see contains).
+	// NULL to look for it by iterating over obj.
+	int (*contains)(Object *obj, Object *elem);
 };
 
 struct _Object {
 	// Default values of object.
 	// These will always exist for every object.
-	char *name;
-	int value;
+	const Type *type;
+	unsigned int refcount; // Owners of the object (see incref/decref)
+	long value; // Value of chars and integers (see Integer.h)
+	double fvalue; // Value of floats
+	unsigned char in_arena; // Released by arena_close, not free_Object
 
 	// List attributes
+	// items is a contiguous array holding capacity slots,
+	// the first length of which are in use.
 	unsigned int length;
-	Node *head;
-	Node *tail;
+	unsigned int capacity;
+	Object **items;
+
+	// Range attributes
+	// The elements are never stored; they are computed from
+	// these on demand and length holds the number of elements.
+	long start;
+	long stop;
+	long step;
+
+	// Integer attributes
+	// An integer too big for value keeps its magnitude right after
+	// the object (see integer_limbs) and length holds the number of
+	// limbs. length is 0 for every other integer.
+
+	// String attributes
+	// The bytes of a string are stored right after the object
+	// in the same block (see string_chars) and length holds
+	// the number of bytes. hash_value is 0 until the hash is
+	// first computed.
+	unsigned long hash_value;
+
+	// Dict and set attributes
+	// The hash table is kept right after the object (see Table.h)
+	// and length holds the number of keys.
 };
 
-Object *new_Object();
+// Iterators
+// An iterator walks the storage of whatever it iterates over with a
+// cursor, so going through every element is O(n) whatever the type.
+// They live wherever the loop using them does, usually on the stack:
+//     Iterator it;
+//     iter(obj, &it);
+//     while ((elem = next(&it)) != NULL){ ...; decref(elem); }
+//     iter_release(&it);
+struct _Iterator {
+	Object *iterable; // Reference to what is iterated over
+	unsigned int index; // Position of the next element
+	// Where in its storage the next element is, for types whose
+	// storage can have gaps in it (see Table.h)
+	unsigned int position;
+};
+
+extern const Type ObjectType;
+
 void destroy_Object(Object *obj);
-void destroy(Object *obj);
+size_t object_size(Object *obj);
+
+// References
+Object *promote(Object *obj);
 
-char *str(Object *obj);
+unsigned long hash(Object *obj);
 char *id(Object *obj);
 
-#endif
\ No newline at end of file
+// Iteration
+void iter(Object *iterable, Iterator *it);
+
+// Subscripts and membership
+Object *getitem(Object *obj, Object *key);
+void setitem(Object *obj, Object *key, Object *value);
+int contains(Object *obj, Object *elem);
+
+// The accessors generated code calls the most are defined here,
+// static inline, so they can be inlined into it without LTO.
+/**
+ * Free an object right away, whatever else refers to it.
+ * Owners should let go of objects with decref instead.
+ * @param obj Object struct
+ */
+static inline void destroy(Object *obj){
+	obj->type->destroy(obj);
+}
+
+/**
+ * Take a reference to an object. A new object starts with one
+ * reference, owned by whoever created it.
+ * @param  obj Object struct
+ * @return     obj
+ */
+static inline Object *incref(Object *obj){
+	obj->refcount++;
+	return obj;
+}
+
+/**
+ * Let go of a reference to an object, destroying it when it
+ * was the last one.
+ * @param obj Object struct
+ */
+static inline void decref(Object *obj){
+	assert(obj->refcount > 0);
+	if (--obj->refcount == 0){
+		destroy(obj);
+	}
+}
+
+/**
+ * Let go of a reference that may be NULL, like the variable of a
+ * loop that never ran.
+ * @param obj Object struct or NULL
+ */
+static inline void xdecref(Object *obj){
+	if (obj != NULL){
+		decref(obj);
+	}
+}
+
+/**
+ * Store a reference in a slot (like a variable), letting go of the
+ * one it held, if any. value is taken over, not incref'd, and the old
+ * value is only let go of after the store so value may be the old value.
+ * @param slot  Where the reference is stored
+ * @param value Reference to store
+ */
+static inline void set_ref(Object **slot, Object *value){
+	Object *old = *slot;
+	*slot = value;
+	xdecref(old);
+}
+
+/**
+ * Write the string representation of an object to a StrBuf.
+ * @param obj Object struct
+ * @param sb  StrBuf to append to
+ */
+static inline void write_str(Object *obj, StrBuf *sb){
+	obj->type->str(obj, sb);
+}
+
+/**
+ * Write the representation of an object as it would appear
+ * inside a container (strings are quoted) to a StrBuf.
+ * @param obj Object struct
+ * @param sb  StrBuf to append to
+ */
+static inline void write_repr(Object *obj, StrBuf *sb){
+	obj->type->repr(obj, sb);
+}
+
+/**
+ * Return the string representation of an object.
+ * @param  obj Object struct
+ * @return     char* (free it when done)
+ */
+static inline char *str(Object *obj){
+	StrBuf sb;
+	strbuf_init(&sb, 0);
+	write_str(obj, &sb);
+	return strbuf_detach(&sb);
+}
+
+/**
+ * Return the representation of an object as it would
+ * appear inside a container (strings are quoted).
+ * @param  obj Object struct
+ * @return     char* (free it when done)
+ */
+static inline char *repr(Object *obj){
+	StrBuf sb;
+	strbuf_init(&sb, 0);
+	write_repr(obj, &sb);
+	return strbuf_detach(&sb);
+}
+
+/**
+ * Check if two objects are equal.
+ * @param  obj   Object struct
+ * @param  other Object struct
+ * @return       1 if equal, 0 otherwise
+ */
+static inline int eq(Object *obj, Object *other){
+	return obj->type->eq(obj, other);
+}
+
+/**
+ * Check if an iterator has elements left. The length is looked at
+ * each time, so elements appended to a list while it is iterated
+ * over are reached too, like in python.
+ * @param  it Iterator set up with iter
+ * @return    1 if next has an element to return, 0 otherwise
+ */
+static inline int iter_has_next(Iterator *it){
+	return it->index < it->iterable->length;
+}
+
+/**
+ * Step an iterator along.
+ * @param  it Iterator set up with iter
+ * @return    New reference to the next element (decref it when
+ *            done), or NULL once there are none left
+ */
+static inline Object *next(Iterator *it){
+	if (!iter_has_next(it)){
+		return NULL;
+	}
+	Object *elem = it->iterable->type->item(it);
+	it->index++;
+	return elem;
+}
+
+/**
+ * Let go of what an iterator iterates over once done with it.
+ * @param it Iterator set up with iter
+ */
+static inline void iter_release(Iterator *it){
+	decref(it->iterable);
+}
+
+// The constructors (new_Object) are with the allocator
+#include "Memory.h"
+
+#endif
@@ -0,0 +1,195 @@
+#include "utils.h"
+#include <unistd.h>
+
+// Write the buffer out once this much is in it, leaving the rest
+// of it for the line that got it there.
+#define OUTPUT_FLUSH_SIZE (OUTPUT_BUFFER_SIZE - 4096)
+
+static StrBuf output;
+static size_t line_start = 0; // Where the line being written starts
+static int line_buffered = 0;
+
+static void output_close();
+
+static void output_start(){
+    strbuf_init(&output, OUTPUT_BUFFER_SIZE);
+    line_buffered = isatty(fileno(stdout));
+    atexit(output_close);
+}
+
+/**
+ * Write everything in the buffer to stdout.
+ */
+void output_flush(){
+    if (output.length == 0){
+        return;
+    }
+    fwrite(output.chars, 1, output.length, stdout);
+    fflush(stdout);
+    strbuf_clear(&output);
+    line_start = 0;
+}
+
+/**
+ * Write out what is left at exit and let go of the buffer.
+ * This runs before the allocation report, which is registered
+ * earlier, so the buffer doesn't show up in it as live.
+ */
+static void output_close(){
+    output_flush();
+    strbuf_free(&output);
+    line_start = 0;
+}
+
+/**
+ * Drop what was written of a line that won't be finished, like
+ * when an error stops the program halfway through a print.
+ * python never prints any of a line it fails to work out.
+ */
+void output_discard_line(){
+    if (output.chars != NULL){
+        output.length = line_start;
+        output.chars[line_start] = 0;
+    }
+}
+
+/**
+ * Finish a line of output, writing the buffer out if it is full
+ * (or after every line on a terminal).
+ */
+static void output_end_line(){
+    strbuf_append_char(&output, '\n');
+    line_start = output.length;
+    if (line_buffered || output.length >= OUTPUT_FLUSH_SIZE){
+        output_flush();
+    }
+}
+
+/**
+ * Write bytes as they are.
+ * @param chars  Bytes to write
+ * @param length Number of bytes
+ */
+void out_write(const char *chars, size_t length){
+    if (output.chars == NULL){
+        output_start();
+    }
+    strbuf_append(&output, chars, length);
+}
+
+/**
+ * Write an integer in decimal.
+ */
+void out_int(long i){
+    if (output.chars == NULL){
+        output_start();
+    }
+    strbuf_append_int(&output, i);
+}
+
+/**
+ * Write a truth value the way python shows a bool.
+ */
+void out_bool(int b){
+    if (b){
+        out_write("True", 4);
+    }
+    else {
+        out_write("False", 5);
+    }
+}
+
+/**
+ * Write a double the way str() shows it.
+ */
+void out_double(double d){
+    if (output.chars == NULL){
+        output_start();
+    }
+    strbuf_append_double(&output, d);
+}
+
+/**
+ * Write a double the way repr() (and so a container) shows it.
+ */
+void out_double_repr(double d){
+    if (output.chars == NULL){
+        output_start();
+    }
+    strbuf_append_double_repr(&output, d);
+}
+
+/**
+ * Write str() of an object, straight into the buffer.
+ */
+void out_str(Object *obj){
+    if (output.chars == NULL){
+        output_start();
+    }
+    write_str(obj, &output);
+}
+
+/**
+ * Write repr() of an object, straight into the buffer.
+ */
+void out_repr(Object *obj){
+    if (output.chars == NULL){
+        output_start();
+    }
+    write_repr(obj, &output);
+}
+
+/**
+ * Write repr() of an object that was made just to be written, like
+ * the result of an expression, and let go of it.
+ */
+void out_repr_new(Object *obj){
+    out_repr(obj);
+    decref(obj);
+}
+
+/**
+ * Print bytes known when the program was translated, like a string
+ * literal, followed by a newline.
+ * @param chars  Bytes to print
+ * @param length Number of bytes
+ */
+void print_literal(const char *chars, size_t length){
+    out_write(chars, length);
+    output_end_line();
+}
+
+void print_int(long i){
+    out_int(i);
+    output_end_line();
+}
+
+void print_bool(int b){
+    out_bool(b);
+    output_end_line();
+}
+
+/**
+ * Print a double the way python prints a float.
+ */
+void print_double(double d){
+    out_double(d);
+    output_end_line();
+}
+
+/**
+ * Print the string representation of an object.
+ */
+void print_object(Object *obj){
+    out_str(obj);
+    output_end_line();
+}
+
+/**
+ * Print an object that was made just to be printed, like the result
+ * of an expression, and let go of it.
+ */
+void print_object_new(Object *obj){
+    print_object(obj);
+    decref(obj);
+}
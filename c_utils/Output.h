@@ -0,0 +1,37 @@
+#ifndef __OUTPUT
+#define __OUTPUT
+
+#include "Object.h"
+
+// Buffered standard output
+// Everything a program prints is formatted straight into one large
+// buffer, which goes to stdout in one write when it fills up and at
+// exit instead of through stdio a line at a time. When stdout is a
+// terminal it is written out after every line instead, like python.
+#define OUTPUT_BUFFER_SIZE (64*1024)
+
+void output_flush();
+void output_discard_line();
+
+// Writers
+// These append to the buffer without writing it out.
+void out_write(const char *chars, size_t length);
+void out_int(long i);
+void out_bool(int b);
+void out_double(double d);
+void out_double_repr(double d);
+void out_str(Object *obj);
+void out_repr(Object *obj);
+void out_repr_new(Object *obj);
+
+// print() of a value
+// These write the value and a newline, then write the buffer out if
+// it is full.
+void print_literal(const char *chars, size_t length);
+void print_int(long i);
+void print_bool(int b);
+void print_double(double d);
+void print_object(Object *obj);
+void print_object_new(Object *obj);
+
+#endif
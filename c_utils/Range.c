@@ -0,0 +1,112 @@
+#include "utils.h"
+
+static int range_eq(Object *range, Object *other);
+static unsigned long range_hash(Object *range);
+static Object *range_item(Iterator *it);
+
+const Type RangeType = {
+    TYPE_RANGE, "range",
+    destroy_Range, range_str, range_str, range_eq, range_hash, NULL,
+    range_item, NULL, NULL, NULL
+};
+
+/**
+ * Create a lazy range. Unlike range(), no elements are
+ * allocated up front; each one is computed when asked for,
+ * so the memory used does not depend on the number of elements.
+ * @param  start First value
+ * @param  stop  Value to stop before
+ * @param  step  Difference between consecutive values (non-zero)
+ * @return       Range object
+ */
+Object *new_Range(long start, long stop, long step){
+    assert(step != 0);
+
+    // Intiialize object
+    Object *range = new_Object();
+
+    // Set default values
+    range->type = &RangeType;
+
+    // Set range values
+    range->start = start;
+    range->stop = stop;
+    range->step = step;
+
+    // Same element count python uses, for either sign of step.
+    // The span is worked out unsigned since it may not fit in a long.
+    if (step > 0 && start < stop){
+        range->length = ((unsigned long)stop - (unsigned long)start - 1)/
+            (unsigned long)step + 1;
+    }
+    else if (step < 0 && start > stop){
+        range->length = ((unsigned long)start - (unsigned long)stop - 1)/
+            (0UL - (unsigned long)step) + 1;
+    }
+    else {
+        range->length = 0;
+    }
+
+    return range;
+}
+
+void destroy_Range(Object *range){
+    assert(range->type == &RangeType);
+    free_Object(range);
+}
+
+/**
+ * Get the ith element of the range as a new Integer.
+ * Unlike list_get, this is a new object that must be
+ * decref'd by the caller.
+ * @param  range Range to index
+ * @param  i     Index
+ * @return       Pointer to a new Integer
+ */
+Object *range_get(Object *range, unsigned int i){
+    return new_Integer(range_value(range, i));
+}
+
+static Object *range_item(Iterator *it){
+    return new_Integer(range_value(it->iterable, it->index));
+}
+
+void range_str(Object *range, StrBuf *sb){
+    strbuf_append_str(sb, "range(");
+    strbuf_append_int(sb, range->start);
+    strbuf_append_str(sb, ", ");
+    strbuf_append_int(sb, range->stop);
+    if (range->step != 1){
+        strbuf_append_str(sb, ", ");
+        strbuf_append_int(sb, range->step);
+    }
+    strbuf_append_char(sb, ')');
+}
+
+/**
+ * Ranges are equal if they produce the same elements,
+ * like in python.
+ */
+static int range_eq(Object *range, Object *other){
+    if (other->type != &RangeType || range->length != other->length){
+        return 0;
+    }
+    if (range->length == 0){
+        return 1;
+    }
+    if (range->start != other->start){
+        return 0;
+    }
+    return range->length == 1 || range->step == other->step;
+}
+
+static unsigned long range_hash(Object *range){
+    unsigned long h = range->length;
+    if (range->length > 0){
+        h = h*1000003UL ^ (unsigned long)range->start;
+    }
+    if (range->length > 1){
+        h = h*1000003UL ^ (unsigned long)range->step;
+    }
+    return h;
+}
@@ -0,0 +1,47 @@
+#ifndef __RANGE
+#define __RANGE
+
+#include <limits.h>
+
+#include "Object.h"
+
+extern const Type RangeType;
+
+// Range general
+Object *new_Range(long start, long stop, long step);
+void destroy_Range(Object *range);
+void range_str(Object *range, StrBuf *sb);
+
+// Range getters
+Object *range_get(Object *range, unsigned int i);
+
+/**
+ * Get the value of the ith element of the range.
+ * @param  range Range to index
+ * @param  i     Index
+ * @return       long
+ */
+static inline long range_value(Object *range, unsigned int i){
+	assert(i < range->length);
+	// The value always fits, but i*step on its own may not
+	return (long)((unsigned long)range->start +
+	              (unsigned long)i*(unsigned long)range->step);
+}
+
+/**
+ * Step the counter of a native range() loop. A step past the end of
+ * a long is past the stop of any range, so it saturates there instead
+ * of wrapping around, and the loop condition ends the loop.
+ * @param  i    Counter
+ * @param  step Step of the range (non-zero)
+ * @return      long
+ */
+static inline long range_step(long i, long step){
+	long next;
+	if (__builtin_add_overflow(i, step, &next)){
+		return step > 0 ? LONG_MAX : LONG_MIN;
+	}
+	return next;
+}
+
+#endif
@@ -0,0 +1,105 @@
+#include "utils.h"
+
+#include <stdarg.h>
+
+const Type SetType = {
+    TYPE_SET, "set",
+    destroy_Set, set_str, set_str, table_eq, NULL, table_size,
+    table_item, NULL, NULL, set_contains
+};
+
+Object *new_Set(){
+    // Intiialize object with room for the table
+    Object *set = new_Mutable_Object_extra(sizeof(Table));
+
+    // Set default values
+    set->type = &SetType;
+
+    // Set set values
+    table_init(set);
+
+    return set;
+}
+
+/**
+ * Create a set of the n objects passed after n, like a set literal.
+ * The caller's reference to each of them is handed over to the set.
+ * @param  n Number of elements
+ * @return   Set object
+ */
+Object *new_Set_of(unsigned int n, ...){
+    Object *set = new_Set();
+
+    va_list elems;
+    va_start(elems, n);
+    unsigned int i;
+    for (i = 0; i < n; i++){
+        Object *elem = va_arg(elems, Object*);
+        set_add(set, elem);
+        decref(elem);
+    }
+    va_end(elems);
+
+    return set;
+}
+
+void destroy_Set(Object *set){
+    assert(set->type == &SetType);
+    table_clear(set);
+    free_Object(set);
+}
+
+/**
+ * Add an element to the set if it isn't in it yet.
+ * The set takes its own reference to the element.
+ * @param set  Set to add to
+ * @param elem Element to add
+ */
+void set_add(Object *set, Object *elem){
+    table_insert(set, elem);
+}
+
+/**
+ * Remove an element from the set.
+ * @param  set  Set to remove from
+ * @param  elem Element to remove
+ * @return      1 if the element was there, 0 otherwise
+ */
+int set_remove(Object *set, Object *elem){
+    return table_remove(set, elem);
+}
+
+/**
+ * Check if an element is in the set.
+ * @param  set  Set to look in
+ * @param  elem Element to look for
+ * @return      1 if it is there, 0 otherwise
+ */
+int set_contains(Object *set, Object *elem){
+    return table_lookup(set, elem) != NULL;
+}
+
+/**
+ * Write the elements of the set the way python 2 shows them to a
+ * StrBuf, as set([...]).
+ */
+void set_str(Object *set, StrBuf *sb){
+    strbuf_append(sb, "set([", 5);
+
+    Table *table = table_of(set);
+    int first = 1;
+    unsigned int i;
+    for (i = 0; i < table->used; i++){
+        TableEntry *entry = &table->entries[i];
+        if (entry->key == NULL){
+            continue;
+        }
+        if (!first){
+            strbuf_append(sb, ", ", 2);
+        }
+        first = 0;
+        write_repr(entry->key, sb);
+    }
+
+    strbuf_append(sb, "])", 2);
+}
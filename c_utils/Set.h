@@ -0,0 +1,23 @@
+#ifndef __SET
+#define __SET
+
+#include "Object.h"
+#include "Table.h"
+
+extern const Type SetType;
+
+// Set general
+// Elements are kept in the order they were first added (see Table.h).
+Object *new_Set();
+Object *new_Set_of(unsigned int n, ...);
+void destroy_Set(Object *set);
+void set_str(Object *set, StrBuf *sb);
+
+// Set setters
+void set_add(Object *set, Object *elem);
+int set_remove(Object *set, Object *elem);
+
+// Set getters
+int set_contains(Object *set, Object *elem);
+
+#endif
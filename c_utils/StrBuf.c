@@ -0,0 +1,186 @@
+#include "utils.h"
+
+#define STRBUF_MIN_CAPACITY 16
+
+void strbuf_init(StrBuf *sb, size_t capacity){
+    if (capacity < STRBUF_MIN_CAPACITY){
+        capacity = STRBUF_MIN_CAPACITY;
+    }
+    sb->chars = (char*)malloc(capacity);
+    assert(sb->chars != NULL);
+    TRACK_ALLOC(sb->chars, capacity, TRACK_STRBUF);
+    sb->chars[0] = 0;
+    sb->length = 0;
+    sb->capacity = capacity;
+}
+
+void strbuf_free(StrBuf *sb){
+    TRACK_FREE(sb->chars);
+    free(sb->chars);
+    sb->chars = NULL;
+    sb->length = sb->capacity = 0;
+}
+
+/**
+ * Empty the buffer but keep its memory for reuse.
+ */
+void strbuf_clear(StrBuf *sb){
+    sb->length = 0;
+    sb->chars[0] = 0;
+}
+
+/**
+ * Hand the contents over to the caller, who must free them.
+ * The buffer must be initialized again before it is reused.
+ * @param  sb StrBuf
+ * @return    char*
+ */
+char *strbuf_detach(StrBuf *sb){
+    char *chars = sb->chars;
+    // The caller frees it with free(), so stop accounting for it here
+    TRACK_FREE(chars);
+    sb->chars = NULL;
+    sb->length = sb->capacity = 0;
+    return chars;
+}
+
+/**
+ * Make sure there is room for extra more bytes (plus the
+ * null terminator).
+ */
+void strbuf_reserve(StrBuf *sb, size_t extra){
+    size_t needed = sb->length + extra + 1;
+    if (needed <= sb->capacity){
+        return;
+    }
+
+    size_t capacity = sb->capacity*2;
+    if (capacity < needed){
+        capacity = needed;
+    }
+    TRACK_FREE(sb->chars);
+    sb->chars = (char*)realloc(sb->chars, capacity);
+    assert(sb->chars != NULL);
+    TRACK_ALLOC(sb->chars, capacity, TRACK_STRBUF);
+    sb->capacity = capacity;
+}
+
+void strbuf_append(StrBuf *sb, const char *chars, size_t length){
+    strbuf_reserve(sb, length);
+    memcpy(sb->chars + sb->length, chars, length);
+    sb->length += length;
+    sb->chars[sb->length] = 0;
+}
+
+void strbuf_append_str(StrBuf *sb, const char *chars){
+    strbuf_append(sb, chars, strlen(chars));
+}
+
+void strbuf_append_char(StrBuf *sb, char c){
+    strbuf_reserve(sb, 1);
+    sb->chars[sb->length++] = c;
+    sb->chars[sb->length] = 0;
+}
+
+/**
+ * Write the decimal representation of i.
+ */
+void strbuf_append_int(StrBuf *sb, long i){
+    // Enough for the digits of a 64 bit number and a sign
+    char digits[24];
+    char *end = digits + sizeof(digits);
+    char *start = end;
+
+    // Work with the magnitude as unsigned so LONG_MIN works too
+    unsigned long magnitude = i < 0 ? -(unsigned long)i : (unsigned long)i;
+    do {
+        *--start = '0' + magnitude % 10;
+        magnitude /= 10;
+    } while (magnitude);
+    if (i < 0){
+        *--start = '-';
+    }
+
+    strbuf_append(sb, start, end - start);
+}
+
+/**
+ * Write d with the given number of significant digits the way python
+ * 2.7 does. Unlike %g it switches to an exponent once the exponent
+ * reaches max_exponent, and gives whole numbers a trailing .0.
+ */
+static void append_double_digits(StrBuf *sb, double d, int precision,
+                                 int max_exponent){
+    char digits[32];
+    int length = sprintf(digits, "%.*e", precision - 1, d);
+    char *e = strchr(digits, 'e');
+    int exponent = atoi(e + 1);
+
+    if (exponent < -4 || exponent >= max_exponent){
+        // Drop the trailing zeros of the mantissa, and its point
+        char *end = e;
+        while (end[-1] == '0'){
+            end--;
+        }
+        if (end[-1] == '.'){
+            end--;
+        }
+        strbuf_append(sb, digits, end - digits);
+        strbuf_append(sb, e, digits + length - e);
+        return;
+    }
+
+    length = sprintf(digits, "%.*f", precision - 1 - exponent, d);
+    if (strchr(digits, '.') != NULL){
+        while (digits[length - 1] == '0'){
+            length--;
+        }
+        if (digits[length - 1] == '.'){
+            length--;
+        }
+    }
+    digits[length] = 0;
+    strbuf_append(sb, digits, length);
+    if (strchr(digits, '.') == NULL){
+        strbuf_append(sb, ".0", 2);
+    }
+}
+
+/**
+ * Write a double the way python 2 prints a float: 12 significant
+ * digits, with a trailing .0 if it would otherwise look like an int.
+ */
+void strbuf_append_double(StrBuf *sb, double d){
+    if (d != d){
+        strbuf_append(sb, "nan", 3); // python never prints a sign for nan
+        return;
+    }
+    if (d - d != 0){
+        strbuf_append(sb, d < 0 ? "-inf" : "inf", d < 0 ? 4 : 3);
+        return;
+    }
+
+    append_double_digits(sb, d, 12, 11);
+}
+
+/**
+ * Write the shortest digits that read back as the same double,
+ * which is how python 2.7 shows floats inside containers.
+ */
+void strbuf_append_double_repr(StrBuf *sb, double d){
+    if (d != d || d - d != 0){
+        // nan and inf are written the same way either way
+        strbuf_append_double(sb, d);
+        return;
+    }
+
+    char digits[32];
+    int precision;
+    for (precision = 1; precision < 17; precision++){
+        sprintf(digits, "%.*e", precision - 1, d);
+        if (strtod(digits, NULL) == d){
+            break;
+        }
+    }
+    append_double_digits(sb, d, precision, 16);
+}
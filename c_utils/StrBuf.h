@@ -0,0 +1,29 @@
+#ifndef __STRBUF
+#define __STRBUF
+
+#include <stddef.h>
+
+// Growable char buffer that str/repr implementations write into.
+// The capacity doubles when it runs out so building a string of
+// n bytes is O(n) however many writes it takes.
+typedef struct {
+	char *chars;      // Always null terminated once anything is written
+	size_t length;
+	size_t capacity;
+} StrBuf;
+
+void strbuf_init(StrBuf *sb, size_t capacity);
+void strbuf_free(StrBuf *sb);
+void strbuf_clear(StrBuf *sb);
+char *strbuf_detach(StrBuf *sb);
+
+// Writers
+void strbuf_reserve(StrBuf *sb, size_t extra);
+void strbuf_append(StrBuf *sb, const char *chars, size_t length);
+void strbuf_append_str(StrBuf *sb, const char *chars);
+void strbuf_append_char(StrBuf *sb, char c);
+void strbuf_append_int(StrBuf *sb, long i);
+void strbuf_append_double(StrBuf *sb, double d);
+void strbuf_append_double_repr(StrBuf *sb, double d);
+
+#endif
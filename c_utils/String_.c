@@ -1,20 +1,210 @@
 #include "utils.h"
 
-Object *new_String(char *base){
-    // Intiialize object
-    Object *string = new_List();
+static void string_str(Object *string, StrBuf *sb);
+static void string_repr(Object *string, StrBuf *sb);
+static int string_eq(Object *string, Object *other);
+static unsigned long string_hash(Object *string);
+static size_t string_size(Object *string);
+static Object *string_item(Iterator *it);
+static Object *string_getitem(Object *string, Object *key);
+static int string_contains(Object *string, Object *elem);
+
+const Type StringType = {
+    TYPE_STRING, "string",
+    destroy_String, string_str, string_repr, string_eq, string_hash,
+    string_size, string_item, string_getitem, NULL, string_contains
+};
+
+/**
+ * Create an immutable string holding a copy of the bytes
+ * of base. The object and the bytes share one allocation.
+ * Like python 2 strs, the length and indices are in bytes,
+ * so UTF-8 text is stored as is.
+ * @param  base   Bytes to copy
+ * @param  length Number of bytes
+ * @return        String object
+ */
+Object *new_String_from(const char *base, unsigned int length){
+    // Intiialize object with room for the bytes and a null terminator
+    Object *string = new_Object_extra(length + 1);
 
     // Set default values
-    string->name = "string";
+    string->type = &StringType;
 
-    // Set list values
-    int i;
-    int len = strlen(base);
-    for (i = 0; i < len; i++){
-        Object *c = new_Char(*(base + i));
-        list_append(string, c);
-        destroy(c);
-    }
+    // Set string values
+    string->length = length;
+    string->hash_value = 0;
+    memcpy(string_chars(string), base, length);
+    string_chars(string)[length] = 0;
 
     return string;
-}
\ No newline at end of file
+}
+
+Object *new_String(char *base){
+    return new_String_from(base, strlen(base));
+}
+
+void destroy_String(Object *string){
+    assert(string->type == &StringType);
+    free_Object(string);
+}
+
+/**
+ * Get the ith byte of the string as a new Char.
+ * This is a new object that must be decref'd by the caller.
+ * @param  string String to index
+ * @param  i      Index
+ * @return        Pointer to a new Char
+ */
+Object *string_get(Object *string, unsigned int i){
+    return new_Char(string_char_at(string, i));
+}
+
+static Object *string_item(Iterator *it){
+    return new_Char(string_chars(it->iterable)[it->index]);
+}
+
+/**
+ * string[key], as a new Char.
+ */
+static Object *string_getitem(Object *string, Object *key){
+    unsigned int i;
+    if (key->type != &IntegerType){
+        output_discard_line();
+        fprintf(stderr, "TypeError: string indices must be integers, "
+                "not %s\n", key->type->name);
+        exit(1);
+    }
+    if (!integer_index(key, string->length, &i)){
+        output_discard_line();
+        fprintf(stderr, "IndexError: string index out of range\n");
+        exit(1);
+    }
+    return new_Char(string_chars(string)[i]);
+}
+
+/**
+ * Check if elem (a string or a char) is a substring of the string.
+ */
+static int string_contains(Object *string, Object *elem){
+    const char *needle;
+    unsigned int length;
+    char c;
+    if (elem->type == &StringType){
+        needle = string_chars(elem);
+        length = elem->length;
+    }
+    else if (elem->type == &CharType){
+        c = (char)elem->value;
+        needle = &c;
+        length = 1;
+    }
+    else {
+        output_discard_line();
+        fprintf(stderr, "TypeError: 'in <string>' requires string as left "
+                "operand, not %s\n", elem->type->name);
+        exit(1);
+    }
+
+    const char *chars = string_chars(string);
+    unsigned int i;
+    for (i = 0; i + length <= string->length; i++){
+        if (memcmp(chars + i, needle, length) == 0){
+            return 1;
+        }
+    }
+    return 0;
+}
+
+static void string_str(Object *string, StrBuf *sb){
+    strbuf_append(sb, string_chars(string), string->length);
+}
+
+/**
+ * Write the string quoted and escaped the way python 2 does.
+ */
+static void string_repr(Object *string, StrBuf *sb){
+    char *chars = string_chars(string);
+    char quote = '\'';
+    if (memchr(chars, '\'', string->length) != NULL &&
+            memchr(chars, '"', string->length) == NULL){
+        quote = '"';
+    }
+
+    strbuf_reserve(sb, string->length + 2);
+    strbuf_append_char(sb, quote);
+
+    unsigned int i;
+    for (i = 0; i < string->length; i++){
+        unsigned char c = chars[i];
+        if (c == quote || c == '\\'){
+            strbuf_append_char(sb, '\\');
+            strbuf_append_char(sb, c);
+        }
+        else if (c == '\n'){
+            strbuf_append(sb, "\\n", 2);
+        }
+        else if (c == '\t'){
+            strbuf_append(sb, "\\t", 2);
+        }
+        else if (c == '\r'){
+            strbuf_append(sb, "\\r", 2);
+        }
+        else if (c < ' ' || c >= 0x7f){
+            char escape[5];
+            sprintf(escape, "\\x%02x", c);
+            strbuf_append(sb, escape, 4);
+        }
+        else {
+            strbuf_append_char(sb, c);
+        }
+    }
+
+    strbuf_append_char(sb, quote);
+}
+
+static int string_eq(Object *string, Object *other){
+    if (other->type == &CharType){
+        return string->length == 1 && string_chars(string)[0] == other->value;
+    }
+    if (other->type != &StringType || string->length != other->length){
+        return 0;
+    }
+    if (string->hash_value && other->hash_value &&
+            string->hash_value != other->hash_value){
+        return 0;
+    }
+    return memcmp(string_chars(string), string_chars(other),
+                  string->length) == 0;
+}
+
+/**
+ * Hash bytes the way strings are hashed, so a char hashes like the
+ * string of just that char.
+ * @param  chars  Bytes to hash
+ * @param  length Number of bytes
+ * @return        Hash, never 0
+ */
+unsigned long hash_bytes(const char *chars, unsigned int length){
+    // FNV-1a over the bytes
+    unsigned long h = 14695981039346656037UL;
+    unsigned int i;
+    for (i = 0; i < length; i++){
+        h ^= (unsigned char)chars[i];
+        h *= 1099511628211UL;
+    }
+
+    // 0 means the hash of a string has not been computed yet
+    return h ? h : 1;
+}
+
+static unsigned long string_hash(Object *string){
+    if (!string->hash_value){
+        string->hash_value = hash_bytes(string_chars(string), string->length);
+    }
+    return string->hash_value;
+}
+
+static size_t string_size(Object *string){
+    return sizeof(Object) + string->length + 1;
+}
@@ -1,7 +1,36 @@
 #ifndef __STRING_
 #define __STRING_
 
+#include "Object.h"
+
+extern const Type StringType;
+
+// The bytes of a string, stored right after the object.
+// Always followed by a null terminator.
+#define string_chars(string) ((char*)((string) + 1))
+
 // String general
 Object *new_String(char *base);
+Object *new_String_from(const char *base, unsigned int length);
+void destroy_String(Object *string);
+unsigned long hash_bytes(const char *chars, unsigned int length);
+
+// String getters
+Object *string_get(Object *string, unsigned int i);
+
+static inline unsigned int string_length(Object *string){
+	return string->length;
+}
+
+/**
+ * Get the ith byte of the string.
+ * @param  string String to index
+ * @param  i      Index
+ * @return        char
+ */
+static inline char string_char_at(Object *string, unsigned int i){
+	assert(i < string->length);
+	return string_chars(string)[i];
+}
 
-#endif
\ No newline at end of file
+#endif
@@ -0,0 +1,361 @@
+#include "utils.h"
+
+#include <limits.h>
+
+/**
+ * Number of entries a table with mask + 1 slots has room for. Keeping
+ * a third of the slots empty keeps probe sequences short and makes
+ * sure every one of them ends.
+ */
+static unsigned int table_capacity(unsigned int mask){
+    return (mask + 1)*2/3;
+}
+
+static TableEntry *alloc_entries(TableEntry *entries, unsigned int old_mask,
+                                 unsigned int mask){
+    size_t old_size = entries ? sizeof(TableEntry)*table_capacity(old_mask)
+                              : 0;
+    size_t size = sizeof(TableEntry)*table_capacity(mask);
+    TRACK_FREE(entries);
+    entries = (TableEntry*)pool_realloc(entries, old_size, size);
+    TRACK_ALLOC(entries, size, TRACK_TABLE);
+    return entries;
+}
+
+static int *alloc_slots(unsigned int mask){
+    size_t size = sizeof(int)*(mask + 1);
+    int *slots = (int*)pool_alloc(size);
+    TRACK_ALLOC(slots, size, TRACK_TABLE);
+    // Every byte of TABLE_SLOT_EMPTY is 0xff
+    memset(slots, 0xff, size);
+    return slots;
+}
+
+static void free_slots(int *slots, unsigned int mask){
+    TRACK_FREE(slots);
+    pool_free(slots, sizeof(int)*(mask + 1));
+}
+
+/**
+ * Set up an empty table. Nothing is allocated until the first key
+ * is added.
+ * @param obj Dict or set, with room for the table after it
+ */
+void table_init(Object *obj){
+    Table *table = table_of(obj);
+    obj->length = 0;
+    table->entries = NULL;
+    table->used = 0;
+    table->slots = NULL;
+    table->mask = 0;
+    table->old_slots = NULL;
+    table->old_mask = 0;
+    table->moved = 0;
+    table->move_end = 0;
+}
+
+/**
+ * Let go of every key and value and free the table.
+ * @param obj Dict or set
+ */
+void table_clear(Object *obj){
+    Table *table = table_of(obj);
+    unsigned int i;
+    for (i = 0; i < table->used; i++){
+        TableEntry *entry = &table->entries[i];
+        if (entry->key != NULL){
+            decref(entry->key);
+            if (entry->value != NULL){
+                decref(entry->value);
+            }
+        }
+    }
+    if (table->slots != NULL){
+        TRACK_FREE(table->entries);
+        pool_free(table->entries,
+                  sizeof(TableEntry)*table_capacity(table->mask));
+        free_slots(table->slots, table->mask);
+    }
+    if (table->old_slots != NULL){
+        free_slots(table->old_slots, table->old_mask);
+    }
+    table_init(obj);
+}
+
+/**
+ * Number of bytes a dict or set and its table take up.
+ */
+size_t table_size(Object *obj){
+    return sizeof(Object) + sizeof(Table);
+}
+
+/**
+ * Take a reference to a key or value for the table to hold.
+ */
+static Object *table_own(Object *obj){
+    // Anything from an arena gets copied out of it, like list
+    // elements (see list_own).
+    return promote(incref(obj));
+}
+
+/**
+ * Look a key up in one array of slots.
+ * @param  table Table the slots index into
+ * @param  slots Slots to probe
+ * @param  mask  Number of slots - 1
+ * @param  hash  Hash of the key
+ * @param  key   Key to look for
+ * @param  empty Set to the empty slot the probing stopped at, unless
+ *               NULL
+ * @return       Index of the entry holding the key, or -1
+ */
+static int probe(Table *table, const int *slots, unsigned int mask,
+                 unsigned long hash, Object *key, unsigned int *empty){
+    // The probe sequence of CPython: every slot is reached eventually,
+    // and the higher bits of the hash are mixed in as it goes so keys
+    // with the same low bits part ways quickly.
+    unsigned long perturb = hash;
+    unsigned int i = hash & mask;
+    while (slots[i] != TABLE_SLOT_EMPTY){
+        TableEntry *entry = &table->entries[slots[i]];
+        if (entry->hash == hash && entry->key != NULL &&
+                (entry->key == key || eq(entry->key, key))){
+            return slots[i];
+        }
+        perturb >>= 5;
+        i = (i*5 + perturb + 1) & mask;
+    }
+    if (empty != NULL){
+        *empty = i;
+    }
+    return -1;
+}
+
+/**
+ * Put an entry whose key isn't in the slots yet in the first empty
+ * slot of its probe sequence.
+ * @param table Table with the entry
+ * @param index Index of the entry
+ */
+static void place(Table *table, unsigned int index){
+    unsigned long perturb = table->entries[index].hash;
+    unsigned int i = perturb & table->mask;
+    while (table->slots[i] != TABLE_SLOT_EMPTY){
+        perturb >>= 5;
+        i = (i*5 + perturb + 1) & table->mask;
+    }
+    table->slots[i] = index;
+}
+
+/**
+ * Move up to count of the entries that are only in the old slots of
+ * a growing table into the new ones, freeing the old slots once there
+ * are none left.
+ * @param table Table to move the entries of
+ * @param count Number of entries to move at most
+ */
+static void table_move(Table *table, unsigned int count){
+    if (table->old_slots == NULL){
+        return;
+    }
+    while (count-- > 0 && table->moved < table->move_end){
+        if (table->entries[table->moved].key != NULL){
+            place(table, table->moved);
+        }
+        table->moved++;
+    }
+    if (table->moved == table->move_end){
+        free_slots(table->old_slots, table->old_mask);
+        table->old_slots = NULL;
+    }
+}
+
+/**
+ * Look a key up in the table, and in the old slots too while it is
+ * growing.
+ * @param  empty Set to the empty slot of the new slots where the key
+ *               would go, unless NULL
+ * @return       Index of the entry holding the key, or -1
+ */
+static int table_find(Table *table, Object *key, unsigned long hash,
+                      unsigned int *empty){
+    if (table->slots == NULL){
+        return -1;
+    }
+    table_move(table, TABLE_MOVE_STEP);
+    int index = probe(table, table->slots, table->mask, hash, key, empty);
+    if (index < 0 && table->old_slots != NULL){
+        index = probe(table, table->old_slots, table->old_mask, hash, key,
+                      NULL);
+    }
+    return index;
+}
+
+/**
+ * Make room for more entries. A table with holes in its entries is
+ * compacted and indexed again in one go, which the removals that made
+ * the holes pay for. A full table without any grows, moving its
+ * entries into the new slots over the next operations.
+ * @param obj Dict or set
+ */
+static void table_resize(Object *obj){
+    Table *table = table_of(obj);
+    table_move(table, UINT_MAX);
+
+    // Room for twice as many keys as there are now
+    unsigned int slots = TABLE_MIN_SLOTS;
+    while (table_capacity(slots - 1) < obj->length*2){
+        slots *= 2;
+    }
+    unsigned int mask = slots - 1;
+
+    if (table->slots != NULL && table->used == obj->length){
+        table->entries = alloc_entries(table->entries, table->mask, mask);
+        table->old_slots = table->slots;
+        table->old_mask = table->mask;
+        table->moved = 0;
+        table->move_end = table->used;
+        table->slots = alloc_slots(mask);
+        table->mask = mask;
+        return;
+    }
+
+    // Close up the holes, keeping the order
+    unsigned int i;
+    unsigned int used = 0;
+    for (i = 0; i < table->used; i++){
+        if (table->entries[i].key != NULL){
+            table->entries[used++] = table->entries[i];
+        }
+    }
+    table->used = used;
+
+    table->entries = alloc_entries(table->entries, table->mask, mask);
+    if (table->slots != NULL){
+        free_slots(table->slots, table->mask);
+    }
+    table->slots = alloc_slots(mask);
+    table->mask = mask;
+    for (i = 0; i < used; i++){
+        place(table, i);
+    }
+}
+
+/**
+ * Look a key up.
+ * @param  obj Dict or set
+ * @param  key Key to look for
+ * @return     Its entry, or NULL if the key isn't there
+ */
+TableEntry *table_lookup(Object *obj, Object *key){
+    Table *table = table_of(obj);
+    int index = table_find(table, key, hash(key), NULL);
+    return index < 0 ? NULL : &table->entries[index];
+}
+
+/**
+ * Check if two tables have the same keys, with equal values.
+ */
+int table_eq(Object *obj, Object *other){
+    if (obj->type != other->type || obj->length != other->length){
+        return 0;
+    }
+
+    Table *table = table_of(obj);
+    unsigned int i;
+    for (i = 0; i < table->used; i++){
+        TableEntry *entry = &table->entries[i];
+        if (entry->key == NULL){
+            continue;
+        }
+        TableEntry *match = table_lookup(other, entry->key);
+        if (match == NULL || (entry->value != NULL &&
+                              !eq(entry->value, match->value))){
+            return 0;
+        }
+    }
+    return 1;
+}
+
+/**
+ * Find the entry of a key, adding the key if it isn't there yet.
+ * The table takes its own reference to a key it adds. The value of an
+ * entry that was just added is NULL for the caller to fill in.
+ * @param  obj Dict or set
+ * @param  key Key to find or add
+ * @return     Its entry
+ */
+TableEntry *table_insert(Object *obj, Object *key){
+    Table *table = table_of(obj);
+    unsigned long h = hash(key);
+    unsigned int empty;
+    int index = table_find(table, key, h, &empty);
+    if (index >= 0){
+        return &table->entries[index];
+    }
+
+    int resized = table->slots == NULL ||
+                  table->used == table_capacity(table->mask);
+    if (resized){
+        table_resize(obj);
+    }
+    TableEntry *entry = &table->entries[table->used];
+    entry->hash = h;
+    entry->key = table_own(key);
+    entry->value = NULL;
+    if (resized){
+        place(table, table->used);
+    }
+    else {
+        table->slots[empty] = table->used;
+    }
+    table->used++;
+    obj->length++;
+    return entry;
+}
+
+/**
+ * Remove a key and its value, letting go of them.
+ * @param  obj Dict or set
+ * @param  key Key to remove
+ * @return     1 if the key was there, 0 otherwise
+ */
+int table_remove(Object *obj, Object *key){
+    TableEntry *entry = table_lookup(obj, key);
+    if (entry == NULL){
+        return 0;
+    }
+
+    // The entry stays in the probe sequences of its slots, but never
+    // matches anything again.
+    Object *old_key = entry->key;
+    Object *old_value = entry->value;
+    entry->key = NULL;
+    entry->value = NULL;
+    obj->length--;
+
+    decref(old_key);
+    if (old_value != NULL){
+        decref(old_value);
+    }
+    return 1;
+}
+
+/**
+ * Next key of a dict or set being iterated over, skipping the holes.
+ */
+Object *table_item(Iterator *it){
+    Table *table = table_of(it->iterable);
+    while (it->position < table->used &&
+           table->entries[it->position].key == NULL){
+        it->position++;
+    }
+    if (it->position == table->used){
+        // Keys were removed since the iteration started
+        output_discard_line();
+        fprintf(stderr, "RuntimeError: %s changed size during iteration\n",
+                it->iterable->type->name);
+        exit(1);
+    }
+    return incref(table->entries[it->position++].key);
+}
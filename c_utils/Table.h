@@ -0,0 +1,69 @@
+#ifndef __TABLE
+#define __TABLE
+
+#include "Object.h"
+
+// Hash tables
+// Dicts and sets keep their keys in an array of entries in the order
+// they were added, like CPython, so iterating over one walks a dense
+// array. A separate power of two array of slots indexes into the
+// entries by hash with open addressing. Each entry keeps the hash of
+// its key, so the key is only ever hashed when it is added or looked
+// up and most mismatches are found without comparing keys.
+//
+// Removing a key leaves a hole in the entries, which is closed up
+// the next time the table is resized. Growing the table moves the
+// entries into the bigger array of slots a few at a time instead of
+// all at once (see table_move), looking keys up in both arrays of
+// slots until it is done, so no one operation pays for all of it.
+#define TABLE_MIN_SLOTS 8
+#define TABLE_SLOT_EMPTY -1
+// Entries moved into the new slots by every operation while growing
+#define TABLE_MOVE_STEP 4
+
+typedef struct {
+	unsigned long hash; // Hash of the key
+	Object *key; // NULL once the key is removed
+	Object *value; // NULL in sets
+} TableEntry;
+
+typedef struct {
+	// Entries in the order they were added. There is room for two
+	// thirds as many as there are slots.
+	TableEntry *entries;
+	unsigned int used; // Entries filled in, holes included
+
+	// Index of an entry or TABLE_SLOT_EMPTY in each slot
+	int *slots;
+	unsigned int mask; // Number of slots - 1
+
+	// While growing, the entries from moved up to move_end are only
+	// indexed by old_slots. NULL otherwise.
+	int *old_slots;
+	unsigned int old_mask;
+	unsigned int moved;
+	unsigned int move_end;
+} Table;
+
+// The table of a dict or set, stored right after the object
+#define table_of(obj) ((Table*)((obj) + 1))
+
+// Table general
+// These work on the object holding the table, whose length they keep
+// as the number of keys.
+void table_init(Object *obj);
+void table_clear(Object *obj);
+size_t table_size(Object *obj);
+
+// Table lookups
+TableEntry *table_lookup(Object *obj, Object *key);
+int table_eq(Object *obj, Object *other);
+
+// Table setters
+TableEntry *table_insert(Object *obj, Object *key);
+int table_remove(Object *obj, Object *key);
+
+// Table iteration
+Object *table_item(Iterator *it);
+
+#endif
@@ -0,0 +1,251 @@
+#include "utils.h"
+
+#ifdef PY2C_TRACK_ALLOCS
+
+#define TRACK_MIN_CAPACITY 1024
+#define TRACK_MAX_TYPES 32
+#define TRACK_MAX_LISTED 10
+
+/**
+ * Every live allocation is kept in an open addressing table keyed
+ * by its address, so frees are O(1) and what is left at exit can
+ * be listed. The table itself uses plain malloc so it never counts
+ * towards what it measures.
+ */
+typedef struct {
+    void *ptr; // NULL if the slot is empty
+    size_t size;
+    unsigned long serial; // Allocation number, in order
+    TrackKind kind;
+} TrackEntry;
+
+typedef struct {
+    unsigned long allocs;
+    unsigned long frees;
+    size_t bytes; // Currently allocated
+} TrackCounts;
+
+static TrackEntry *entries = NULL;
+static size_t capacity = 0;
+static size_t live = 0;
+
+static TrackCounts counts[TRACK_KINDS];
+static size_t current_bytes = 0;
+static size_t peak_bytes = 0;
+static unsigned long serial = 0;
+static unsigned long untracked_frees = 0;
+
+// Set while reporting so the report's own buffers aren't counted
+static int paused = 0;
+
+static const char *kind_names[TRACK_KINDS] = {
+    "objects", "list items", "hash tables", "str buffers"
+};
+
+static void report_at_exit(){
+    // Keep the program's own output ahead of the report
+    output_flush();
+    print_alloc_report(stderr);
+}
+
+static size_t slot_of(void *ptr){
+    // Allocations are at least 16 byte aligned, so skip the low bits
+    unsigned long h = (unsigned long)ptr >> 4;
+    h ^= h >> 16;
+    h *= 0x45d9f3bUL;
+    h ^= h >> 16;
+    return h & (capacity - 1);
+}
+
+static void insert(TrackEntry entry){
+    size_t i = slot_of(entry.ptr);
+    while (entries[i].ptr != NULL){
+        i = (i + 1) & (capacity - 1);
+    }
+    entries[i] = entry;
+}
+
+static void grow(){
+    TrackEntry *old = entries;
+    size_t old_capacity = capacity;
+
+    capacity = capacity ? capacity*2 : TRACK_MIN_CAPACITY;
+    entries = (TrackEntry*)calloc(capacity, sizeof(TrackEntry));
+    assert(entries != NULL);
+
+    size_t i;
+    for (i = 0; i < old_capacity; i++){
+        if (old[i].ptr != NULL){
+            insert(old[i]);
+        }
+    }
+    free(old);
+}
+
+/**
+ * Record an allocation.
+ * @param ptr  Address handed out
+ * @param size Number of bytes
+ * @param kind What the memory is for
+ */
+void track_alloc(void *ptr, size_t size, TrackKind kind){
+    if (paused || ptr == NULL){
+        return;
+    }
+    if (entries == NULL){
+        atexit(report_at_exit);
+    }
+    if ((live + 1)*2 > capacity){
+        grow();
+    }
+
+    TrackEntry entry = {ptr, size, serial++, kind};
+    insert(entry);
+    live++;
+
+    counts[kind].allocs++;
+    counts[kind].bytes += size;
+    current_bytes += size;
+    if (current_bytes > peak_bytes){
+        peak_bytes = current_bytes;
+    }
+}
+
+/**
+ * Record that an allocation was released.
+ * @param ptr Address given to track_alloc
+ */
+void track_free(void *ptr){
+    if (paused || ptr == NULL){
+        return;
+    }
+
+    size_t i = capacity ? slot_of(ptr) : 0;
+    while (capacity && entries[i].ptr != NULL && entries[i].ptr != ptr){
+        i = (i + 1) & (capacity - 1);
+    }
+    if (capacity == 0 || entries[i].ptr == NULL){
+        untracked_frees++;
+        return;
+    }
+
+    TrackEntry entry = entries[i];
+    counts[entry.kind].frees++;
+    counts[entry.kind].bytes -= entry.size;
+    current_bytes -= entry.size;
+    live--;
+
+    // Shift the following entries of the run back so lookups
+    // never stop early at the hole.
+    size_t hole = i;
+    entries[hole].ptr = NULL;
+    for (i = (i + 1) & (capacity - 1); entries[i].ptr != NULL;
+            i = (i + 1) & (capacity - 1)){
+        size_t home = slot_of(entries[i].ptr);
+        // Move the entry if its home slot is not between the hole
+        // and where it is now (cyclically).
+        int between = hole <= i ? (hole < home && home <= i)
+                                : (hole < home || home <= i);
+        if (!between){
+            entries[hole] = entries[i];
+            entries[i].ptr = NULL;
+            hole = i;
+        }
+    }
+}
+
+/**
+ * Print the totals and everything still allocated.
+ * Objects still alive at exit were never destroyed, so they are
+ * reported as leaks. Other buffers are only listed.
+ * @param f File to print to
+ */
+void print_alloc_report(FILE *f){
+    paused = 1;
+
+    unsigned long allocs = 0;
+    unsigned long frees = 0;
+    int k;
+    for (k = 0; k < TRACK_KINDS; k++){
+        allocs += counts[k].allocs;
+        frees += counts[k].frees;
+    }
+
+    fprintf(f, "== allocation report ==\n");
+    fprintf(f, "allocations:     %lu\n", allocs);
+    fprintf(f, "frees:           %lu\n", frees);
+    fprintf(f, "peak bytes:      %lu\n", (unsigned long)peak_bytes);
+    fprintf(f, "live bytes:      %lu\n", (unsigned long)current_bytes);
+    for (k = 0; k < TRACK_KINDS; k++){
+        fprintf(f, "%-16s %lu allocated, %lu freed, %lu live (%lu bytes)\n",
+                kind_names[k], counts[k].allocs, counts[k].frees,
+                counts[k].allocs - counts[k].frees,
+                (unsigned long)counts[k].bytes);
+    }
+    if (untracked_frees){
+        fprintf(f, "untracked frees: %lu\n", untracked_frees);
+    }
+
+    // Live objects by type
+    const Type *types[TRACK_MAX_TYPES];
+    unsigned long type_counts[TRACK_MAX_TYPES];
+    size_t type_bytes[TRACK_MAX_TYPES];
+    int ntypes = 0;
+
+    size_t i;
+    for (i = 0; i < capacity; i++){
+        if (entries[i].ptr == NULL || entries[i].kind != TRACK_OBJECT){
+            continue;
+        }
+        const Type *type = ((Object*)entries[i].ptr)->type;
+        int t;
+        for (t = 0; t < ntypes && types[t] != type; t++);
+        if (t == ntypes){
+            if (ntypes == TRACK_MAX_TYPES){
+                continue;
+            }
+            types[t] = type;
+            type_counts[t] = 0;
+            type_bytes[t] = 0;
+            ntypes++;
+        }
+        type_counts[t]++;
+        type_bytes[t] += entries[i].size;
+    }
+
+    unsigned long leaked = counts[TRACK_OBJECT].allocs -
+                           counts[TRACK_OBJECT].frees;
+    fprintf(f, "leaked objects:  %lu\n", leaked);
+    int t;
+    for (t = 0; t < ntypes; t++){
+        fprintf(f, "  %-14s %lu (%lu bytes)\n", types[t]->name,
+                type_counts[t], (unsigned long)type_bytes[t]);
+    }
+
+    // The first few leaks in the order they were allocated
+    unsigned long listed = 0;
+    unsigned long after = 0;
+    while (listed < TRACK_MAX_LISTED && listed < leaked){
+        TrackEntry *next = NULL;
+        for (i = 0; i < capacity; i++){
+            if (entries[i].ptr != NULL && entries[i].kind == TRACK_OBJECT &&
+                    entries[i].serial >= after &&
+                    (next == NULL || entries[i].serial < next->serial)){
+                next = &entries[i];
+            }
+        }
+        if (next == NULL){
+            break;
+        }
+        char *r = repr((Object*)next->ptr);
+        fprintf(f, "  #%lu %s %.60s\n", next->serial,
+                ((Object*)next->ptr)->type->name, r);
+        free(r);
+        after = next->serial + 1;
+        listed++;
+    }
+
+    paused = 0;
+}
+
+#endif
@@ -0,0 +1,36 @@
+#ifndef __TRACK
+#define __TRACK
+
+#include <stdio.h>
+#include <stddef.h>
+
+// Allocation accounting
+// Compile the runtime with -DPY2C_TRACK_ALLOCS to record every
+// object, list item array, hash table and StrBuf buffer as it is
+// allocated and freed, and print a report of the totals, the peak and
+// anything still alive at exit. Without it the hooks compile to nothing.
+typedef enum {
+	TRACK_OBJECT,     // Objects, including the copies lists hold
+	TRACK_LIST_ITEMS, // Item arrays of lists
+	TRACK_TABLE,      // Entries and slots of dicts and sets
+	TRACK_STRBUF,     // StrBuf buffers (str(), repr() and printing)
+	TRACK_KINDS
+} TrackKind;
+
+#ifdef PY2C_TRACK_ALLOCS
+
+void track_alloc(void *ptr, size_t size, TrackKind kind);
+void track_free(void *ptr);
+void print_alloc_report(FILE *f);
+
+#define TRACK_ALLOC(ptr, size, kind) track_alloc((ptr), (size), (kind))
+#define TRACK_FREE(ptr) track_free(ptr)
+
+#else
+
+#define TRACK_ALLOC(ptr, size, kind) ((void)0)
+#define TRACK_FREE(ptr) ((void)0)
+
+#endif
+
+#endif
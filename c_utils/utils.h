@@ -1,20 +1,30 @@
 #ifndef __UTILS
 #define __UTILS
 
+// Every header of the runtime, for its own sources.
+// Generated code includes only the headers of the modules it uses
+// (see runtime.py), each of which includes what it needs in turn.
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
 #include <assert.h>
 #include <math.h>
 
+#include "StrBuf.h"
 #include "Object.h"
+#include "Memory.h"
+#include "Track.h"
+#include "Bignum.h"
 #include "Integer.h"
+#include "Float.h"
 #include "List.h"
 #include "Char.h"
 #include "String_.h"
+#include "Range.h"
+#include "Table.h"
+#include "Dict.h"
+#include "Set.h"
+#include "Output.h"
+#include "Builtins.h"
 
-char *dynamic_str(char *);
-
-Object *range(int start, int stop, int step);
-
-#endif
\ No newline at end of file
+#endif
@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import contextlib
+import errno
+import fcntl
+import hashlib
+import json
+import os
+
+# Where the cache goes if PY2C_CACHE_DIR isn't set
+DEFAULT_DIRECTORY = os.path.join("~", ".cache", "python2c")
+
+# Total size the cached translations may take up before the least
+# recently used ones are evicted
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# Files next to the entries, holding their total size and the lock
+# that processes sharing the cache take turns updating it with
+SIZE_FILE = "size"
+LOCK_FILE = "lock"
+
+# Modules whose code affects the C that gets generated
+TRANSLATOR_MODULES = ("translate.py", "blocks.py", "block_utils.py",
+                      "expressions.py", "infer.py", "scope.py", "runtime.py")
+
+_translator_digest = None
+
+
+def translator_digest():
+    """
+    Hash of the translator's own source, so a change to the translator
+    invalidates the cache even if the version wasn't bumped. The
+    runtime headers are included since the translator picks which to
+    include from what they declare.
+    """
+    global _translator_digest
+    if _translator_digest is None:
+        import glob
+        import translate
+
+        h = hashlib.sha256(translate.__version__.encode("utf-8"))
+        here = os.path.dirname(os.path.abspath(__file__))
+        paths = [os.path.join(here, name) for name in TRANSLATOR_MODULES]
+        paths += sorted(glob.glob(os.path.join(here, "c_utils", "*.h")))
+        for path in paths:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        _translator_digest = h.hexdigest()
+    return _translator_digest
+
+
+def default_directory():
+    return os.path.expanduser(
+        os.environ.get("PY2C_CACHE_DIR", DEFAULT_DIRECTORY))
+
+
+class TranslationCache(object):
+    """
+    On-disk cache of generated C, addressed by a hash of everything
+    the translation depends on. Entries are evicted least recently
+    used first once the cache grows past max_size bytes.
+    The total size of the entries is kept in a file in the cache, so
+    storing an entry doesn't have to look at every other one, even
+    from the many processes of a batch translation.
+    directory:
+        Where to keep the entries. Defaults to $PY2C_CACHE_DIR or
+        ~/.cache/python2c.
+    max_size:
+        Most bytes the entries may take up.
+    """
+
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory or default_directory()
+        self.max_size = max_size
+
+    def key(self, text, **options):
+        """
+        Key for the translation of source text with the options
+        (like indent_size) it is translated with.
+        """
+        h = hashlib.sha256(translator_digest().encode("utf-8"))
+        h.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        if not isinstance(text, bytes):
+            text = text.encode("utf-8")
+        h.update(text)
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + ".c")
+
+    def get(self, key):
+        """
+        Return the code cached under the key, or None if there isn't any.
+        """
+        path = self.path(key)
+        try:
+            with open(path, "r") as f:
+                code = f.read()
+        except (IOError, OSError):
+            return None
+        try:
+            # Mark it as recently used
+            os.utime(path, None)
+        except OSError:
+            pass
+        # Entries end in a newline like the streamed code
+        if code.endswith("\n"):
+            code = code[:-1]
+        return code
+
+    def put(self, key, code):
+        """
+        Store code under the key, evicting old entries if the cache
+        gets too big. Failing to write to the cache is not an error.
+        """
+        with self.writer(key) as entry:
+            entry.write(code)
+            entry.write("\n")
+
+    def writer(self, key, sink=None):
+        """
+        Return an EntryWriter to store the code for the key with as it
+        is generated, writing it through to sink as well.
+        """
+        return EntryWriter(self, key, sink)
+
+    @contextlib.contextmanager
+    def locked(self):
+        """
+        Hold the lock on the size of the cache.
+        """
+        with open(os.path.join(self.directory, LOCK_FILE), "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def read_size(self):
+        """
+        Return the total size of the entries, or None if it isn't
+        known. Call with the lock held.
+        """
+        try:
+            with open(os.path.join(self.directory, SIZE_FILE), "r") as f:
+                return int(f.read())
+        except (IOError, OSError, ValueError):
+            return None
+
+    def write_size(self, size):
+        """
+        Record the total size of the entries. Call with the lock held.
+        """
+        with open(os.path.join(self.directory, SIZE_FILE), "w") as f:
+            f.write(str(size))
+
+    def add(self, tmp_path, key):
+        """
+        Move a finished entry into place under the key, and evict old
+        entries if that makes the cache too big.
+        """
+        path = self.path(key)
+        with self.locked():
+            try:
+                # An entry being overwritten no longer counts
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            os.rename(tmp_path, path)
+            size = self.read_size()
+            if size is None:
+                # Only the first time, or if the file was lost
+                size = sum(entry_size for _, entry_size, _ in self.entries())
+            else:
+                size += os.path.getsize(path) - old_size
+            if size > self.max_size:
+                size = self.evict()
+            self.write_size(size)
+
+    def entries(self):
+        """
+        Yield (path, size, last use) for every entry in the cache.
+        """
+        if not os.path.isdir(self.directory):
+            return
+        for shard in os.listdir(self.directory):
+            shard = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard):
+                continue
+            for name in os.listdir(shard):
+                if not name.endswith(".c"):
+                    continue
+                path = os.path.join(shard, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    # Removed by another process
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache is
+        down to max_size. Call with the lock held.
+        Returns the total size of the entries left.
+        """
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        size = sum(size for _, size, _ in entries)
+        for path, entry_size, _ in entries:
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            size -= entry_size
+        return size
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        with self.locked():
+            for path, _, _ in list(self.entries()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.write_size(0)
+
+
+class EntryWriter(object):
+    """
+    File-like sink that writes a cache entry to a temporary file next
+    to where it goes, and everything written to it through to another
+    sink too, so generated code can be streamed to its output and
+    cached at once. Use it as a context manager: the entry only
+    appears in the cache, all at once, if the block finishes.
+    Failing to write to the cache is not an error; the entry is just
+    dropped.
+    """
+
+    __slots__ = ("cache", "key", "sink", "file", "tmp_path")
+
+    def __init__(self, cache, key, sink=None):
+        self.cache = cache
+        self.key = key
+        self.sink = sink
+        path = cache.path(key)
+        self.tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        try:
+            try:
+                os.makedirs(os.path.dirname(path))
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+            self.file = open(self.tmp_path, "w")
+        except (IOError, OSError):
+            self.file = None
+
+    def write(self, text):
+        if self.sink is not None:
+            self.sink.write(text)
+        if self.file is not None:
+            try:
+                self.file.write(text)
+            except (IOError, OSError):
+                self.discard()
+
+    def discard(self):
+        """
+        Drop the entry.
+        """
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def commit(self):
+        """
+        Add the entry to the cache.
+        """
+        if self.file is None:
+            return
+        try:
+            self.file.close()
+            self.file = None
+            self.cache.add(self.tmp_path, self.key)
+        except (IOError, OSError):
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
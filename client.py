@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Thin client for the translation server (see server).
+
+Sends the request to a running server, and only imports the translator
+to do the work in this process if no server is listening.
+"""
+from __future__ import print_function
+
+import json
+import os
+import socket
+import sys
+import tempfile
+
+
+def default_socket_path():
+    # Kept in sync with server.default_socket_path without importing it
+    path = os.environ.get("PY2C_SOCKET")
+    if path:
+        return path
+    directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, "python2c-{}.sock".format(os.getuid()))
+
+
+def send(request, path=None):
+    """
+    Send a request to the server.
+    Returns the response, or None if no server is listening.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(path or default_socket_path())
+        except socket.error:
+            return None
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        sock.close()
+
+    if not chunks:
+        return None
+    return json.loads(b"".join(chunks).decode("utf-8"))
+
+
+def request(request, path=None):
+    """
+    Carry out a request on the server if there is one, and in this
+    process otherwise.
+    """
+    response = send(request, path)
+    if response is None:
+        import cache
+        import server
+
+        response = server.handle_request(
+            request, cache.TranslationCache())
+    return response
+
+
+def main():
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Convert python code to C code "
+                            "using the translation server if it is running")
+    parser.add_argument("file", help=".py file to translate to C.")
+    parser.add_argument(
+        "-s", "--indent-size", type=int, default=4,
+        help="The number of spaces with which to represent each indent."
+    )
+    parser.add_argument(
+        "-c", "--compile-check", default=False, action="store_true",
+        help="Compile the generated code and see if there are any errors."
+    )
+    parser.add_argument(
+        "-e", "--execute", default=False, action="store_true",
+        help="Compile and execute the translated code."
+    )
+    parser.add_argument(
+        "--arena", default=False, action="store_true",
+        help="Allocate the objects of main and every loop body in an arena."
+    )
+    parser.add_argument(
+        "--no-cache", default=False, action="store_true",
+        help="Always translate from scratch."
+    )
+    parser.add_argument(
+        "--socket",
+        help="Path of the server's socket."
+    )
+    args = parser.parse_args()
+
+    if args.execute:
+        action = "execute"
+    elif args.compile_check:
+        action = "compile"
+    else:
+        action = "translate"
+
+    try:
+        with open(args.file, "r") as f:
+            source = f.read()
+    except IOError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    response = request({
+        "action": action,
+        "source": source,
+        "filename": args.file,
+        "indent_size": args.indent_size,
+        "use_arena": args.arena,
+        "cache": not args.no_cache,
+    }, args.socket)
+
+    if response.get("log"):
+        sys.stderr.write(response["log"])
+    if not response["ok"]:
+        print(response["error"], file=sys.stderr)
+        return 2
+
+    if action == "translate":
+        print(response["code"])
+    elif action == "compile":
+        print("Successful compilation!")
+    else:
+        sys.stdout.write(response["output"])
+        returncode = response.get("returncode", 0)
+        if returncode:
+            # Negative if the program was killed by a signal
+            return returncode if returncode > 0 else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
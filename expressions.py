@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import ast
+import operator
+from collections import Counter
+
+import infer
+
+# Operators whose python semantics match the C operator for ints
+C_OPERATORS = {
+    ast.Add: "+",
+    ast.Sub: "-",
+    ast.Mult: "*",
+    ast.BitOr: "|",
+    ast.BitXor: "^",
+    ast.BitAnd: "&",
+}
+
+# Runtime functions for operators on objects (see c_utils/Builtins.h)
+RUNTIME_OPERATORS = {
+    ast.Add: "binary_add",
+    ast.Sub: "binary_sub",
+    ast.Mult: "binary_mul",
+    ast.Div: "binary_div",
+    ast.FloorDiv: "binary_floordiv",
+    ast.Mod: "binary_mod",
+    ast.Pow: "binary_pow",
+    ast.LShift: "binary_lshift",
+    ast.RShift: "binary_rshift",
+    ast.BitAnd: "binary_and",
+    ast.BitOr: "binary_or",
+    ast.BitXor: "binary_xor",
+}
+
+FOLD_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+    ast.BitAnd: operator.and_,
+}
+
+# Don't fold anything that would take long to compute just to find
+# out it doesn't fit in a C long.
+MAX_FOLD_EXPONENT = 256
+MAX_FOLD_SHIFT = 128
+
+
+class ModuleInfo(object):
+    """
+    What is known about a module before any blocks are generated.
+    types:
+        Dict of variable names to their inferred types (see infer).
+    constants:
+        Dict of variable names to the constant they are always bound to.
+    true_division:
+        Whether / is true division ('from __future__ import division').
+    bounds:
+        Dict of INT variable names to their largest magnitudes. Only
+        operations on ints known to fit in a long are done in C.
+    """
+
+    def __init__(self, types=None, constants=None, true_division=False,
+                 bounds=None):
+        self.types = types or {}
+        self.constants = constants or {}
+        self.true_division = true_division
+        self.bounds = bounds or {}
+
+    def var_type(self, name):
+        return self.types.get(name, infer.OBJECT)
+
+
+def analyze_module(tree):
+    """
+    Run the analysis passes over a module.
+    tree:
+        ast.Module
+    """
+    true_division = infer.uses_true_division(tree)
+    types, bounds = infer.infer_types(tree)
+    return ModuleInfo(
+        types=types,
+        constants=find_constants(tree, true_division),
+        true_division=true_division,
+        bounds=bounds)
+
+
+def is_representable(value):
+    """
+    Check if a folded value can be written as a C literal of the
+    type the variable would get.
+    """
+    if isinstance(value, bool):
+        return False
+    elif isinstance(value, (int, long)):
+        return infer.MIN_INT <= value <= infer.MAX_INT
+    elif isinstance(value, float):
+        # inf and nan have no literal
+        return value - value == 0
+    return False
+
+
+def fold_binop(op, left, right, true_division):
+    """
+    Apply a binary operator to two constants with python semantics.
+    Returns None if it can't (or shouldn't) be done at translation time.
+    """
+    both_ints = (isinstance(left, (int, long)) and
+                 isinstance(right, (int, long)))
+    if isinstance(op, ast.Div):
+        if both_ints and not true_division:
+            return left // right
+        return operator.truediv(left, right)
+    elif isinstance(op, ast.Pow):
+        if abs(right) > MAX_FOLD_EXPONENT:
+            return None
+        return left ** right
+    elif isinstance(op, (ast.LShift, ast.RShift)):
+        if not both_ints or right > MAX_FOLD_SHIFT:
+            return None
+    elif isinstance(op, (ast.BitOr, ast.BitXor, ast.BitAnd)):
+        if not both_ints:
+            return None
+    elif type(op) not in FOLD_OPERATORS:
+        return None
+    return FOLD_OPERATORS[type(op)](left, right)
+
+
+def fold(node, constants=None, true_division=False):
+    """
+    Evaluate an expression at translation time.
+    Returns the value of the expression if it only involves numbers,
+    operators and names bound to constants, and the value fits in a
+    C long or double. Returns None otherwise.
+    """
+    constants = constants or {}
+    if isinstance(node, ast.Num):
+        value = node.n
+    elif isinstance(node, ast.Name):
+        value = constants.get(node.id)
+    elif isinstance(node, ast.UnaryOp):
+        operand = fold(node.operand, constants, true_division)
+        if operand is None:
+            return None
+        elif isinstance(node.op, ast.USub):
+            value = -operand
+        elif isinstance(node.op, ast.UAdd):
+            value = +operand
+        elif (isinstance(node.op, ast.Invert) and
+                isinstance(operand, (int, long))):
+            value = ~operand
+        else:
+            return None
+    elif isinstance(node, ast.BinOp):
+        left = fold(node.left, constants, true_division)
+        right = fold(node.right, constants, true_division)
+        if left is None or right is None:
+            return None
+        try:
+            value = fold_binop(node.op, left, right, true_division)
+        except (ArithmeticError, ValueError):
+            # Leave errors like dividing by zero for runtime
+            return None
+    else:
+        return None
+
+    return value if is_representable(value) else None
+
+
+def find_constants(tree, true_division=False):
+    """
+    Find the variables that are only stored to once, with a value
+    that can be folded.
+    Returns a dict of variable names to their values.
+    """
+    stores = infer.assignments(tree)
+    counts = Counter(name for name, _ in stores)
+
+    # A value may depend on other constants, so keep going until
+    # no more are found.
+    constants = {}
+    changed = True
+    while changed:
+        changed = False
+        for name, value in stores:
+            if (counts[name] != 1 or name in constants or
+                    not isinstance(value, ast.AST)):
+                continue
+            folded = fold(value, constants, true_division)
+            if folded is not None:
+                constants[name] = folded
+                changed = True
+    return constants
+
+
+def c_literal(value):
+    """
+    Return the C literal for a folded value.
+    """
+    if isinstance(value, float):
+        return repr(value)
+    elif value == infer.MIN_INT:
+        # The literal for the magnitude alone wouldn't fit in a long
+        return "({}L - 1)".format(value + 1)
+    return str(value)
+
+
+def runtime_operator(op, info):
+    """
+    Return the runtime function for an operator on objects, or None
+    if there is none.
+    """
+    if isinstance(op, ast.Div) and info.true_division:
+        return "binary_truediv"
+    return RUNTIME_OPERATORS.get(type(op))
+
+
+def lower(node, info):
+    """
+    Lower an expression to a C expression with python semantics.
+    Constant parts are folded first, so range(2*(3+4)) becomes 14.
+    info:
+        ModuleInfo for the module the node is in.
+    Returns a string.
+    """
+    value = fold(node, info.constants, info.true_division)
+    if value is not None:
+        return c_literal(value)
+
+    if isinstance(node, ast.Name):
+        if not infer.is_scalar(info.var_type(node.id)):
+            raise Exception(
+                "No support yet for using object '{}' in an expression"
+                .format(node.id))
+        return node.id
+    elif infer.is_membership_test(node):
+        return lower_membership_test(node, info)
+    elif isinstance(node, ast.UnaryOp):
+        operand = lower_operand(node.operand, info)
+        if isinstance(node.op, ast.USub):
+            return "-" + operand
+        elif isinstance(node.op, ast.UAdd):
+            return operand
+        elif isinstance(node.op, ast.Invert):
+            return "~" + operand
+        elif isinstance(node.op, ast.Not):
+            return "!" + operand
+    elif isinstance(node, ast.BinOp):
+        return lower_binop(node, info)
+
+    raise Exception(
+        "No support yet for the expression {}".format(ast.dump(node)))
+
+
+def lower_operand(node, info):
+    """
+    Lower an expression that is used as an operand of another
+    operator, adding parentheses if it needs them.
+    """
+    expr = lower(node, info)
+    if fold(node, info.constants, info.true_division) is not None:
+        return expr
+    elif isinstance(node, ast.UnaryOp) or (
+            isinstance(node, ast.BinOp) and type(node.op) in C_OPERATORS):
+        return "({})".format(expr)
+    return expr
+
+
+def lower_membership_test(node, info):
+    """
+    Lower elem in container (or not in) to a test of the runtime,
+    which looks the element up in a dict or set by its hash.
+    """
+    # blocks boxes values with the expressions of this module
+    import blocks
+    test = "contains_op({}, {})".format(
+        blocks.owned_value(node.comparators[0], info),
+        blocks.owned_value(node.left, info))
+    if isinstance(node.ops[0], ast.NotIn):
+        return "!" + test
+    return test
+
+
+def lower_binop(node, info):
+    result_type = infer.expr_type(node, info.types, info.true_division,
+                                  info.bounds)
+    if not infer.is_scalar(result_type):
+        raise Exception(
+            "No support yet for the expression {}".format(ast.dump(node)))
+
+    op = node.op
+    left = lower_operand(node.left, info)
+    right = lower_operand(node.right, info)
+
+    if type(op) in C_OPERATORS:
+        return "{} {} {}".format(left, C_OPERATORS[type(op)], right)
+    elif isinstance(op, ast.LShift):
+        # Shift counts C leaves undefined are errors or clamped in python
+        return "py_lshift({}, {})".format(left, right)
+    elif isinstance(op, ast.RShift):
+        return "py_rshift({}, {})".format(left, right)
+    elif isinstance(op, ast.Div):
+        if result_type == infer.INT:
+            # Classic division of ints floors
+            return "py_floordiv({}, {})".format(left, right)
+        return "py_truediv({}, {})".format(left, right)
+    elif isinstance(op, ast.FloorDiv):
+        if result_type == infer.INT:
+            return "py_floordiv({}, {})".format(left, right)
+        return "floor(py_truediv({}, {}))".format(left, right)
+    elif isinstance(op, ast.Mod):
+        if result_type == infer.INT:
+            return "py_mod({}, {})".format(left, right)
+        return "py_fmod({}, {})".format(left, right)
+    elif isinstance(op, ast.Pow):
+        if result_type == infer.INT:
+            return "py_pow({}, {})".format(left, right)
+        return "pow({}, {})".format(left, right)
+
+    raise Exception("Could not identify operator " + str(op))
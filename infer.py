@@ -0,0 +1,566 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import ast
+
+# Types a variable can be inferred to have.
+# INT, FLOAT and BOOL variables become plain C scalars; everything
+# else stays a boxed Object*.
+INT = "int"
+FLOAT = "float"
+BOOL = "bool"
+OBJECT = "object"
+
+# The C type used to hold a variable of each scalar type.
+C_TYPES = {
+    INT: "long",
+    FLOAT: "double",
+    BOOL: "int",
+}
+
+# Largest magnitude an INT literal may have and still fit in a C long
+MAX_INT = 2**63 - 1
+MIN_INT = -2**63
+
+ARITHMETIC_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv,
+                  ast.Mod, ast.Pow)
+BITWISE_OPS = (ast.LShift, ast.RShift, ast.BitOr, ast.BitXor, ast.BitAnd)
+# Operators whose result on two C longs can be too big for a long
+OVERFLOW_OPS = (ast.Add, ast.Sub, ast.Mult, ast.LShift, ast.Pow)
+# Most times a loop over an object can run, since the runtime keeps
+# the lengths of strings, lists, dicts and sets in an unsigned int
+MAX_OBJECT_ITERATIONS = 2**32 - 1
+# Comparisons the translator can make (membership tests)
+MEMBERSHIP_OPS = (ast.In, ast.NotIn)
+
+
+def is_scalar(var_type):
+    """
+    Check if a variable of the type can be a plain C scalar.
+    """
+    return var_type in C_TYPES
+
+
+def join(type1, type2):
+    """
+    Combine the types of two values that end up in the same variable.
+    None means the type is not known (yet).
+    """
+    if type1 is None:
+        return type2
+    elif type2 is None or type1 == type2:
+        return type1
+    return OBJECT
+
+
+def num_type(n):
+    """
+    Type of a number literal.
+    """
+    if isinstance(n, bool):
+        return OBJECT
+    elif isinstance(n, (int, long)):
+        return INT if MIN_INT <= n <= MAX_INT else OBJECT
+    elif isinstance(n, float):
+        return FLOAT
+    return OBJECT
+
+
+def uses_true_division(tree):
+    """
+    Check if the module has 'from __future__ import division'.
+    """
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+            if any(alias.name == "division" for alias in node.names):
+                return True
+    return False
+
+
+def is_membership_test(node):
+    """
+    Check if a node is a single in or not in test, like k in d.
+    """
+    return (isinstance(node, ast.Compare) and len(node.ops) == 1 and
+            isinstance(node.ops[0], MEMBERSHIP_OPS))
+
+
+def as_number(var_type):
+    """
+    Type a value of var_type acts as in arithmetic. bools are ints.
+    """
+    return INT if var_type == BOOL else var_type
+
+
+def fits(bound):
+    """
+    Check if a value of at most the magnitude bound (see value_bounds)
+    fits in a C long. None means the magnitude has no known bound.
+    """
+    return bound is not None and bound <= MAX_INT
+
+
+def expr_type(node, types, true_division=False, bounds=None):
+    """
+    Type of the value an expression evaluates to given the types
+    of the variables found so far.
+    bounds:
+        Largest magnitudes of the INT variables (see value_bounds).
+        If given, an operation on ints is only an INT if its result
+        is known to fit in a C long, and an OBJECT otherwise.
+    Returns None if it depends on a variable whose type is not
+    known yet.
+    """
+    if isinstance(node, ast.Num):
+        return num_type(node.n)
+    elif isinstance(node, ast.Name):
+        return types.get(node.id)
+    elif is_membership_test(node):
+        return BOOL
+    elif isinstance(node, ast.UnaryOp):
+        operand = expr_type(node.operand, types, true_division, bounds)
+        if operand is None or operand == OBJECT:
+            return operand
+        elif isinstance(node.op, ast.Not):
+            return BOOL
+        operand = as_number(operand)
+        if isinstance(node.op, (ast.UAdd, ast.USub)):
+            return operand
+        elif isinstance(node.op, ast.Invert) and operand == INT:
+            return INT
+        return OBJECT
+    elif isinstance(node, ast.BinOp):
+        left = as_number(expr_type(node.left, types, true_division, bounds))
+        right = as_number(expr_type(node.right, types, true_division,
+                                    bounds))
+        if OBJECT in (left, right):
+            return OBJECT
+        elif left is None or right is None:
+            return None
+        elif isinstance(node.op, BITWISE_OPS):
+            if left != INT or right != INT:
+                return OBJECT
+        elif not isinstance(node.op, ARITHMETIC_OPS):
+            return OBJECT
+        elif left != INT or right != INT:
+            return FLOAT
+        elif isinstance(node.op, ast.Div) and true_division:
+            return FLOAT
+        elif isinstance(node.op, ast.Pow) and not (
+                isinstance(node.right, ast.Num) and 0 <= node.right.n < 64):
+            # A negative exponent makes a float, so only literal
+            # exponents stay ints.
+            return OBJECT
+
+        if (bounds is not None and isinstance(node.op, OVERFLOW_OPS) and
+                not fits(bound(node, bounds))):
+            # Could be too big for a long, so it is worked out by the
+            # runtime, which switches to a bignum if it has to
+            return OBJECT
+        return INT
+    return OBJECT
+
+
+def is_range_call(node):
+    """
+    Check if a node is a call to the builtin range().
+    """
+    return (isinstance(node, ast.Call) and
+            isinstance(node.func, ast.Name) and node.func.id == "range")
+
+
+def assignments(tree):
+    """
+    Find every value stored to a variable in the tree.
+    Returns a list of (name, value) where value is either an
+    expression node or a type.
+    """
+    stores = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    stores.append((target.id, node.value))
+                else:
+                    # Unpacking and the like. The names in a subscript
+                    # (d[k] = v) are only loaded.
+                    for child in ast.walk(target):
+                        if (isinstance(child, ast.Name) and
+                                isinstance(child.ctx, ast.Store)):
+                            stores.append((child.id, OBJECT))
+        elif isinstance(node, ast.AugAssign):
+            if isinstance(node.target, ast.Name):
+                load = ast.Name(id=node.target.id, ctx=ast.Load())
+                stores.append(
+                    (node.target.id, ast.BinOp(load, node.op, node.value)))
+        elif isinstance(node, ast.For):
+            for child in ast.walk(node.target):
+                if isinstance(child, ast.Name):
+                    if child is node.target and is_range_call(node.iter):
+                        stores.append((child.id, INT))
+                    else:
+                        stores.append((child.id, OBJECT))
+    return stores
+
+
+def names_in(node):
+    """
+    Set of the names of the variables used in a node.
+    """
+    return set(child.id for child in ast.walk(node)
+               if isinstance(child, ast.Name))
+
+
+def loop_stores(tree):
+    """
+    Find every value stored to a variable that can be an INT, along
+    with the loops (and other blocks that may run more than once) the
+    store is in, outermost first.
+    Returns a list of (name, value, loops) where value is an expression
+    node, or the range() call a counted loop goes through.
+    """
+    stores = []
+
+    def visit(body, loops):
+        for stmt in body:
+            if isinstance(stmt, ast.For):
+                inner = loops + [stmt]
+                if (isinstance(stmt.target, ast.Name) and
+                        is_range_call(stmt.iter)):
+                    stores.append((stmt.target.id, stmt.iter, inner))
+                visit(stmt.body, inner)
+                visit(stmt.orelse, loops)
+            elif isinstance(stmt, ast.If):
+                visit(stmt.body, loops)
+                visit(stmt.orelse, loops)
+            elif isinstance(stmt, (ast.Assign, ast.AugAssign)):
+                for name, value in assignments(stmt):
+                    if isinstance(value, ast.AST):
+                        stores.append((name, value, loops))
+            else:
+                # while loops, functions and the like. Their bodies
+                # can run any number of times.
+                inner = loops + [stmt]
+                for field in ("body", "orelse", "finalbody"):
+                    visit(getattr(stmt, field, None) or [], inner)
+                for handler in getattr(stmt, "handlers", None) or []:
+                    visit(handler.body, inner)
+
+    visit(tree.body, [])
+    return stores
+
+
+def combine_bounds(op, left, right):
+    """
+    Largest magnitude of the result of an operator on two ints no
+    bigger than left and right, for the operators that don't have
+    a bound on their own (see linear_bound).
+    """
+    if isinstance(op, ast.Mult):
+        return left*right
+    elif isinstance(op, ast.Pow):
+        if left <= 1:
+            return left
+        # Anything bigger to the 64th is too big for a long anyway
+        return left**min(right, 64)
+    elif isinstance(op, ast.LShift):
+        # A count of 63 or more doesn't fit for anything but 0, like
+        # in py_lshift
+        return left << min(right, 63)
+    # Bitwise operators don't set any bits above the highest one of
+    # their operands (or clear any for negative ones)
+    return 2**max(left, right).bit_length()
+
+
+def linear_bound(node, cycle, bounds):
+    """
+    Bound the magnitude of an INT expression in terms of the
+    variables of cycle, which are stored to from each other.
+    bounds:
+        Largest magnitudes of the other variables.
+    Returns (k, r), meaning the magnitude is at most r more than k
+    times the largest magnitude of the cycle, with k 0 or 1. Returns
+    None if it can't be bounded like that, like when the cycle is
+    multiplied up (h = h*31) or added to itself (a = a + b, b = a).
+    """
+    if isinstance(node, ast.Num):
+        if isinstance(node.n, (int, long)):
+            return 0, abs(node.n)
+        return None
+    elif isinstance(node, ast.Name):
+        if node.id in cycle:
+            return 1, 0
+        bound = bounds.get(node.id)
+        return None if bound is None else (0, bound)
+    elif is_membership_test(node):
+        return 0, 1
+    elif isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, ast.Not):
+            return 0, 1
+        operand = linear_bound(node.operand, cycle, bounds)
+        if operand is None or not isinstance(node.op, ast.Invert):
+            return operand
+        # ~x is -x - 1
+        return operand[0], operand[1] + 1
+    elif not isinstance(node, ast.BinOp):
+        return None
+
+    op = node.op
+    if isinstance(op, ast.BitAnd):
+        # Masking with a positive literal bounds the result by it
+        for operand in (node.left, node.right):
+            if isinstance(operand, ast.Num) and operand.n >= 0:
+                return 0, operand.n
+
+    left = linear_bound(node.left, cycle, bounds)
+    right = linear_bound(node.right, cycle, bounds)
+    if isinstance(op, ast.Mod):
+        # The result is smaller than the divisor
+        return right
+    elif isinstance(op, (ast.Div, ast.FloorDiv, ast.RShift)):
+        # The result is no bigger than the dividend
+        return left
+    elif left is None or right is None:
+        return None
+    elif isinstance(op, (ast.Add, ast.Sub)):
+        k = left[0] + right[0]
+        return None if k > 1 else (k, left[1] + right[1])
+    elif left[0] or right[0]:
+        return None
+    return 0, combine_bounds(op, left[1], right[1])
+
+
+def bound(node, bounds):
+    """
+    Largest magnitude an INT expression can have given the largest
+    magnitudes of its variables, or None if it has no known bound.
+    """
+    form = linear_bound(node, (), bounds)
+    return None if form is None else form[1]
+
+
+def store_bound(value, cycle, bounds):
+    """
+    linear_bound of a value stored by loop_stores.
+    """
+    if not is_range_call(value):
+        return linear_bound(value, cycle, bounds)
+    # The elements of a range are no bigger than its start and stop
+    largest = 0
+    for arg in value.args[:2]:
+        form = linear_bound(arg, cycle, bounds)
+        if form is None or form[0]:
+            return None
+        largest = max(largest, form[1])
+    return 0, largest
+
+
+def trip_count(loop, bounds):
+    """
+    Most times the body of a loop (from loop_stores) can run each time
+    the loop is reached, or None if there is no known limit.
+    """
+    if not isinstance(loop, ast.For):
+        return None
+    elif not is_range_call(loop.iter):
+        return MAX_OBJECT_ITERATIONS
+
+    args = loop.iter.args
+    if not 1 <= len(args) <= 3:
+        return None
+    span = 0
+    for arg in args[:2]:
+        arg_bound = bound(arg, bounds)
+        if arg_bound is None:
+            return None
+        span += arg_bound
+    step = 1
+    if len(args) == 3:
+        step_node = args[2]
+        if (isinstance(step_node, ast.UnaryOp) and
+                isinstance(step_node.op, ast.USub)):
+            step_node = step_node.operand
+        if isinstance(step_node, ast.Num) and step_node.n:
+            step = abs(step_node.n)
+    return span//step + 1
+
+
+def executions(loops, bounds):
+    """
+    Most times a store in the loops (from loop_stores) can run, or
+    None if there is no known limit.
+    """
+    count = 1
+    for loop in loops:
+        trips = trip_count(loop, bounds)
+        if trips is None:
+            return None
+        count *= trips
+    return count
+
+
+def strongly_connected(nodes, edges):
+    """
+    Split a graph into its strongly connected components (Tarjan's
+    algorithm, without recursion so long chains of variables are fine).
+    edges:
+        Dict of every node to the set of nodes it has edges to.
+    Returns a list of sets of nodes, where every component comes after
+    the components it has edges to.
+    """
+    index = {}
+    low = {}
+    stack = []
+    on_stack = set()
+    components = []
+    for root in sorted(nodes):
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(sorted(edges[root])))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(edges[child]))))
+                    break
+                elif child in on_stack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = set()
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.add(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
+def value_bounds(tree, types):
+    """
+    Find the largest magnitude every INT variable can have.
+    A variable stored to from itself, directly or through other
+    variables, grows by at most what is added to it each time the
+    store runs, which is limited by how many times the loops around
+    it go round (total = total + i). Anything else that feeds it back
+    into itself (h = h*31, or a = a + b; b = a) has no bound.
+    Returns a dict of the names of the INT and BOOL variables to
+    their largest magnitudes, or None where there is no bound.
+    """
+    ints = set(name for name in types if types[name] == INT)
+    bounds = dict((name, 1) for name in types if types[name] == BOOL)
+
+    stores = {}
+    dependencies = dict((name, set()) for name in ints)
+    for name, value, loops in loop_stores(tree):
+        if name not in ints:
+            continue
+        stores.setdefault(name, []).append((value, loops))
+        used = names_in(value)
+        for loop in loops:
+            if isinstance(loop, ast.For):
+                # How many times it runs depends on the range
+                used.update(names_in(loop.iter))
+        dependencies[name].update(used & ints)
+
+    for component in strongly_connected(ints, dependencies):
+        # The variables of a component share a bound: the largest
+        # value stored from outside of it plus everything added
+        # to it from inside of it.
+        largest = 0
+        growth = 0
+        values = [(value, loops) for name in component
+                  for value, loops in stores.get(name, ())]
+        for value, loops in values:
+            form = store_bound(value, component, bounds)
+            count = None
+            if form is not None and form[0]:
+                count = executions(loops, bounds)
+            if form is None or (form[0] and count is None):
+                largest = None
+                break
+            elif form[0]:
+                # Adds at most form[1] every time it runs
+                growth += count*form[1]
+            else:
+                largest = max(largest, form[1])
+        for name in component:
+            bounds[name] = None if largest is None else largest + growth
+    return bounds
+
+
+def propagate(stores, types, true_division, bounds=None):
+    """
+    Find the types of the stored variables, starting from types.
+    bounds:
+        Passed on to expr_type.
+    """
+    types = dict(types)
+    # Types only ever move up from unknown to a scalar to OBJECT,
+    # so this stops once nothing changes.
+    changed = True
+    while changed:
+        changed = False
+        for name, value in stores:
+            if isinstance(value, ast.AST):
+                value = expr_type(value, types, true_division, bounds)
+            joined = join(types.get(name), value)
+            if joined != types.get(name):
+                types[name] = joined
+                changed = True
+
+    # Anything that only ever depends on unknowns (like x = x)
+    # can't be proven to be a scalar.
+    for name in types:
+        if types[name] is None:
+            types[name] = OBJECT
+    return types
+
+
+def infer_types(tree):
+    """
+    Find the type of every variable stored to in the module.
+    A variable is INT (or FLOAT) only if every value ever stored
+    to it is one; otherwise it is OBJECT. An INT is only kept as a
+    C long if it is known to always fit in one (see value_bounds),
+    so nothing ever overflows; one that could outgrow it is an
+    OBJECT, which can become as big as it needs to.
+    tree:
+        ast.Module
+    Returns (types, bounds): a dict of variable names to types, and
+    the largest magnitudes of the INT variables for expr_type.
+    """
+    true_division = uses_true_division(tree)
+    stores = assignments(tree)
+
+    # Making a variable an OBJECT can only make the ones computed from
+    # it OBJECTs too, so this stops once every INT fits.
+    objects = {}
+    bounds = None
+    while True:
+        types = propagate(stores, objects, true_division, bounds)
+        bounds = value_bounds(tree, types)
+        unfit = set(name for name in types
+                    if types[name] == INT and not fits(bounds[name]))
+        # A value can fit while something it is computed from on the
+        # way doesn't
+        unfit.update(name for name, value in stores
+                     if types[name] == INT and isinstance(value, ast.AST) and
+                     as_number(expr_type(value, types, true_division,
+                                         bounds)) != INT)
+        if not unfit:
+            return types, bounds
+        objects.update(dict.fromkeys(unfit, OBJECT))
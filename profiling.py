@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Not on unix
+    resource = None
+
+
+def peak_rss_kb():
+    """
+    Most memory this process has had resident so far, in KiB,
+    or None if it can't be found.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # Bytes instead of KiB
+        rss //= 1024
+    return rss
+
+
+class CountingSink(object):
+    """
+    File-like sink that counts what is written through it to another.
+    """
+
+    __slots__ = ("sink", "size", "lines")
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.size = 0
+        self.lines = 0
+
+    def write(self, text):
+        self.size += len(text)
+        self.lines += text.count("\n")
+        self.sink.write(text)
+
+
+class Profile(object):
+    """
+    Measurements of each stage of a translation, in the order the
+    stages ran, and counts of what it worked on. Pass one to
+    translate.translate_source to fill it in.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.counts = {}
+
+    def count(self, name, n=1):
+        """
+        Add n to the count of name.
+        """
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Measure the code run in the with block as the stage name.
+        """
+        start_rss = peak_rss_kb()
+        start = time.time()
+        try:
+            yield
+        finally:
+            stage = {
+                "name": name,
+                "seconds": time.time() - start,
+                "peak_rss_kb": peak_rss_kb(),
+            }
+            if start_rss is not None:
+                # How much further the stage took the peak, which is
+                # how much more memory it needed than any stage before
+                stage["peak_rss_growth_kb"] = \
+                    stage["peak_rss_kb"] - start_rss
+            self.stages.append(stage)
+
+    def as_dict(self):
+        return {
+            "stages": self.stages,
+            "seconds": sum(stage["seconds"] for stage in self.stages),
+            "counts": self.counts,
+        }
+
+
+@contextmanager
+def _no_stage():
+    yield
+
+
+def stage(profile, name):
+    """
+    profile.stage(name), or a context manager that does nothing if
+    there is no profile.
+    """
+    if profile is None:
+        return _no_stage()
+    return profile.stage(name)
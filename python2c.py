@@ -4,9 +4,17 @@ from __future__ import print_function
 
 import sys
 import os
+import glob
+import json
 import shutil
 import subprocess
+import tempfile
 
+import batch
+import build
+import cache
+import profiling
+import runtime
 import translate
 
 
@@ -35,7 +43,7 @@ def which(program):
     return None
 
 
-def memory_check(translated_code):
+def memory_check(translated_code, amalgamated=False):
     """
     Run valgrind to see if there are any errors.
     """
@@ -44,79 +52,104 @@ def memory_check(translated_code):
               file=sys.stderr)
         return 1
 
-    if not error_check_c(translated_code):
-        print("Could not find compile the C to run the memory check.",
-              file=sys.stderr)
-        return 1
-
-    tmpfilename = "hopefully_there_arent_any_other_files_with_this_name"
-    tmpfile = open(tmpfilename + ".c", "w")
-    tmpfile.write(translated_code)
-    tmpfile.close()
-
-    p = subprocess.Popen("gcc {}.c c_utils/*.c -o {}".format(tmpfilename,
-                         tmpfilename), shell=True)
-    p.communicate()
+    directory = tempfile.mkdtemp(prefix="py2c-")
+    try:
+        executable = runtime.compile_program(translated_code, directory,
+                                             amalgamated=amalgamated)
+        if executable is None:
+            print("Could not generate an executable due to an error.",
+                  file=sys.stderr)
+            return 1
 
-    if os.path.exists(tmpfilename):
         print(subprocess.check_output(
-            "valgrind --dsymutil=yes --track-origins=yes ./{}"
-            .format(tmpfilename).split()), end=""
-        )
-        os.remove(tmpfilename)
-        shutil.rmtree(tmpfilename + ".dSYM")
-    else:
-        print("Could not generate an executable due to an error.",
-              file=sys.stderr)
-    os.remove(tmpfilename + ".c")
+            ["valgrind", "--dsymutil=yes", "--track-origins=yes", executable]
+        ), end="")
+    finally:
+        shutil.rmtree(directory)
 
     return 0
 
 
-def error_check_c(translated_code, execute=False):
+def alloc_report(translated_code, amalgamated=False):
     """
-    Check to see if there are any errors by checking the return
-    status of gcc after attempting to compile the translated_code.
+    Compile the code against a runtime that accounts for every
+    allocation, run it and let it print its allocation report
+    (to stderr) at exit. Much faster than the memory check, though
+    it only sees the runtime's own allocations.
     """
-    tmpfilename = "hopefully_there_arent_any_other_files_with_this_name"
-    tmpfile = open(tmpfilename + ".c", "w")
-    tmpfile.write(translated_code)
-    tmpfile.close()
+    directory = tempfile.mkdtemp(prefix="py2c-")
+    try:
+        executable = runtime.compile_program(
+            translated_code, directory,
+            cflags=runtime.CFLAGS + runtime.TRACK_ALLOCS_CFLAGS,
+            amalgamated=amalgamated)
+        if executable is None:
+            print("Could not generate an executable due to an error.",
+                  file=sys.stderr)
+            return 1
+        returncode = subprocess.call([executable])
+    finally:
+        shutil.rmtree(directory)
+
+    return 0 if returncode == 0 else 2
 
-    p = subprocess.Popen("gcc {}.c c_utils/*.c -o {}".format(tmpfilename,
-                         tmpfilename), shell=True)
-    p.communicate()
 
-    if os.path.exists(tmpfilename):
-        if execute:
-            print(subprocess.check_output(["./" + tmpfilename]), end="")
+def error_check_c(translated_code, execute=False, amalgamated=False):
+    """
+    Check to see if there are any errors by checking the return
+    status of gcc after attempting to compile the translated_code.
+    """
+    directory = tempfile.mkdtemp(prefix="py2c-")
+    try:
+        executable = runtime.compile_program(translated_code, directory,
+                                             amalgamated=amalgamated)
+        if executable is None:
+            print("Could not generate an executable due to an error.",
+                  file=sys.stderr)
+        elif execute:
+            print(subprocess.check_output([executable]), end="")
         else:
             print("Successful compilation!")
-        os.remove(tmpfilename)
-    else:
-        print("Could not generate an executable due to an error.",
-              file=sys.stderr)
-    os.remove(tmpfilename + ".c")
+    finally:
+        shutil.rmtree(directory)
 
     # Success on 0 (return True)
-    return not p.returncode
+    return executable is not None
+
+
+def build_executable(translated_code, args):
+    """
+    Compile the code into args.build with the optimizations asked for,
+    printing how the builds compare if asked to.
+    """
+    modes = build.build_modes(args.opt_level, not args.portable, args.lto,
+                              args.pgo, args.amalgamate)
+    timings = build.build(translated_code, args.build, modes,
+                          report=args.build_report, command=args.pgo)
+    if timings is None:
+        print("Could not generate an executable due to an error.",
+              file=sys.stderr)
+        return 2
+    if args.build_report:
+        build.print_report(timings, sys.stderr)
+    return 0
 
 
 def error_check_python(filename):
     """
-    Check to see if there are any errors by checking the return
-    status of python after attempting to interpret the code.
-    """
-    with open(os.devnull, "w") as devnull:
-        p = subprocess.Popen("python {}".format(filename).split(),
-                             stdout=devnull)
-        p.communicate()
-        if p.returncode:
-            print("Coulf not interpret python code due to an error.",
-                  file=sys.stderr)
+    Check to see if there are any errors by compiling the code
+    in this process, without running it.
+    """
+    try:
+        with open(filename, "r") as f:
+            translate.validate(f.read(), filename)
+    except (IOError, SyntaxError, TypeError) as e:
+        print("Could not compile python code due to an error: {}".format(e),
+              file=sys.stderr)
+        return False
 
-    # Success on 0 (return True)
-    return not p.returncode
+    # Success on True
+    return True
 
 
 def get_args():
@@ -127,11 +160,36 @@ def get_args():
     from argparse import ArgumentParser
 
     parser = ArgumentParser(description="Convert python code to C code")
-    parser.add_argument("file", help=".py file to translate to C.")
+    parser.add_argument(
+        "files", nargs="*", metavar="file",
+        help=".py file to translate to C. Several files, directories or "
+        "glob patterns translate them all in batch mode, writing one .c "
+        "file per module."
+    )
+    parser.add_argument(
+        "--manifest",
+        help="File listing the modules to translate in batch mode, "
+        "one path per line."
+    )
+    parser.add_argument(
+        "-d", "--output-dir",
+        help="Directory to write the .c files to in batch mode. Defaults "
+        "to writing each one next to its module."
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int,
+        help="Number of processes to translate with in batch mode. "
+        "Defaults to the number of cores."
+    )
     parser.add_argument(
         "-s", "--indent-size", type=int, default=4,
         help="The number of spaces with which to represent each indent."
     )
+    parser.add_argument(
+        "-o", "--output",
+        help="File to write the C code to instead of stdout. The code is "
+        "streamed to it as it is generated."
+    )
     parser.add_argument(
         "-c", "--compile-check", default=False, action="store_true",
         help="Instead of printing to stdout, compile the generated code "
@@ -149,12 +207,160 @@ def get_args():
         "and run valgrind on it to see if there are any memory leaks "
         "in the C translation."
     )
+    parser.add_argument(
+        "-r", "--alloc-report", default=False, action="store_true",
+        help="Instead of printing to stdout, compile the generated code with "
+        "allocation accounting, run it and print a report of the "
+        "allocations, the peak and any leaked objects at exit. Runs at "
+        "native speed, unlike the memory check."
+    )
+    parser.add_argument(
+        "--build", metavar="EXECUTABLE",
+        help="Instead of printing to stdout, compile the generated code with "
+        "optimizations into the executable EXECUTABLE."
+    )
+    parser.add_argument(
+        "-O", "--opt-level", default="3", choices=runtime.OPT_LEVELS,
+        help="Optimization level to build with. Defaults to 3."
+    )
+    parser.add_argument(
+        "--portable", default=False, action="store_true",
+        help="Build for any machine of the same architecture instead of "
+        "with -march=native."
+    )
+    parser.add_argument(
+        "--lto", default=False, action="store_true",
+        help="Build with link time optimization, so calls into the runtime "
+        "can be inlined."
+    )
+    parser.add_argument(
+        "--pgo", nargs="?", const="{}", metavar="COMMAND",
+        help="Build twice, using a profile of the first build running "
+        "COMMAND to optimize the second. COMMAND is run by the shell with {} "
+        "standing for the executable. Defaults to running it on its own."
+    )
+    parser.add_argument(
+        "--build-report", default=False, action="store_true",
+        help="Also build with the default flags and with each optimization "
+        "added one at a time, run each build (through the --pgo command if "
+        "given) and report how their run times compare."
+    )
+    parser.add_argument(
+        "--amalgamate", default=False, action="store_true",
+        help="Output the generated code and the whole runtime as one C file "
+        "that compiles on its own, so the compiler can inline the runtime "
+        "into the program. -c, -e, -m, -r and --build compile it that way."
+    )
+    parser.add_argument(
+        "--arena", default=False, action="store_true",
+        help="Allocate the objects of main and every loop body in an arena "
+        "that is released in one shot when the scope exits."
+    )
+    parser.add_argument(
+        "--no-cache", default=False, action="store_true",
+        help="Always translate from scratch instead of reusing the C "
+        "generated for the same source and options before. The cache is "
+        "kept in $PY2C_CACHE_DIR (~/.cache/python2c by default)."
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const="-", dest="profile_output",
+        metavar="FILE",
+        help="Report the time and memory taken by each stage of the "
+        "translation, along with counts of the nodes, blocks and variables "
+        "it went through and the size of the C, as JSON to FILE (stderr if "
+        "not given). Memory is measured as the peak RSS of the process "
+        "after each stage. The cache is not used."
+    )
+    parser.add_argument(
+        "--profile-dump", metavar="FILE",
+        help="Run the translation under cProfile and dump the stats to FILE "
+        "for pstats or snakeviz."
+    )
     parser.add_argument(
         "-a", "--ast-tree", default=False, action="store_true",
         help="Print the abstract syntax tree of the python code."
     )
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    args.cache = None if args.no_cache else cache.TranslationCache()
+    args.profile = None
+    if args.profile_output:
+        args.profile = profiling.Profile()
+        args.cache = None
+    # A single path is only a batch if it names several modules, so a
+    # file that doesn't exist fails like any other
+    args.batch = bool(args.manifest or len(args.files) != 1 or
+                      os.path.isdir(args.files[0]) or
+                      (glob.has_magic(args.files[0]) and
+                       not os.path.isfile(args.files[0])))
+    if args.batch:
+        if not (args.files or args.manifest):
+            parser.error("no files to translate")
+        elif (args.output or args.compile_check or args.execute or
+                args.memory_check or args.alloc_report or args.ast_tree or
+                args.profile_output or args.profile_dump or args.build or
+                args.amalgamate):
+            parser.error("-o, -c, -e, -m, -r, -a, --build, --amalgamate and "
+                         "profiling take a single file")
+    else:
+        args.file = args.files[0]
+    if not args.build and (args.lto or args.pgo or args.portable or
+                           args.build_report):
+        parser.error("--lto, --pgo, --portable and --build-report need "
+                     "--build")
+    return args
+
+
+def batch_main(args):
+    """
+    Translate every module given, reporting the ones that fail
+    without stopping the rest.
+    """
+    paths = list(args.files)
+    if args.manifest:
+        paths.extend(batch.read_manifest(args.manifest))
+
+    results = batch.translate_batch(
+        paths, output_dir=args.output_dir, jobs=args.jobs,
+        indent_size=args.indent_size, use_arena=args.arena,
+        cache=args.cache)
+    return 1 if batch.report(results, sys.stderr) else 0
+
+
+def translate_file(args, output=None):
+    """
+    Translate args.file with the options given, under cProfile if
+    asked to.
+    """
+    options = dict(indent_size=args.indent_size, use_arena=args.arena,
+                   output=output, cache=args.cache, profile=args.profile)
+    if not args.profile_dump:
+        return translate.translate(args.file, **options)
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(translate.translate, args.file, **options)
+    finally:
+        profiler.dump_stats(args.profile_dump)
+
+
+def write_profile(args):
+    """
+    Write the profile of the translation as JSON.
+    """
+    report = {
+        "file": args.file,
+        "translator_version": translate.__version__,
+    }
+    report.update(args.profile.as_dict())
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.profile_output == "-":
+        print(text, file=sys.stderr)
+    else:
+        with open(args.profile_output, "w") as f:
+            f.write(text + "\n")
 
 
 def main():
@@ -167,23 +373,60 @@ def main():
     """
     args = get_args()
 
-    if not error_check_python(args.file):
+    if args.batch:
+        return batch_main(args)
+
+    with profiling.stage(args.profile, "validate"):
+        valid = error_check_python(args.file)
+    if not valid:
         return 1
     elif args.ast_tree:
         translate.prettyparseprintfile(args.file)
         return 0
 
-    translated_code = translate.translate(
-        args.file, indent_size=args.indent_size)
+    if args.amalgamate and not (args.compile_check or args.execute or
+                                args.memory_check or args.alloc_report or
+                                args.build):
+        # The runtime goes ahead of the code, so there is nothing to
+        # stream until the translation is done.
+        translated_code = runtime.amalgamate(translate_file(args))
+        if args.output:
+            with open(args.output, "w") as output:
+                output.write(translated_code)
+        else:
+            sys.stdout.write(translated_code)
+        if args.profile:
+            write_profile(args)
+        return 0
+    elif not (args.compile_check or args.execute or args.memory_check or
+              args.alloc_report or args.build):
+        # Stream straight to the output without building the whole
+        # translation in memory.
+        if args.output:
+            with open(args.output, "w") as output:
+                translate_file(args, output)
+        else:
+            translate_file(args, sys.stdout)
+        if args.profile:
+            write_profile(args)
+        return 0
+
+    translated_code = translate_file(args)
+    if args.profile:
+        write_profile(args)
 
     if args.compile_check:
-        return 0 if error_check_c(translated_code) else 2
+        return 0 if error_check_c(translated_code,
+                                  amalgamated=args.amalgamate) else 2
     elif args.execute:
-        return 0 if error_check_c(translated_code, True) else 2
+        return 0 if error_check_c(translated_code, True,
+                                  args.amalgamate) else 2
     elif args.memory_check:
-        return memory_check(translated_code)
-    else:
-        print(translated_code)
+        return memory_check(translated_code, args.amalgamate)
+    elif args.alloc_report:
+        return alloc_report(translated_code, args.amalgamate)
+    elif args.build:
+        return build_executable(translated_code, args)
 
     return 0
 
@@ -0,0 +1,417 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import glob
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+import cache
+
+try:
+    from shlex import quote
+except ImportError:
+    # Python 2
+    from pipes import quote
+
+# Directory the generated code includes the runtime headers relative to
+ROOT = os.path.dirname(os.path.abspath(__file__))
+RUNTIME_DIR = os.path.join(ROOT, "c_utils")
+
+CC = "gcc"
+CFLAGS = ["-O2"]
+# Added to CFLAGS to build the runtime with allocation accounting
+TRACK_ALLOCS_CFLAGS = ["-DPY2C_TRACK_ALLOCS"]
+LIBS = ["-lm"]
+
+# Optimization levels gcc takes after -O
+OPT_LEVELS = ("0", "1", "2", "3", "s", "fast")
+NATIVE_CFLAGS = ["-march=native"]
+# Link time optimization, so the program's calls into the runtime can
+# be inlined. The library then holds GIMPLE instead of machine code,
+# which needs the plugin aware archiver.
+LTO_CFLAGS = ["-flto"]
+AR = "ar"
+LTO_AR = "gcc-ar"
+
+INCLUDE_RE = re.compile(r'^#include "([^"]+)"[^\n]*\n', re.MULTILINE)
+SYSTEM_INCLUDE_RE = re.compile(r"^#include <[^>]+>$", re.MULTILINE)
+# Header of every runtime module, included by generated code
+MODULE_INCLUDE_RE = re.compile(r'^#include "c_utils/(\w+)\.h"$', re.MULTILINE)
+
+COMMENT_RE = re.compile(r"/\*.*?\*/|//[^\n]*", re.DOTALL)
+STRING_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+IDENTIFIER_RE = re.compile(r"\b[A-Za-z_]\w*\b")
+
+# What a header makes available: functions (declared or defined
+# inline), extern globals, macros and typedef names.
+SYMBOL_RES = (
+    re.compile(r"^(?!typedef|struct|extern|return)[A-Za-z_][\w \t*]*?\b(\w+)\(",
+               re.MULTILINE),
+    re.compile(r"^extern [^;]*?(\w+);", re.MULTILINE),
+    re.compile(r"^#define (?!__)(\w+)", re.MULTILINE),
+    re.compile(r"^(?:typedef [^;{]*?|\} ?)(\w+);", re.MULTILINE),
+)
+
+_module_symbols = None
+_dependency_map = None
+
+
+def optimization_cflags(opt_level="2", native=False, lto=False):
+    """
+    Flags for an optimized build.
+    opt_level:
+        What follows -O, one of OPT_LEVELS.
+    native:
+        Tune for and use every instruction of the machine building it.
+        The executable may not run on older machines.
+    lto:
+        Optimize the program and the runtime together at link time.
+    """
+    if opt_level not in OPT_LEVELS:
+        raise ValueError("Unknown optimization level: {}".format(opt_level))
+    cflags = ["-O" + opt_level]
+    if native:
+        cflags.extend(NATIVE_CFLAGS)
+    if lto:
+        cflags.extend(LTO_CFLAGS)
+    return cflags
+
+
+def runtime_sources():
+    """
+    Paths of every source and header of the runtime, sorted.
+    """
+    return sorted(glob.glob(os.path.join(RUNTIME_DIR, "*.c")) +
+                  glob.glob(os.path.join(RUNTIME_DIR, "*.h")))
+
+
+def runtime_c_files(modules=None):
+    """
+    Paths of the .c files of the runtime, sorted.
+    modules:
+        Only those of these modules.
+    """
+    if modules is not None:
+        return sorted(os.path.join(RUNTIME_DIR, module + ".c")
+                      for module in modules)
+    return sorted(glob.glob(os.path.join(RUNTIME_DIR, "*.c")))
+
+
+def runtime_modules():
+    """
+    Names of the runtime modules (a .c file and its header), in the
+    order utils.h includes them, which puts each module after the ones
+    its header needs.
+    """
+    with open(os.path.join(RUNTIME_DIR, "utils.h"), "r") as f:
+        return [os.path.splitext(name)[0]
+                for name in INCLUDE_RE.findall(f.read())]
+
+
+def identifiers(text):
+    """
+    Set of the identifiers in C code, leaving out comments and the
+    insides of string literals.
+    """
+    return set(IDENTIFIER_RE.findall(STRING_RE.sub('""',
+                                                   COMMENT_RE.sub("", text))))
+
+
+def module_symbols():
+    """
+    Map of every name a runtime header makes available to the
+    module it belongs to.
+    """
+    global _module_symbols
+    if _module_symbols is None:
+        _module_symbols = {}
+        for module in runtime_modules():
+            with open(os.path.join(RUNTIME_DIR, module + ".h"), "r") as f:
+                text = COMMENT_RE.sub("", f.read())
+            for symbol_re in SYMBOL_RES:
+                for name in symbol_re.findall(text):
+                    _module_symbols.setdefault(name, module)
+    return _module_symbols
+
+
+def modules_used(names):
+    """
+    Runtime modules that code using names calls into directly, in
+    the order of runtime_modules.
+    names:
+        Identifiers of the code (see identifiers).
+    """
+    symbols = module_symbols()
+    used = set(symbols[name] for name in names if name in symbols)
+    return [module for module in runtime_modules() if module in used]
+
+
+def dependency_map():
+    """
+    Map of every runtime module to the set of other modules its
+    source and header use, found the same way as for generated code.
+    """
+    global _dependency_map
+    if _dependency_map is None:
+        _dependency_map = {}
+        for module in runtime_modules():
+            names = set()
+            for extension in (".h", ".c"):
+                with open(os.path.join(RUNTIME_DIR, module + extension),
+                          "r") as f:
+                    names |= identifiers(f.read())
+            _dependency_map[module] = \
+                set(modules_used(names)) - set([module])
+    return _dependency_map
+
+
+def required_modules(modules):
+    """
+    The modules and every module they depend on, directly or not, in
+    the order of runtime_modules. These are the sources a program
+    using the modules has to be built from.
+    """
+    dependencies = dependency_map()
+    required = set()
+    stack = list(modules)
+    while stack:
+        module = stack.pop()
+        if module not in required:
+            required.add(module)
+            stack.extend(dependencies[module])
+    return [module for module in runtime_modules() if module in required]
+
+
+def included_modules(code):
+    """
+    Runtime modules whose headers translated code includes, which the
+    translator picks from what the code uses.
+    """
+    return MODULE_INCLUDE_RE.findall(code)
+
+
+def _inline_includes(text, directory, seen):
+    """
+    Replace every local #include in text with the file it includes,
+    leaving out files that were already included.
+    directory:
+        Directory the includes are relative to.
+    seen:
+        Paths of the files included so far. Updated in place.
+    """
+    def include(match):
+        path = os.path.normpath(os.path.join(directory, match.group(1)))
+        if path in seen:
+            return ""
+        seen.add(path)
+        with open(path, "r") as f:
+            text = f.read()
+        return "// {}\n{}\n".format(
+            os.path.relpath(path, ROOT),
+            _inline_includes(text, os.path.dirname(path), seen))
+    return INCLUDE_RE.sub(include, text)
+
+
+def amalgamate(code):
+    """
+    Join translated code and the whole runtime into a single C file
+    that compiles on its own, so the compiler sees the runtime and
+    the program together and can inline across them without LTO.
+    Only the modules the code needs are put in. Their headers come
+    first, each once, then their sources, then the program.
+    code:
+        C code generated by translate.
+    """
+    modules = required_modules(included_modules(code))
+    umbrella = os.path.join(RUNTIME_DIR, "utils.h")
+    with open(umbrella, "r") as f:
+        # The C library headers the runtime sources get from utils.h
+        parts = ["\n".join(SYSTEM_INCLUDE_RE.findall(f.read())) + "\n"]
+
+    seen = set([umbrella])
+    for module in modules:
+        parts.append(_inline_includes('#include "{}.h"\n'.format(module),
+                                      RUNTIME_DIR, seen))
+    for source in runtime_c_files(modules):
+        with open(source, "r") as f:
+            text = f.read()
+        parts.append("// {}\n{}".format(os.path.relpath(source, ROOT),
+                                        _inline_includes(text, RUNTIME_DIR,
+                                                         seen)))
+    parts.append(_inline_includes(code, ROOT, seen))
+    return "\n".join(parts)
+
+
+def runtime_digest(cflags=CFLAGS):
+    """
+    Hash of the runtime sources and the flags they are compiled with.
+    The library only needs rebuilding when this changes.
+    """
+    h = hashlib.sha256(" ".join([CC] + list(cflags)).encode("utf-8"))
+    for path in runtime_sources():
+        h.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def library_directory():
+    return os.path.join(cache.default_directory(), "runtime")
+
+
+def build_runtime(cflags=CFLAGS, log=None):
+    """
+    Compile the runtime into a static library, unless one was already
+    built from the same sources and flags.
+    log:
+        File to write the compiler's messages to instead of stderr.
+    Returns the path of the library, or None if it couldn't be built.
+    """
+    directory = library_directory()
+    library = os.path.join(
+        directory, "libpy2c-{}.a".format(runtime_digest(cflags)[:16]))
+    if os.path.exists(library):
+        return library
+
+    build_dir = tempfile.mkdtemp(prefix="py2c-runtime-")
+    try:
+        objects = []
+        for source in runtime_c_files():
+            obj = os.path.join(
+                build_dir, os.path.basename(source)[:-len(".c")] + ".o")
+            if subprocess.call([CC, "-c", source, "-o", obj] + list(cflags),
+                               stdout=log, stderr=log):
+                return None
+            objects.append(obj)
+
+        archive = os.path.join(build_dir, "libpy2c.a")
+        ar = LTO_AR if "-flto" in cflags else AR
+        if subprocess.call([ar, "rcs", archive] + objects,
+                           stdout=log, stderr=log):
+            return None
+
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another run may have made it first
+                if not os.path.isdir(directory):
+                    raise
+        # Renaming is atomic, so a concurrent run either sees the
+        # whole library or none of it.
+        tmp_library = "{}.{}.tmp".format(library, os.getpid())
+        shutil.copy(archive, tmp_library)
+        os.rename(tmp_library, library)
+    finally:
+        shutil.rmtree(build_dir)
+
+    return library
+
+
+def compile_program(code, directory, name="program", cflags=CFLAGS,
+                    log=None, amalgamated=False):
+    """
+    Compile translated code against the runtime library.
+    code:
+        C code generated by translate.
+    directory:
+        Directory to write the source and executable to.
+    log:
+        File to write the compiler's messages to instead of stderr.
+    amalgamated:
+        Compile the code and the runtime as one file (see amalgamate)
+        instead of linking the library.
+    Returns the path of the executable, or None if it didn't compile.
+    """
+    if amalgamated:
+        code = amalgamate(code)
+        runtime = []
+    else:
+        library = build_runtime(cflags, log)
+        if library is None:
+            return None
+        runtime = [library]
+
+    source = os.path.join(directory, name + ".c")
+    executable = os.path.join(directory, name)
+    with open(source, "w") as f:
+        f.write(code)
+
+    command = ([CC, source, "-I", ROOT, "-o", executable] + list(cflags) +
+               runtime + LIBS)
+    if (subprocess.call(command, stdout=log, stderr=log) or
+            not os.path.exists(executable)):
+        return None
+    return executable
+
+
+def run_training(command, executable, log=None):
+    """
+    Run the command that exercises a program for profile guided
+    optimization.
+    command:
+        Shell command with {} standing for the path of the executable.
+    Returns the exit status.
+    """
+    command = command.replace("{}", quote(executable))
+    with open(os.devnull, "w") as devnull:
+        return subprocess.call(command, shell=True, stdout=devnull,
+                               stderr=log)
+
+
+def compile_program_pgo(code, directory, train="{}", name="program",
+                        cflags=CFLAGS, log=None, amalgamated=False):
+    """
+    Compile translated code in two phases: once instrumented to record
+    which branches and calls are taken while the training command runs,
+    then again using that profile.
+    The runtime is compiled from source along with the program instead
+    of being linked from the library, so it is optimized for the same
+    profile.
+    code:
+        C code generated by translate.
+    directory:
+        Directory to write the source, the profile and the executable to.
+    train:
+        Shell command to train with, with {} standing for the path of the
+        instrumented executable. Defaults to just running it.
+    log:
+        File to write the compiler's messages to instead of stderr.
+    amalgamated:
+        Compile the code and the runtime as one file (see amalgamate).
+    Returns the path of the executable, or None if it didn't compile or
+    the training failed.
+    """
+    source = os.path.join(directory, name + ".c")
+    executable = os.path.join(directory, name)
+    profile_dir = os.path.join(directory, "profile")
+    with open(source, "w") as f:
+        f.write(amalgamate(code) if amalgamated else code)
+    sources = [source]
+    if not amalgamated:
+        sources += runtime_c_files(required_modules(included_modules(code)))
+
+    # Both phases must write the same output, since the profile of each
+    # object is named after it.
+    command = ([CC] + sources + ["-I", ROOT, "-o", executable] +
+               list(cflags))
+    if subprocess.call(command + ["-fprofile-generate=" + profile_dir] + LIBS,
+                       stdout=log, stderr=log):
+        return None
+    if run_training(train, executable, log):
+        return None
+
+    # Code the training never reached has no profile, which is fine
+    os.remove(executable)
+    if (subprocess.call(command + ["-fprofile-use=" + profile_dir,
+                                   "-fprofile-partial-training",
+                                   "-Wno-missing-profile"] + LIBS,
+                        stdout=log, stderr=log) or
+            not os.path.exists(executable)):
+        return None
+    return executable
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+
+class Scope(object):
+    """
+    Symbol table for the variables declared in one block.
+
+    Scopes are chained to the scope of the enclosing block instead of
+    copying its variables, so lookups walk up the chain and a nested
+    block can shadow a variable of an outer one.
+    """
+
+    __slots__ = ("symbols", "parent", "counter")
+
+    def __init__(self, parent=None):
+        """
+        parent:
+            Scope of the enclosing block, if any.
+        """
+        self.symbols = {}
+        self.parent = parent
+        self.counter = 0
+
+    def declare(self, var):
+        """
+        Add a variable (an ExprBlock) to this scope.
+        """
+        if var.name in self.symbols:
+            raise Exception(
+                ("Attempted to add variable '{}' to a scope when it "
+                 "already exists: {}")
+                .format(var, map(str, self.symbols.values())))
+        self.symbols[var.name] = var
+
+    def is_local(self, name):
+        """
+        Check if a variable is declared in this scope itself (not
+        an enclosing one).
+        """
+        return name in self.symbols
+
+    def lookup(self, name):
+        """
+        Return the variable visible from this scope with the name,
+        or None if there isn't one.
+        """
+        scope = self
+        while scope is not None:
+            var = scope.symbols.get(name)
+            if var is not None:
+                return var
+            scope = scope.parent
+        return None
+
+    def __contains__(self, name):
+        return self.lookup(name) is not None
+
+    def unique_name(self, prefix):
+        """
+        Return a name starting with prefix that no other call on any
+        scope in the same chain has returned.
+        """
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        name = "{}{}".format(prefix, root.counter)
+        root.counter += 1
+        return name
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Long-running translation server.
+
+Keeps the translator imported and warm and answers requests over a
+Unix domain socket. Each request and response is one JSON object on
+its own line.
+
+Request:
+    action:
+        "translate", "compile" or "execute".
+    source:
+        Python source to work on. Alternatively, "file" is the path of
+        a file to read it from.
+    filename:
+        Name to use for the source in error messages.
+    indent_size, use_arena:
+        Same as the options of translate.translate.
+    cache:
+        Whether to use the translation cache. Defaults to true.
+
+Response:
+    ok:
+        Whether the request succeeded.
+    error:
+        Why it didn't, if it didn't.
+    code:
+        The generated C.
+    output, returncode:
+        What the program printed and exited with, for "execute".
+    log:
+        Messages from the compiler, for "compile" and "execute".
+"""
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+import cache
+import runtime
+import translate
+
+ACTIONS = ("translate", "compile", "execute")
+
+
+def default_socket_path():
+    """
+    $PY2C_SOCKET, or a socket private to the user in the runtime or
+    temp directory.
+    """
+    path = os.environ.get("PY2C_SOCKET")
+    if path:
+        return path
+    directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, "python2c-{}.sock".format(os.getuid()))
+
+
+def compile_and_run(code, execute):
+    """
+    Compile the generated code and, if execute, run it.
+    Returns the fields of the response.
+    """
+    directory = tempfile.mkdtemp(prefix="py2c-")
+    try:
+        with tempfile.TemporaryFile(mode="w+") as log:
+            executable = runtime.compile_program(code, directory, log=log)
+            log.seek(0)
+            response = {"ok": executable is not None, "log": log.read()}
+        if executable is None:
+            response["error"] = "Could not generate an executable."
+        elif execute:
+            p = subprocess.Popen([executable], stdout=subprocess.PIPE,
+                                 stderr=subprocess.STDOUT)
+            response["output"] = p.communicate()[0].decode("utf-8",
+                                                           "replace")
+            response["returncode"] = p.returncode
+    finally:
+        shutil.rmtree(directory)
+    return response
+
+
+def handle_request(request, translation_cache=None):
+    """
+    Carry out one request (a dict, see the module docstring).
+    Errors are returned in the response rather than raised.
+    translation_cache:
+        TranslationCache to use unless the request turns it off.
+    Returns the response dict.
+    """
+    action = request.get("action", "translate")
+    if action not in ACTIONS:
+        return {"ok": False, "error": "Unknown action '{}'".format(action)}
+
+    try:
+        source = request.get("source")
+        filename = request.get("filename", "<string>")
+        if source is None:
+            filename = request["file"]
+            with open(filename, "r") as f:
+                source = f.read()
+        if not isinstance(source, bytes):
+            # Source decoded from JSON is unicode, which python 2 won't
+            # compile if it has a coding declaration
+            source = source.encode("utf-8")
+
+        # Validate without executing the program
+        translate.validate(source, filename)
+
+        code = translate.translate_source(
+            source,
+            indent_size=request.get("indent_size", 4),
+            use_arena=request.get("use_arena", False),
+            cache=translation_cache if request.get("cache", True) else None)
+    except KeyError:
+        return {"ok": False, "error": "Request needs a source or a file"}
+    except SyntaxError as e:
+        return {"ok": False, "error": "SyntaxError: {} ({}, line {})"
+                .format(e.msg, e.filename, e.lineno)}
+    except Exception as e:
+        return {"ok": False, "error": "{}: {}".format(type(e).__name__, e)}
+
+    response = {"ok": True, "code": code}
+    if action != "translate":
+        response.update(compile_and_run(code, action == "execute"))
+    return response
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line.decode("utf-8"))
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be an object")
+            except ValueError as e:
+                response = {"ok": False, "error": "Bad request: {}".format(e)}
+            else:
+                response = handle_request(request, self.server.cache)
+            try:
+                self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                self.wfile.flush()
+            except socket.error:
+                # The client went away
+                return
+
+    def finish(self):
+        try:
+            socketserver.StreamRequestHandler.finish(self)
+        except socket.error:
+            pass
+
+
+class TranslationServer(socketserver.ForkingMixIn,
+                        socketserver.UnixStreamServer):
+    """
+    Unix socket server that forks a child per connection, so the
+    translator's global state (like Block.indent) is never shared
+    between requests while the parent stays warm.
+    """
+
+    def __init__(self, path, translation_cache=None):
+        self.path = path
+        self.cache = translation_cache
+        socketserver.UnixStreamServer.__init__(self, path, RequestHandler)
+        # Only the user who started the server may talk to it
+        os.chmod(path, 0o600)
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def serve(path=None, use_cache=True):
+    """
+    Run the server until interrupted.
+    """
+    path = path or default_socket_path()
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except socket.error:
+            # Left over from a server that didn't shut down cleanly
+            os.remove(path)
+        else:
+            print("A server is already listening on {}".format(path),
+                  file=sys.stderr)
+            return 1
+        finally:
+            probe.close()
+
+    # Build the runtime library up front so the first compile is fast
+    runtime.build_runtime()
+
+    server = TranslationServer(
+        path, cache.TranslationCache() if use_cache else None)
+    print("Listening on {}".format(path), file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def main():
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Serve translations over a socket")
+    parser.add_argument(
+        "socket", nargs="?",
+        help="Path of the socket. Defaults to $PY2C_SOCKET or "
+        "python2c-<uid>.sock in the runtime directory."
+    )
+    parser.add_argument(
+        "--no-cache", default=False, action="store_true",
+        help="Don't use the translation cache."
+    )
+    args = parser.parse_args()
+    return serve(args.socket, use_cache=not args.no_cache)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Helpers for tests that translate a small program, run it and compare
+what it prints with what python prints.
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+import runtime  # noqa: E402
+import translate  # noqa: E402
+
+# The translator, and the programs it translates, are python 2
+skip_unless_python2 = unittest.skipIf(sys.version_info[0] > 2,
+                                      "The translator runs on python 2")
+
+
+def run_python(source):
+    """
+    Run source with this interpreter.
+    Returns (output, returncode).
+    """
+    p = subprocess.Popen([sys.executable, "-c", source],
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    output = p.communicate()[0]
+    return output.decode("utf-8"), p.returncode
+
+
+def run_translated(source, use_arena=False):
+    """
+    Translate source, compile it and run it.
+    Returns (output, returncode).
+    """
+    directory = tempfile.mkdtemp(prefix="py2c-test-")
+    try:
+        code = translate.translate_source(source, use_arena=use_arena)
+        with open(os.path.join(directory, "cc.log"), "w+") as log:
+            executable = runtime.compile_program(code, directory, log=log)
+            log.seek(0)
+            if executable is None:
+                raise AssertionError("Could not compile:\n{}\n{}".format(
+                    code, log.read()))
+        p = subprocess.Popen([executable], stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE)
+        output = p.communicate()[0]
+        return output.decode("utf-8"), p.returncode
+    finally:
+        shutil.rmtree(directory)
+
+
+class ProgramTestCase(unittest.TestCase):
+    """
+    Test case for checking translated programs against python.
+    """
+
+    def assertSameOutput(self, source, use_arena=False):
+        """
+        Check that the translation of source prints the same as python
+        running it, and exits the same way.
+        """
+        source = "from __future__ import print_function\n" + source
+        expected, expected_code = run_python(source)
+        self.assertEqual(expected_code, 0, "python failed on:\n" + source)
+        output, code = run_translated(source, use_arena=use_arena)
+        self.assertEqual(output, expected)
+        self.assertEqual(code, 0)
+
+    def assertFailsWith(self, source, error):
+        """
+        Check that the translation of source exits with an error whose
+        message starts with error, like python does.
+        """
+        source = "from __future__ import print_function\n" + source
+        directory = tempfile.mkdtemp(prefix="py2c-test-")
+        try:
+            code = translate.translate_source(source)
+            executable = runtime.compile_program(code, directory)
+            self.assertIsNotNone(executable)
+            p = subprocess.Popen([executable], stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE)
+            stderr = p.communicate()[1].decode("utf-8")
+        finally:
+            shutil.rmtree(directory)
+        self.assertNotEqual(p.returncode, 0)
+        self.assertTrue(stderr.startswith(error), stderr)
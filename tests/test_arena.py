@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import unittest
+
+from helpers import ProgramTestCase, skip_unless_python2
+
+
+@skip_unless_python2
+class ArenaTest(ProgramTestCase):
+    """
+    Programs translated with --arena, whose objects outlive the loop
+    bodies they are made in.
+    """
+
+    def test_shared_list(self):
+        # Containers holding the list have to see it change
+        self.assertSameOutput(
+            "inner = [1]\n"
+            "outer = [inner, inner]\n"
+            "d = {'k': inner}\n"
+            "inner[0] = 2\n"
+            "print(outer)\n"
+            "print(d)\n",
+            use_arena=True)
+
+    def test_list_made_in_loop(self):
+        self.assertSameOutput(
+            "keep = []\n"
+            "rows = {}\n"
+            "for i in range(5):\n"
+            "    row = [i, 'x', 2.5]\n"
+            "    rows[i] = row\n"
+            "    keep = [keep, row]\n"
+            "    row[1] = i*10\n"
+            "print(keep)\n"
+            "print(rows[3])\n"
+            "print(row)\n",
+            use_arena=True)
+
+    def test_values_kept_after_loop(self):
+        self.assertSameOutput(
+            "s = {0}\n"
+            "for i in range(3):\n"
+            "    word = 'w'\n"
+            "    big = 2**70*(i + 1)\n"
+            "    s = {big}\n"
+            "print(word)\n"
+            "print(big)\n"
+            "print(s)\n",
+            use_arena=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from helpers import ROOT, skip_unless_python2
+
+import batch
+import cache
+import translate
+
+MODULES = {
+    "a.py": ("from __future__ import print_function\n"
+             "for i in range(3):\n"
+             "    print(i)\n"),
+    os.path.join("pkg", "b.py"): ("from __future__ import print_function\n"
+                                  "print('b')\n"),
+    os.path.join("pkg", "broken.py"): "for i in:\n",
+}
+
+
+@skip_unless_python2
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="py2c-test-")
+        self.src = os.path.join(self.directory, "src")
+        for name, source in MODULES.items():
+            path = os.path.join(self.src, name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, "w") as f:
+                f.write(source)
+        self.out = os.path.join(self.directory, "out")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_cli(self, *args):
+        p = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "python2c.py")] + list(args),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = p.communicate()
+        return p.returncode, stdout.decode("utf-8"), stderr.decode("utf-8")
+
+    def check_translated(self, name, module=None):
+        """
+        Check the .c file for a module is its translation.
+        """
+        module = module or name + ".py"
+        with open(os.path.join(self.out, name + ".c"), "r") as f:
+            self.assertEqual(
+                f.read(),
+                translate.translate(os.path.join(self.src, module)) + "\n")
+
+    def test_translate_batch(self):
+        results = batch.translate_batch([self.src], output_dir=self.out,
+                                         jobs=2)
+        self.assertEqual([os.path.relpath(result.source, self.src)
+                          for result in results],
+                         ["a.py", os.path.join("pkg", "b.py"),
+                          os.path.join("pkg", "broken.py")])
+        self.assertEqual([result.ok for result in results],
+                         [True, True, False])
+        self.assertTrue(results[2].error.startswith("SyntaxError"))
+        self.check_translated("a")
+        self.check_translated(os.path.join("pkg", "b"))
+        # A failed module leaves nothing behind
+        self.assertEqual(sorted(os.listdir(os.path.join(self.out, "pkg"))),
+                         ["b.c"])
+
+        stream = io.BytesIO()
+        self.assertEqual(batch.report(results, stream), 1)
+        self.assertIn("Translated 2 of 3 modules.", stream.getvalue())
+
+    def test_translate_batch_with_cache(self):
+        c = cache.TranslationCache(os.path.join(self.directory, "cache"))
+        for _ in range(2):
+            results = batch.translate_batch([self.src], output_dir=self.out,
+                                            jobs=2, cache=c)
+            self.assertEqual([result.ok for result in results],
+                             [True, True, False])
+            self.check_translated("a")
+        self.assertEqual(len(list(c.entries())), 2)
+
+    def test_glob_and_manifest(self):
+        manifest = os.path.join(self.directory, "manifest.txt")
+        with open(manifest, "w") as f:
+            f.write(os.path.join(self.src, "a.py") + "\n")
+        code, _, stderr = self.run_cli(
+            "--no-cache", "-d", self.out, "--manifest", manifest,
+            os.path.join(self.src, "pkg", "?.py"))
+        self.assertEqual(code, 0, stderr)
+        self.assertIn("Translated 2 of 2 modules.", stderr)
+        self.check_translated("a")
+        self.check_translated("b", os.path.join("pkg", "b.py"))
+
+    def test_directory_is_a_batch(self):
+        code, _, stderr = self.run_cli("--no-cache", "-d", self.out, self.src)
+        self.assertEqual(code, 1)
+        self.assertIn("Translated 2 of 3 modules.", stderr)
+
+    def test_missing_file_is_not_a_batch(self):
+        missing = os.path.join(self.src, "missing.py")
+        code, stdout, stderr = self.run_cli("--no-cache", missing)
+        self.assertNotEqual(code, 0)
+        self.assertNotIn("modules", stderr)
+        self.assertIn("No such file", stdout + stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import unittest
+
+from helpers import ProgramTestCase, skip_unless_python2
+
+
+@skip_unless_python2
+class BignumTest(ProgramTestCase):
+    """
+    Integers too big for a long, which the runtime keeps as bignums.
+    """
+
+    def test_arithmetic(self):
+        self.assertSameOutput(
+            "x = 2**100\n"
+            "y = -3**70\n"
+            "for v in [x + y, x - y, x*y, x // y, x % y, y // 7, y % 7,\n"
+            "          -x, x*x // (x - 1), (x + 1) - x]:\n"
+            "    print(v)\n")
+
+    def test_overflowing_accumulator(self):
+        self.assertSameOutput(
+            "h = 1\n"
+            "for i in range(40):\n"
+            "    h = h*31 + i\n"
+            "print(h)\n")
+
+    def test_right_shift(self):
+        self.assertSameOutput(
+            "x = 2**100\n"
+            "print(x >> 3)\n"
+            "for v in [-x >> 3, x >> 200, -x >> 200, -(x + 1) >> 1,\n"
+            "          (x*x - 1) >> 64]:\n"
+            "    print(v)\n")
+
+    def test_bitwise_operators(self):
+        # Negative integers act as their infinite two's complement
+        self.assertSameOutput(
+            "x = 2**100\n"
+            "m = -2**63\n"
+            "for v in [x & (x - 1), x | 5, x ^ -1, -x & 0xff, -x | 1,\n"
+            "          -x ^ x, (x - 1) & -(x - 1), -x & (-x - 7),\n"
+            "          (m*2) & m, m ^ -1, (m - 1) | m]:\n"
+            "    print(v)\n")
+
+    def test_outrageous_shift_count(self):
+        self.assertFailsWith(
+            "x = 2**100\n"
+            "print(1 >> x)\n",
+            "OverflowError")
+
+
+if __name__ == "__main__":
+    unittest.main()
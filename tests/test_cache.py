@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from helpers import skip_unless_python2
+
+import cache
+import translate
+
+SOURCE = (
+    "from __future__ import print_function\n"
+    "total = 0\n"
+    "for i in range(10):\n"
+    "    total = total + i\n"
+    "print(total)\n")
+
+
+@skip_unless_python2
+class TranslationCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="py2c-test-")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_cache(self, max_size=cache.DEFAULT_MAX_SIZE):
+        return cache.TranslationCache(self.directory, max_size=max_size)
+
+    def test_put_and_get(self):
+        c = self.make_cache()
+        key = c.key("x = 1\n", indent_size=4)
+        self.assertIsNone(c.get(key))
+        c.put(key, "int main(){}")
+        self.assertEqual(c.get(key), "int main(){}")
+        self.assertNotEqual(key, c.key("x = 1\n", indent_size=2))
+
+    def test_translate_hit(self):
+        c = self.make_cache()
+        code = translate.translate_source(SOURCE)
+        self.assertEqual(translate.translate_source(SOURCE, cache=c), code)
+        self.assertEqual(translate.translate_source(SOURCE, cache=c), code)
+
+    def test_streamed_translation(self):
+        # Streaming stores the entry as it goes, and a hit streams
+        # out the same code
+        c = self.make_cache()
+        expected = io.BytesIO()
+        translate.translate_source(SOURCE, output=expected)
+        for _ in range(2):
+            output = io.BytesIO()
+            translate.translate_source(SOURCE, output=output, cache=c)
+            self.assertEqual(output.getvalue(), expected.getvalue())
+        self.assertEqual(len(list(c.entries())), 1)
+        self.assertEqual(translate.translate_source(SOURCE, cache=c),
+                         translate.translate_source(SOURCE))
+
+    def test_failed_entry_is_dropped(self):
+        c = self.make_cache()
+        key = c.key("x = 1\n")
+        with self.assertRaises(ValueError):
+            with c.writer(key) as entry:
+                entry.write("int main(){")
+                raise ValueError()
+        self.assertIsNone(c.get(key))
+        for root, _, names in os.walk(self.directory):
+            self.assertFalse([name for name in names
+                              if name.endswith(".tmp")])
+
+    def test_size_is_shared(self):
+        # Every instance, like the ones of the processes of a batch
+        # translation, keeps the one total up to date
+        for i in range(4):
+            c = self.make_cache()
+            c.put(c.key(str(i)), "x"*99)
+        with c.locked():
+            self.assertEqual(c.read_size(), 400)
+
+    def test_evicts_least_recently_used(self):
+        c = self.make_cache(max_size=300)
+        keys = [c.key(str(i)) for i in range(4)]
+        for i, key in enumerate(keys):
+            c.put(key, "x"*99)
+            # Far enough apart for the modification times to tell
+            when = time.time() - 100 + i
+            os.utime(c.path(key), (when, when))
+            if i == 1:
+                # Using the first entry makes the second one the oldest
+                c.get(keys[0])
+        self.assertIsNone(c.get(keys[1]))
+        for key in (keys[0], keys[2], keys[3]):
+            self.assertEqual(c.get(key), "x"*99)
+        with c.locked():
+            self.assertEqual(c.read_size(), 300)
+
+    def test_lost_size_is_recounted(self):
+        c = self.make_cache()
+        c.put(c.key("a"), "x"*99)
+        os.remove(os.path.join(self.directory, cache.SIZE_FILE))
+        c.put(c.key("b"), "x"*99)
+        with c.locked():
+            self.assertEqual(c.read_size(), 200)
+
+    def test_clear(self):
+        c = self.make_cache()
+        key = c.key("a")
+        c.put(key, "x")
+        c.clear()
+        self.assertIsNone(c.get(key))
+        with c.locked():
+            self.assertEqual(c.read_size(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
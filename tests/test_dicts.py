@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import unittest
+
+from helpers import ProgramTestCase, skip_unless_python2
+
+# Grows the table past several resizes while deleting from it, so
+# lookups have to find keys that moved and skip the deleted ones
+CHURN = (
+    "t = {}\n"
+    "for i in range(0, 10000, 2):\n"
+    "    t[i] = i\n"
+    "    t[i + 1] = i + 1\n"
+    "    del t[i]\n"
+    "total = 0\n"
+    "for k in t:\n"
+    "    total = total + t[k]\n"
+    "print(total)\n"
+    "present = 0\n"
+    "for i in range(10000):\n"
+    "    present = present + (i in t)\n"
+    "print(present)\n"
+    "t[4] = 'back'\n"
+    "print(t[4])\n"
+    "print(t[9999])\n")
+
+
+@skip_unless_python2
+class DictTest(ProgramTestCase):
+    """
+    Dicts, which python 2 doesn't keep in any order, so these only
+    print ones with a single key.
+    """
+
+    def test_literal_and_subscripts(self):
+        self.assertSameOutput(
+            "d = {'a': 1, 'b': [1, 2], 3: 4.5}\n"
+            "print(d['a'])\n"
+            "print(d['b'])\n"
+            "print(d[3])\n"
+            "d['a'] += 10\n"
+            "print(d['a'])\n"
+            "del d['b']\n"
+            "del d[3]\n"
+            "print(d)\n"
+            "print({})\n")
+
+    def test_resize_with_deletes(self):
+        self.assertSameOutput(CHURN)
+
+    def test_resize_with_deletes_with_arena(self):
+        self.assertSameOutput(CHURN, use_arena=True)
+
+    def test_equal_keys(self):
+        # Equal numbers are the same key whatever their type, and so
+        # are equal bignums and strings that are different objects
+        self.assertSameOutput(
+            "d = {1: 'a'}\n"
+            "d[1.0] = 'b'\n"
+            "print(d)\n"
+            "print(1.0 in d)\n"
+            "x = 2**64\n"
+            "big = {x: 1}\n"
+            "print(x*1 in big)\n"
+            "print(-x in big)\n"
+            "print(2**64 - 1 + 1 in big)\n"
+            "s = {'ab': 2}\n"
+            "print(s['ab'])\n")
+
+    def test_missing_key(self):
+        self.assertFailsWith(
+            "d = {1: 2}\n"
+            "print(d[5])\n",
+            "KeyError: 5")
+
+    def test_delete_missing_key(self):
+        self.assertFailsWith(
+            "d = {1: 2}\n"
+            "del d[5]\n",
+            "KeyError: 5")
+
+    def test_unhashable_key(self):
+        self.assertFailsWith(
+            "d = {}\n"
+            "d[[1]] = 2\n",
+            "TypeError: unhashable type: 'list'")
+
+
+@skip_unless_python2
+class SetTest(ProgramTestCase):
+
+    def test_membership(self):
+        self.assertSameOutput(
+            "s = {1, 2, 3, 'x', 2.5}\n"
+            "print(2 in s)\n"
+            "print(2.0 in s)\n"
+            "print(7 not in s)\n"
+            "print('x' in s)\n"
+            "print('y' in s)\n"
+            "print(2.5 in s)\n"
+            "print({1})\n")
+
+    def test_iteration(self):
+        self.assertSameOutput(
+            "s = {1, 2, 3, 1, 2}\n"
+            "total = 0\n"
+            "for x in s:\n"
+            "    total = total + x\n"
+            "print(total)\n")
+
+    def test_unhashable_element(self):
+        self.assertFailsWith(
+            "s = {1}\n"
+            "print([1] in s)\n",
+            "TypeError: unhashable type: 'list'")
+
+
+if __name__ == "__main__":
+    unittest.main()
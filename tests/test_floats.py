@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import unittest
+
+from helpers import ProgramTestCase, skip_unless_python2
+
+
+@skip_unless_python2
+class FloatTest(ProgramTestCase):
+    """
+    Floats, which print with 12 significant digits on their own and
+    the shortest digits that read back the same inside containers.
+    """
+
+    def test_str(self):
+        self.assertSameOutput(
+            "print(1.5)\n"
+            "print(100.0)\n"
+            "print(-0.0)\n"
+            "print(1.0/3)\n"
+            "print(0.0001)\n"
+            "print(0.00001)\n"
+            "print(99999999999.95)\n"
+            "print(123456789012.5)\n"
+            "print(1e11)\n"
+            "print(1e20)\n"
+            "print(5e-324)\n"
+            "print(1e300*1e300)\n"
+            "print(-1e300*1e300)\n")
+
+    def test_repr(self):
+        self.assertSameOutput(
+            "print([0.1, 1.0/3, 123456789012.5, 2.0**53, -0.0])\n"
+            "print([1e15, 1e16, 1e22, 1.5e300, 0.0001, 0.00001])\n"
+            "print([5e-324, 1e300*1e300])\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import ast
+import unittest
+
+from helpers import ProgramTestCase, skip_unless_python2
+
+import infer
+
+
+def infer_source(source):
+    return infer.infer_types(ast.parse(source))
+
+
+@skip_unless_python2
+class ValueBoundsTest(unittest.TestCase):
+    """
+    Which ints are known to fit in a C long.
+    """
+
+    def test_accumulator_in_range_loop(self):
+        types, bounds = infer_source(
+            "total = 0\n"
+            "for i in range(100):\n"
+            "    total = total + i\n")
+        self.assertEqual(types["total"], infer.INT)
+        self.assertEqual(types["i"], infer.INT)
+        self.assertGreaterEqual(bounds["total"], sum(range(100)))
+
+    def test_accumulator_in_nested_range_loops(self):
+        types, bounds = infer_source(
+            "total = 0\n"
+            "for i in range(1000):\n"
+            "    for j in range(i):\n"
+            "        total = total + j\n")
+        self.assertEqual(types["total"], infer.INT)
+        self.assertGreaterEqual(bounds["total"], 1000*1000)
+
+    def test_accumulator_in_while_loop(self):
+        types, bounds = infer_source(
+            "total = 0\n"
+            "while total < 10:\n"
+            "    total = total + 1\n")
+        self.assertEqual(types["total"], infer.OBJECT)
+
+    def test_accumulator_in_object_loop(self):
+        # Counting the elements fits, but adding 2**40 for each of
+        # the most elements a string can have doesn't
+        types, bounds = infer_source(
+            "count = 0\n"
+            "total = 0\n"
+            "for c in 'abc':\n"
+            "    count = count + 1\n"
+            "    total = total + 2**40\n")
+        self.assertEqual(types["count"], infer.INT)
+        self.assertEqual(types["total"], infer.OBJECT)
+
+    def test_multiplied_accumulator(self):
+        types, bounds = infer_source(
+            "h = 1\n"
+            "for i in range(3):\n"
+            "    h = h*31\n")
+        self.assertEqual(types["h"], infer.OBJECT)
+
+    def test_constant_modulus(self):
+        types, bounds = infer_source(
+            "h = 0\n"
+            "while h != 1:\n"
+            "    h = (h*31 + 7) % 1000003\n")
+        self.assertEqual(types["h"], infer.INT)
+        self.assertEqual(bounds["h"], 1000003)
+
+    def test_min_int_literal(self):
+        # The literal fits in a long, but a variable holding it has a
+        # magnitude of 2**63, which +2**63 would too, so it is boxed
+        types, bounds = infer_source(
+            "low = -9223372036854775808\n"
+            "high = 9223372036854775807\n"
+            "x = low + 0\n")
+        self.assertEqual(infer.num_type(infer.MIN_INT), infer.INT)
+        self.assertEqual(types["high"], infer.INT)
+        self.assertEqual(types["low"], infer.OBJECT)
+        self.assertEqual(types["x"], infer.OBJECT)
+
+
+@skip_unless_python2
+class TripCountTest(unittest.TestCase):
+
+    def loop(self, source):
+        return ast.parse(source).body[0]
+
+    def test_range(self):
+        self.assertGreaterEqual(
+            infer.trip_count(self.loop("for i in range(10): pass"), {}), 10)
+
+    def test_range_with_step(self):
+        self.assertGreaterEqual(
+            infer.trip_count(self.loop("for i in range(10, 0, -3): pass"),
+                             {}), 4)
+
+    def test_range_of_unbounded_variable(self):
+        self.assertIsNone(
+            infer.trip_count(self.loop("for i in range(n): pass"),
+                             {"n": None}))
+
+    def test_object_loop(self):
+        self.assertEqual(
+            infer.trip_count(self.loop("for c in 'abc': pass"), {}),
+            infer.MAX_OBJECT_ITERATIONS)
+
+    def test_while_loop(self):
+        self.assertIsNone(
+            infer.trip_count(self.loop("while True: pass"), {}))
+
+
+@skip_unless_python2
+class MinIntTest(ProgramTestCase):
+
+    def test_min_int(self):
+        self.assertSameOutput(
+            "low = -9223372036854775808\n"
+            "print(low)\n"
+            "print(low // -1)\n"
+            "print(low - 1)\n"
+            "for i in range(low, low + 3):\n"
+            "    print(i)\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import unittest
+
+from helpers import ProgramTestCase, skip_unless_python2
+
+
+@skip_unless_python2
+class ListTest(ProgramTestCase):
+
+    def test_literal_and_repr(self):
+        self.assertSameOutput(
+            "a = [1, 2.5, 's', [3, [4]], {5: 6}, {7}, -2**70]\n"
+            "print(a)\n"
+            "print([])\n"
+            "print([[], [[]]])\n")
+
+    def test_subscripts(self):
+        self.assertSameOutput(
+            "a = [1, 2.5, 's', [3, [4]]]\n"
+            "print(a[0])\n"
+            "print(a[-1])\n"
+            "print(a[3][1])\n"
+            "print(a[-4])\n"
+            "a[0] = 10\n"
+            "a[-3] += 1\n"
+            "a[3][1][0] = 'deep'\n"
+            "print(a)\n")
+
+    def test_shared_list(self):
+        # Lists hold references, so a list in two places is one list
+        self.assertSameOutput(
+            "inner = [1]\n"
+            "outer = [inner, inner]\n"
+            "alias = outer\n"
+            "inner[0] = 2\n"
+            "alias[1] = 'x'\n"
+            "print(outer)\n"
+            "print(inner)\n")
+
+    def test_grow_in_loop(self):
+        self.assertSameOutput(
+            "nested = []\n"
+            "for i in range(50):\n"
+            "    nested = [nested, i]\n"
+            "print(nested)\n")
+
+    def test_iteration_and_membership(self):
+        self.assertSameOutput(
+            "total = 0\n"
+            "for x in [1, 2, 3, 2**64]:\n"
+            "    total = total + x\n"
+            "print(total)\n"
+            "a = [1, 'two', 3.5, [4]]\n"
+            "print('two' in a)\n"
+            "print(3.5 in a)\n"
+            "print(3 in a)\n"
+            "print([4] in a)\n"
+            "print(1.0 not in a)\n")
+
+    def test_index_out_of_range(self):
+        self.assertFailsWith(
+            "a = [1]\n"
+            "print(a[3])\n",
+            "IndexError: list index out of range")
+
+    def test_assignment_out_of_range(self):
+        self.assertFailsWith(
+            "a = [1]\n"
+            "a[-2] = 0\n",
+            "IndexError: list assignment index out of range")
+
+    def test_index_of_wrong_type(self):
+        self.assertFailsWith(
+            "a = [1]\n"
+            "print(a['x'])\n",
+            "TypeError: list indices must be integers")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import unittest
+
+from helpers import ProgramTestCase, skip_unless_python2
+
+# Variables of every kind first stored to in a loop body, read after
+# the loop
+STORED_IN_LOOP = (
+    "for i in range(3):\n"
+    "    y = i*2\n"
+    "    s = 'x'\n"
+    "    for j in range(i, i + 2):\n"
+    "        z = j\n"
+    "    for k in range(2):\n"
+    "        w = [k]\n"
+    "    for c in 'ab':\n"
+    "        d = {c: i}\n"
+    "print(y)\n"
+    "print(s)\n"
+    "print(z)\n"
+    "print(w)\n"
+    "print(d)\n"
+    "print(i)\n"
+    "print(j)\n"
+    "print(k)\n"
+    "print(c)\n"
+    "j = 'j'\n"
+    "print(j)\n")
+
+
+@skip_unless_python2
+class LoopScopeTest(ProgramTestCase):
+    """
+    Variables stored to in a loop outlive it, like in python.
+    """
+
+    def test_scalar_first_stored_in_loop(self):
+        self.assertSameOutput(
+            "for i in range(3):\n"
+            "    y = i*2\n"
+            "print(y)\n")
+
+    def test_variables_first_stored_in_loops(self):
+        self.assertSameOutput(STORED_IN_LOOP)
+
+    def test_variables_first_stored_in_loops_with_arena(self):
+        self.assertSameOutput(STORED_IN_LOOP, use_arena=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import unittest
+
+from helpers import (ProgramTestCase, run_python, run_translated,
+                     skip_unless_python2)
+
+
+@skip_unless_python2
+class OutputTest(ProgramTestCase):
+    """
+    The buffered output of translated programs.
+    """
+
+    def test_more_than_the_buffer(self):
+        self.assertSameOutput(
+            "total = 0\n"
+            "for i in range(-50000, 50000):\n"
+            "    total = total + i*i\n"
+            "    print(i*7)\n"
+            "    print([i, 'x'])\n"
+            "print(total)\n")
+
+    def test_output_before_an_error(self):
+        # What was printed before the error still comes out
+        source = ("from __future__ import print_function\n"
+                  "for i in range(3000):\n"
+                  "    print(i)\n"
+                  "d = {}\n"
+                  "print(d[1])\n")
+        expected, expected_code = run_python(source)
+        output, code = run_translated(source)
+        self.assertEqual(output, expected)
+        self.assertEqual(code, expected_code)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import unittest
+
+from helpers import skip_unless_python2
+
+import profiling
+import translate
+
+
+@skip_unless_python2
+class ProfileTest(unittest.TestCase):
+
+    def test_stages(self):
+        profile = profiling.Profile()
+        translate.translate_source(
+            "from __future__ import print_function\n"
+            "for i in range(3):\n"
+            "    print(i)\n", profile=profile)
+        report = profile.as_dict()
+        self.assertEqual([stage["name"] for stage in report["stages"]],
+                         ["parse", "filter", "analyze", "evaluate", "emit"])
+        for stage in report["stages"]:
+            self.assertGreaterEqual(stage["seconds"], 0)
+            if profiling.resource is not None:
+                self.assertGreater(stage["peak_rss_kb"], 0)
+                self.assertGreaterEqual(stage["peak_rss_growth_kb"], 0)
+        self.assertGreater(report["counts"]["ast_nodes"], 0)
+        self.assertGreater(report["counts"]["c_lines"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import unittest
+
+from helpers import ProgramTestCase, skip_unless_python2
+
+
+@skip_unless_python2
+class RangeLoopTest(ProgramTestCase):
+    """
+    range() loops near the ends of a long, where stepping the counter
+    past the stop would overflow it.
+    """
+
+    def test_literal_step_at_long_max(self):
+        self.assertSameOutput(
+            "for v in range(9223372036854775800, 9223372036854775807, 5):\n"
+            "    print(v)\n")
+
+    def test_literal_step_at_long_min(self):
+        self.assertSameOutput(
+            "for v in range(-9223372036854775800, -9223372036854775807 - 1,"
+            " -5):\n"
+            "    print(v)\n")
+
+    def test_runtime_step_at_long_max(self):
+        self.assertSameOutput(
+            "s = 0\n"
+            "for i in range(2):\n"
+            "    s = s + 3\n"
+            "for v in range(9223372036854775800, 9223372036854775807, s):\n"
+            "    print(v)\n")
+
+    def test_runtime_step_at_long_min(self):
+        self.assertSameOutput(
+            "s = 0\n"
+            "for i in range(2):\n"
+            "    s = s - 3\n"
+            "for v in range(-9223372036854775800, -9223372036854775807 - 1,"
+            " s):\n"
+            "    print(v)\n")
+
+    def test_boxed_loop_variable(self):
+        # The loop variable only goes into a list, so it is boxed
+        self.assertSameOutput(
+            "for v in range(9223372036854775800, 9223372036854775807, 4):\n"
+            "    print([v])\n")
+
+    def test_lazy_range_at_long_min(self):
+        # The body stores to the loop variable, so it steps along a Range
+        self.assertSameOutput(
+            "for v in range(-9223372036854775807 - 1, -9223372036854775800):\n"
+            "    v = [v]\n"
+            "    print(v)\n")
+
+    def test_past_int(self):
+        self.assertSameOutput(
+            "for x in range(3000000000, 3000000002):\n"
+            "    print(x)\n"
+            "for y in range(3000000000, 2999999996, -2):\n"
+            "    y = 'a'\n"
+            "    print(y)\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+import client
+import server
+import translate
+
+SAMPLES = os.path.join(ROOT, "samples")
+
+
+@unittest.skipIf(sys.version_info[0] > 2, "The translator runs on python 2")
+class ServerRoundTripTest(unittest.TestCase):
+    """
+    Send the sample programs through a running server the way client.py
+    does, and check it translates them like the CLI.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="py2c-test-")
+        self.path = os.path.join(self.directory, "server.sock")
+        self.server = server.TranslationServer(self.path)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.directory)
+
+    def translate(self, name):
+        path = os.path.join(SAMPLES, name)
+        with open(path, "r") as f:
+            source = f.read()
+        response = client.send({
+            "action": "translate",
+            "source": source,
+            "filename": path,
+            "cache": False,
+        }, self.path)
+        self.assertIsNotNone(response)
+        self.assertTrue(response["ok"], response.get("error"))
+        self.assertEqual(response["code"], translate.translate(path))
+
+    def test_print_test(self):
+        # Has a coding declaration, which a unicode source used to fail on
+        self.translate("print_test.py")
+
+    def test_print_loop(self):
+        self.translate("print_loop.py")
+
+
+@unittest.skipIf(sys.version_info[0] > 2, "The translator runs on python 2")
+class ClientExecuteTest(unittest.TestCase):
+    """
+    Run programs with client.py -e, which translates them in its own
+    process when no server is listening.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="py2c-test-")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def execute(self, source):
+        path = os.path.join(self.directory, "program.py")
+        with open(path, "w") as f:
+            f.write(source)
+        p = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "client.py"), "-e",
+             "--no-cache", "--socket",
+             os.path.join(self.directory, "missing.sock"), path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        output = p.communicate()[0].decode("utf-8")
+        return output, p.returncode
+
+    def test_success(self):
+        output, code = self.execute(
+            "from __future__ import print_function\n"
+            "print(1)\n")
+        self.assertEqual(output, "1\n")
+        self.assertEqual(code, 0)
+
+    def test_failing_program(self):
+        output, code = self.execute(
+            "from __future__ import print_function\n"
+            "x = 1\n"
+            "s = 0\n"
+            "s = s - 1\n"
+            "print(x >> s)\n")
+        self.assertIn("ValueError: negative shift count", output)
+        self.assertEqual(code, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
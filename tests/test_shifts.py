@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import unittest
+
+from helpers import ProgramTestCase, skip_unless_python2
+
+
+@skip_unless_python2
+class ShiftTest(ProgramTestCase):
+    """
+    Shifts of C longs by counts that C leaves undefined.
+    """
+
+    def test_right_shift_past_width(self):
+        self.assertSameOutput(
+            "x = -5\n"
+            "y = 5\n"
+            "for s in range(62, 67):\n"
+            "    print(x >> s)\n"
+            "    print(y >> s)\n")
+
+    def test_left_shift(self):
+        self.assertSameOutput(
+            "x = 3\n"
+            "for s in range(0, 60, 7):\n"
+            "    print(x << s)\n"
+            "    print(-x << s)\n")
+
+    def test_left_shift_too_big_for_a_long(self):
+        self.assertSameOutput(
+            "x = 3\n"
+            "for s in range(60, 70):\n"
+            "    print(x << s)\n")
+
+    def test_negative_right_shift_count(self):
+        self.assertFailsWith(
+            "x = 7\n"
+            "s = 0\n"
+            "s = s - 2\n"
+            "print(x >> s)\n",
+            "ValueError: negative shift count")
+
+    def test_negative_left_shift_count(self):
+        self.assertFailsWith(
+            "x = 7\n"
+            "s = 0\n"
+            "s = s - 2\n"
+            "print(x << s)\n",
+            "ValueError: negative shift count")
+
+
+if __name__ == "__main__":
+    unittest.main()
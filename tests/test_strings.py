@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import unittest
+
+from helpers import ProgramTestCase, skip_unless_python2
+
+
+@skip_unless_python2
+class StringTest(ProgramTestCase):
+
+    def test_print_and_repr(self):
+        self.assertSameOutput(
+            "words = [\"it's\", 'a \"quote\"', 'back\\\\slash', 'tab\\there',\n"
+            "         'nl\\n', 'caf\\xc3\\xa9', '', '\\'\"']\n"
+            "print(words)\n"
+            "for w in words:\n"
+            "    print(w)\n")
+
+    def test_nul_bytes(self):
+        self.assertSameOutput(
+            "s = 'a\\x00b\\x7f'\n"
+            "print(s)\n"
+            "print([s])\n"
+            "print(s[2])\n"
+            "print('\\x00' in s)\n")
+
+    def test_subscripts_and_iteration(self):
+        self.assertSameOutput(
+            "s = 'hello'\n"
+            "print(s[1])\n"
+            "print(s[-1])\n"
+            "print([s[0]])\n"
+            "for c in s:\n"
+            "    print(c)\n")
+
+    def test_membership(self):
+        self.assertSameOutput(
+            "print('x' in 'xyz')\n"
+            "print('xy' in 'xyz')\n"
+            "print('' in 'xyz')\n"
+            "print('yx' in 'xyz')\n"
+            "s = {'ab': 1}\n"
+            "print('ab' in s)\n")
+
+    def test_index_out_of_range(self):
+        self.assertFailsWith(
+            "s = 'ab'\n"
+            "print(s[5])\n",
+            "IndexError: string index out of range")
+
+    def test_item_assignment(self):
+        self.assertFailsWith(
+            "s = 'ab'\n"
+            "s[0] = 'c'\n",
+            "TypeError")
+
+
+if __name__ == "__main__":
+    unittest.main()
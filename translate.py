@@ -6,9 +6,15 @@ import re
 import ast
 
 import blocks
+import expressions
+import infer
+import profiling
+import runtime
 
 from block_utils import *
 
+__version__ = "0.2.0"
+
 
 def prettyparseprintfile(filename, spaces=4):
     with open(filename, "r") as f:
@@ -43,32 +49,84 @@ def prettyparseprint(code, spaces=4):
     print(text)
 
 
-def includes_from_code(code):
+# C library headers of the functions generated code calls directly
+C_LIBRARY_HEADERS = (
+    ("printf", "<stdio.h>"),
+    ("floor", "<math.h>"),
+    ("pow", "<math.h>"),
+)
+
+
+def referenced_names(top):
+    """
+    Return the set of identifiers used by the C code of a block and
+    every block nested in it.
+    """
+    names = set()
+    for block in blocks.walk(top):
+        if isinstance(block, blocks.InlineBlock):
+            text = str(block)
+        else:
+            text = block.header()
+            if text is None:
+                continue
+        names.update(runtime.identifiers(text))
+    return names
+
+
+def includes_from_blocks(top):
     """
     Return a list of #includes that are necessary to run the
-    C code.
+    C code of the blocks: the C library headers it calls and the
+    headers of the runtime modules it uses (which include the
+    modules they use in turn).
     """
+    names = referenced_names(top)
     includes = []
-    if any("print" in line for line in code):
-        includes.append(blocks.StringBlock("#include <stdio.h>"))
-        includes.append(blocks.StringBlock('#include "c_utils/utils.h"'))
-
+    for function, header in C_LIBRARY_HEADERS:
+        include = "#include {}".format(header)
+        if function in names and include not in includes:
+            includes.append(include)
+    for module in runtime.modules_used(names):
+        includes.append('#include "c_utils/{}.h"'.format(module))
+
+    includes = [blocks.StringBlock(include) for include in includes]
     # Add a blank line for no reason
     includes.append(blocks.StringBlock())
     return includes
 
 
-def main_function():
+def arena_scope(block):
+    """
+    Make a loop body run inside its own arena so every object made
+    in it is released in one shot when the body exits. The arena is
+    closed after the destructors (which get prepended to the
+    sticky_end).
+    """
+    block.sticky_front = [blocks.StringBlock("arena_open();")] + \
+        block.sticky_front
+    block.append_sticky_end(blocks.StringBlock("arena_close();"))
+    return block
+
+
+def main_function(use_arena=False):
     """
     Return a standard main function block.
     """
+    sticky_front = []
+    sticky_end = [blocks.StringBlock("return 0;")]
+    if use_arena:
+        # Close the arena after the destructors but before returning.
+        sticky_front = [blocks.StringBlock("arena_open();")]
+        sticky_end = [blocks.StringBlock("arena_close();")] + sticky_end
+
     main_block = blocks.FunctionBlock(
         "int", "main", [
             blocks.ExprBlock("int", "argc", is_arg=True),
             blocks.ExprBlock("char", "argv", pointer_depth=1, array_depth=1,
                              is_arg=True)
         ],
-        sticky_end=[blocks.StringBlock("return 0;")]
+        sticky_front=sticky_front, sticky_end=sticky_end
     )
     return main_block
 
@@ -111,161 +169,448 @@ def filter_body_nodes(body):
     return nodes
 
 
-def get_op(op, arg1, arg2):
-    if isinstance(op, ast.Add):
-        return "{} + {}".format(arg1, arg2)
-    elif isinstance(op, ast.Sub):
-        return "{} - {}".format(arg1, arg2)
-    elif isinstance(op, ast.Mult):
-        return "{} * {}".format(arg1, arg2)
-    elif isinstance(op, ast.Div) or isinstance(op, ast.FloorDiv):
-        return "{} / {}".format(arg1, arg2)
-    elif isinstance(op, ast.Mod):
-        return "{} % {}".format(arg1, arg2)
-    elif isinstance(op, ast.pow):
-        return "pow((double){}, (double){})".format(arg1, arg2)
-    elif isinstance(op, ast.LShift):
-        return "{} << {}".format(arg1, arg2)
-    elif isinstance(op, ast.RShift):
-        return "{} >> {}".format(arg1, arg2)
-    elif isinstance(op, ast.BitOr):
-        return "{} | {}".format(arg1, arg2)
-    elif isinstance(op, ast.BitXor):
-        return "{} ^ {}".format(arg1, arg2)
-    elif isinstance(op, ast.BitAnd):
-        return "{} & {}".format(arg1, arg2)
-    raise Exception("Could not identify operator " + str(op))
-
-
-def handle_op_node(node):
-    if isinstance(node, ast.BinOp):
-        if isinstance(node.left, ast.Num) and isinstance(node.right, ast.Num):
-            return get_op(node.op, node.left.n, node.right.n)
-    elif isinstance(node, ast.Num):
-        return node.n
-    raise Exception("Could not identify node op")
-
-
-def evaluate_node(node, parent):
+def range_argument(node, info):
+    """
+    Return an argument of range() as an int if it can be folded,
+    or as a C expression otherwise.
+    info:
+        expressions.ModuleInfo for the module.
+    """
+    value = expressions.fold(node, info.constants, info.true_division)
+    if value is not None:
+        if not isinstance(value, (int, long)):
+            raise Exception("range() arguments must be ints")
+        elif not infer.MIN_INT <= value <= infer.MAX_INT:
+            raise Exception(
+                "No support yet for range() arguments too big for a long")
+        return value
+    elif infer.expr_type(node, info.types, info.true_division,
+                         info.bounds) != infer.INT:
+        raise Exception("range() arguments must be ints")
+    return expressions.lower(node, info)
+
+
+def c_operand(value):
+    """
+    Wrap a C expression returned by range_argument in parentheses
+    so it can be safely used as an operand of another operator.
+    """
+    if isinstance(value, (int, long, float)):
+        # The literal for MIN_INT is an expression of its own
+        return expressions.c_literal(value)
+    return "({})".format(value)
+
+
+def assigns_name(name, nodes):
+    """
+    Check if any of the nodes (or the nodes within them) store
+    to the variable called name.
+    """
+    for node in nodes:
+        for child in ast.walk(node):
+            if (isinstance(child, ast.Name) and child.id == name and
+                    isinstance(child.ctx, ast.Store)):
+                return True
+    return False
+
+
+def is_declared(name, block):
+    """
+    Check if a variable is already declared in the scope of a block.
+    """
+    return name in block.scope
+
+
+def stored_names(nodes):
+    """
+    Return the names of the variables the nodes (or the nodes within
+    them) store to, in the order they are first found.
+    """
+    names = []
+    for node in nodes:
+        for child in ast.walk(node):
+            if (isinstance(child, ast.Name) and
+                    isinstance(child.ctx, ast.Store) and
+                    child.id not in names):
+                names.append(child.id)
+    return names
+
+
+def declare_variable(name, parent, info):
+    """
+    Declare a variable in the scope of parent ahead of the first store
+    to it, which is in a block nested in parent, like the body of a
+    loop. The variable then keeps its value after that block like in
+    python, instead of being declared anew every time it runs.
+    """
+    var_type = info.var_type(name)
+    if infer.is_scalar(var_type):
+        parent.append_block(blocks.ExprBlock(infer.C_TYPES[var_type], name))
+    else:
+        # NULL until the first store, so it is let go of with xdecref
+        parent.append_block(blocks.AssignBlock(
+            "Object", name, "NULL", pointer_depth=1))
+        parent.prepend_sticky_end(
+            blocks.StringBlock("xdecref({});".format(name)))
+
+
+def for_each_block(name, iterable, is_new, parent, use_arena=False):
+    """
+    Return a loop that sets the object variable name to each element
+    of an object in turn, with an iterator that walks its storage.
+    The variable lives in the enclosing scope, so like in python it
+    keeps the last element after the loop (or its old value if there
+    were none).
+    iterable:
+        C expression for the Object* to iterate over.
+    is_new:
+        Whether the expression creates a new object, which is then let
+        go of after the loop.
+    parent:
+        Block the loop is going to be added to.
+    use_arena:
+        Whether the body of the loop gets its own arena, which the
+        elements have to outlive.
+    """
+    before = []
+    after = []
+    if not is_declared(name, parent):
+        # NULL until the first element, so it is let go of with xdecref
+        var = blocks.AssignBlock("Object", name, "NULL", pointer_depth=1)
+        before.append(var)
+        parent.prepend_sticky_end(
+            blocks.StringBlock("xdecref({});".format(name)))
+    if is_new:
+        iterable_obj = blocks.AssignBlock(
+            "Object", parent.scope.unique_name("temp_iterable"), iterable,
+            pointer_depth=1)
+        before.append(iterable_obj)
+        after.append(iterable_obj.destructor())
+        iterable = iterable_obj.name
+
+    iterator = blocks.ExprBlock("Iterator",
+                                parent.scope.unique_name("iter_" + name))
+    before.append(iterator)
+    after.insert(0, blocks.StringBlock(
+        "iter_release(&{});".format(iterator.name)))
+
+    # next makes a new reference every time, which the variable takes
+    # over from the element before it.
+    elem = "next(&{})".format(iterator.name)
+    if use_arena:
+        elem = "promote({})".format(elem)
+    return blocks.ForEachBlock(
+        iterator.name, iterable, before=before, after=after,
+        sticky_front=[blocks.StringBlock(
+            "set_ref(&{}, {});".format(name, elem))])
+
+
+def subscript_block(function, target, args, info):
+    """
+    Return the line storing to or deleting a subscript like d[k] with
+    a runtime function, which takes over the container, the key and
+    the rest of its arguments.
+    args:
+        C expressions for the arguments after the key.
+    """
+    if not isinstance(target.slice, ast.Index):
+        raise Exception("No support yet for slicing")
+    args = [blocks.owned_value(target.value, info),
+            blocks.owned_value(target.slice.value, info)] + args
+    return blocks.StringBlock("{}({});".format(function, ", ".join(args)))
+
+
+def evaluate_node(node, parent, use_arena=False, info=None):
     """
     Given a node, evaluate it and adda a result the parent node.
+    use_arena:
+        Give the body of every loop its own arena scope.
+    info:
+        expressions.ModuleInfo with the inferred types and constants
+        of the module.
     """
     # prettyparseprint(node)
+    info = info or expressions.ModuleInfo()
     if isinstance(node, ast.For):
         iterator = node.target.id
+        var_type = info.var_type(iterator)
 
-        # Add unique iterator (int) that may be reused
-        iterator_block = blocks.ExprBlock("int", "iter_" + str(iterator))
-        if iterator_block not in parent.variables:
-            parent.append_block(iterator_block)
+        # Variables first stored to in the body outlive the loop
+        for name in stored_names(node.body):
+            if name != iterator and not is_declared(name, parent):
+                declare_variable(name, parent, info)
 
-        if node.iter.func.id == "range":
-            # Create a new list to be immediately used then destroyed.
-            # First find the appropriate parameters for the C range func.
+        if infer.is_range_call(node.iter):
+            # First find the appropriate parameters for the range.
             if len(node.iter.args) == 1:
                 start = 0
-                stop = handle_op_node(node.iter.args[0])
+                stop = range_argument(node.iter.args[0], info)
                 step = 1
             elif len(node.iter.args) == 2:
-                start = handle_op_node(node.iter.args[0])
-                stop = handle_op_node(node.iter.args[1])
+                start = range_argument(node.iter.args[0], info)
+                stop = range_argument(node.iter.args[1], info)
                 step = 1
             elif len(node.iter.args) == 3:
-                start = handle_op_node(node.iter.args[0])
-                stop = handle_op_node(node.iter.args[1])
-                step = handle_op_node(node.iter.args[2])
+                start = range_argument(node.iter.args[0], info)
+                stop = range_argument(node.iter.args[1], info)
+                step = range_argument(node.iter.args[2], info)
             else:
                 raise Exception(
                     "Invalid number of arguments found for range")
 
-            # Create the range
-            range_obj = blocks.AssignBlock(
-                "Object", "temp_range_list"+str(len(parent.variables)),
-                "range({},{},{})".format(start, stop, step),
-                pointer_depth=1)
-
-            # Create the getter object for the iterator.
-            # This does not need ot be freed since we are just
-            # redirecting a pointer.
-            num_obj = blocks.AssignBlock(
-                "Object", iterator,
-                "list_get({}, {})"
-                .format(range_obj.name, iterator_block.name),
-                pointer_depth=1)
-
-            # Create the loop, and put the range constructor before it
-            # and the range destructor after it.
-            range_block = blocks.ForBlock(
-                iterator_block.name, "{}->length".format(range_obj.name),
-                before=[range_obj], after=[range_obj.destructor()],
-                sticky_front=[num_obj])
-
-            # Add the for loop to the parent block
-            parent.append_block(range_block)
-
-            # Add the contents of the body of the for loop.
-            # Filter for unecessary lines first.
-            for_body = filter_body_nodes(node.body)
-            for f_node in for_body:
-                evaluate_node(f_node, range_block)
+            if infer.is_scalar(var_type):
+                # The loop variable is a plain C scalar declared in the
+                # enclosing scope. Count with a separate counter so writes
+                # to the variable in the body don't change the iteration
+                # and it keeps its last value after the loop like in python.
+                c_type = infer.C_TYPES[var_type]
+                if not is_declared(iterator, parent):
+                    declare_variable(iterator, parent, info)
+
+                counter = "iter_" + iterator
+                if assigns_name(iterator, node.body):
+                    # Nested loops over the same name need their own counter
+                    counter = parent.scope.unique_name(counter)
+                iterator_block = blocks.ExprBlock(c_type, counter)
+                if iterator_block.name not in parent.scope:
+                    parent.append_block(iterator_block)
+
+                loop_block = blocks.ForBlock(
+                    iterator_block.name, c_operand(stop),
+                    start=c_operand(start), step=step,
+                    sticky_front=[blocks.StringBlock(
+                        "{} = {};".format(iterator, iterator_block.name))])
+            elif not assigns_name(iterator, node.body):
+                # The loop variable is only read, so count through the
+                # values of the range with a native C loop and box the
+                # current value for the body into the variable, which
+                # is declared in the enclosing scope.
+                if not is_declared(iterator, parent):
+                    declare_variable(iterator, parent, info)
+                # Add unique iterator (a C long, like an INT variable)
+                # that may be reused
+                iterator_block = blocks.ExprBlock(
+                    infer.C_TYPES[infer.INT], "iter_" + iterator)
+                if iterator_block.name not in parent.scope:
+                    parent.append_block(iterator_block)
+
+                num_obj = "new_Integer({})".format(iterator_block.name)
+                if use_arena:
+                    num_obj = "promote({})".format(num_obj)
+                loop_block = blocks.ForBlock(
+                    iterator_block.name, c_operand(stop),
+                    start=c_operand(start), step=step,
+                    sticky_front=[blocks.StringBlock(
+                        "set_ref(&{}, {});".format(iterator, num_obj))])
+            else:
+                # The body writes to the loop variable, so step along a
+                # lazy range instead. Its elements are computed as they
+                # are reached, so nothing is allocated up front.
+                loop_block = for_each_block(
+                    iterator, "new_Range({},{},{})".format(
+                        c_operand(start), c_operand(stop), c_operand(step)),
+                    True, parent, use_arena=use_arena)
+        else:
+            # Anything else is iterated over with the iterator protocol
+            iterable, is_new = blocks.box_value(node.iter, info)
+            loop_block = for_each_block(iterator, iterable, is_new, parent,
+                                        use_arena=use_arena)
+
+        if use_arena:
+            arena_scope(loop_block)
+
+        # Add the for loop to the parent block
+        parent.append_block(loop_block)
+
+        # Add the contents of the body of the for loop.
+        # Filter for unecessary lines first.
+        for_body = filter_body_nodes(node.body)
+        for f_node in for_body:
+            evaluate_node(f_node, loop_block, use_arena=use_arena,
+                          info=info)
     elif isinstance(node, ast.Expr):
         if isinstance(node.value, ast.Call):
             if node.value.func.id == "print":
                 arguments = node.value.args
                 if len(arguments) == 1:
-                    arg = arguments[0]
-                    parent.append_block(blocks.PrintBlock(arg))
+                    parent.append_block(blocks.PrintBlock(
+                        arguments[0], info=info))
     elif isinstance(node, ast.Assign):
-        targets = node.targets
-        value = node.value
-        if is_literal(value):
-            if isinstance(value, ast.Num):
-                var = value.n
-                for target in targets:
-                    # Make sure the target is a variable
-                    # and you are storing a value
-                    assert isinstance(target, ast.Name)
-                    assert isinstance(target.ctx, ast.Store)
-                    num_obj = blocks.AssignBlock(
-                        "Object", target.id, "new_Integer({})".format(var),
-                        pointer_depth=1)
-                    parent.append_block(num_obj)
-                    parent.prepend_sticky_end(num_obj.destructor())
+        for target in node.targets:
+            if isinstance(target, ast.Subscript):
+                parent.append_block(subscript_block(
+                    "store_subscr", target,
+                    [blocks.owned_value(node.value, info)], info))
+                continue
+            # Make sure the target is a variable
+            # and you are storing a value
+            assert isinstance(target, ast.Name)
+            assert isinstance(target.ctx, ast.Store)
+            var_type = info.var_type(target.id)
+            if infer.is_scalar(var_type):
+                # Plain C variable. It only needs declaring the
+                # first time it is stored to.
+                var = expressions.lower(node.value, info)
+                if is_declared(target.id, parent):
+                    parent.append_block(blocks.StringBlock(
+                        "{} = {};".format(target.id, var)))
+                else:
+                    parent.append_block(blocks.AssignBlock(
+                        infer.C_TYPES[var_type], target.id, var))
             else:
+                # The variable owns a reference to its object
+                var = blocks.owned_value(node.value, info)
+                if is_declared(target.id, parent):
+                    if use_arena and not parent.scope.is_local(target.id):
+                        # The variable outlives the arena of this block
+                        var = "promote({})".format(var)
+                    parent.append_block(blocks.StringBlock(
+                        "set_ref(&{}, {});".format(target.id, var)))
+                else:
+                    obj = blocks.AssignBlock(
+                        "Object", target.id, var, pointer_depth=1)
+                    parent.append_block(obj)
+                    parent.prepend_sticky_end(obj.destructor())
+    elif isinstance(node, ast.AugAssign):
+        target = node.target
+        if isinstance(target, ast.Subscript):
+            # d[k] += v is d[k] = d[k] + v. Working the container and
+            # the key out twice is the same as once as long as they
+            # don't call anything.
+            if any(isinstance(child, ast.Call) for child in ast.walk(target)):
                 raise Exception(
-                    "No support yet for loading a value from literal {}"
-                    .format(value))
-        else:
+                    "No support yet for augmented assignment to a "
+                    "subscript with a call in it")
+            load = ast.Subscript(value=target.value, slice=target.slice,
+                                 ctx=ast.Load())
+            evaluate_node(ast.Assign(targets=[target],
+                                     value=ast.BinOp(load, node.op,
+                                                     node.value)),
+                          parent, use_arena=use_arena, info=info)
+            return
+        if not isinstance(target, ast.Name):
             raise Exception(
-                "No support yet for loading a value from a non-literal")
+                "No support yet for augmented assignment to a non-name")
+        value = ast.BinOp(ast.Name(id=target.id, ctx=ast.Load()), node.op,
+                          node.value)
+        if infer.is_scalar(info.var_type(target.id)):
+            parent.append_block(blocks.StringBlock(
+                "{} = {};".format(target.id, expressions.lower(value, info))))
+        else:
+            # Same as assigning the result of the operator
+            evaluate_node(ast.Assign(targets=[target], value=value), parent,
+                          use_arena=use_arena, info=info)
+    elif isinstance(node, ast.Delete):
+        for target in node.targets:
+            if not isinstance(target, ast.Subscript):
+                raise Exception("No support yet for deleting a variable")
+            parent.append_block(subscript_block("delete_subscr", target, [],
+                                                info))
+
+
+def validate(text, filename="<string>"):
+    """
+    Check that the python source is valid by compiling it in this
+    process, without running it. Raises SyntaxError if it isn't.
+    """
+    compile(text, filename, "exec", 0, True)
 
 
-def translate(file_, indent_size=4):
+def translate(file_, indent_size=4, use_arena=False, output=None, cache=None,
+              profile=None):
     """
-    The function for actually translating the code.
-    code:
-        List containing lines of code.
+    Translate the python file at file_. See translate_source.
     """
-    # Setup
     with open(file_, "r") as f:
         text = f.read()
-        nodes = ast.parse(text).body
-        code = text.splitlines()
-    blocks.Block.indent = indent_size
-    top = blocks.Block(should_indent=False)
+    return translate_source(text, indent_size=indent_size,
+                            use_arena=use_arena, output=output, cache=cache,
+                            profile=profile)
 
-    # Run filtering process
-    code = filter(should_keep_line, code)
-
-    # Include includes
-    top.append_blocks(includes_from_code(code))
 
-    # Add main function
-    main_func = main_function()
-    top.append_block(main_func)
+def translate_source(text, indent_size=4, use_arena=False, output=None,
+                     cache=None, profile=None):
+    """
+    The function for actually translating the code.
+    text:
+        Python source code.
+    use_arena:
+        Allocate the objects of main and every loop body in an arena
+        that is released in one shot when the scope exits.
+    output:
+        File-like object to stream the C code to line by line.
+        If not given, the code is returned as a string instead.
+    cache:
+        TranslationCache (see cache) to look the translation up in
+        before doing it, and to store it in after.
+    profile:
+        profiling.Profile to record the cost of each stage in.
+    """
+    # Setup
+    if cache is not None:
+        with profiling.stage(profile, "cache"):
+            key = cache.key(text, indent_size=indent_size,
+                            use_arena=use_arena)
+            code = cache.get(key)
+        if code is not None:
+            if profile is not None:
+                profile.count("cache_hits")
+                profile.count("c_bytes", len(code) + 1)
+            if output is not None:
+                output.write(code)
+                output.write("\n")
+                return None
+            return code
+
+    with profiling.stage(profile, "parse"):
+        tree = ast.parse(text)
+    if profile is not None:
+        profile.count("ast_nodes", sum(1 for _ in ast.walk(tree)))
 
-    nodes = filter_body_nodes(nodes)
-    for node in nodes:
-        evaluate_node(node, main_func)
+    # Run filtering process
+    with profiling.stage(profile, "filter"):
+        nodes = filter_body_nodes(tree.body)
 
-    return str(top)
+    blocks.Block.indent = indent_size
+    top = blocks.Block(should_indent=False)
+    main_func = main_function(use_arena=use_arena)
+
+    # Find which variables can be plain C scalars and which are constants
+    with profiling.stage(profile, "analyze"):
+        info = expressions.analyze_module(tree)
+
+    with profiling.stage(profile, "evaluate"):
+        for node in nodes:
+            evaluate_node(node, main_func, use_arena=use_arena, info=info)
+
+        # Include only what the code turned out to use
+        top.append_blocks(includes_from_blocks(main_func))
+        top.append_block(main_func)
+    if profile is not None:
+        for block in blocks.walk(top):
+            profile.count("blocks")
+            if not isinstance(block, blocks.InlineBlock):
+                profile.count("variables", len(block.scope.symbols))
+        if output is not None:
+            output = profiling.CountingSink(output)
+
+    with profiling.stage(profile, "emit"):
+        if output is not None and cache is not None:
+            # Stream into the cache at the same time
+            with cache.writer(key, output) as entry:
+                top.write(entry)
+        elif output is not None:
+            top.write(output)
+        else:
+            code = str(top)
+            if cache is not None:
+                cache.put(key, code)
+
+    if profile is not None:
+        if output is not None:
+            profile.count("c_bytes", output.size)
+            profile.count("c_lines", output.lines)
+        else:
+            profile.count("c_bytes", len(code) + 1)
+            profile.count("c_lines", code.count("\n") + 1)
+    return None if output is not None else code